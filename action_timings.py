@@ -0,0 +1,152 @@
+import cProfile
+import csv
+import functools
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from save_worker import write_atomic
+
+
+class ActionTimings:
+    """
+    Opt-in latency instrumentation of the annotation tool.
+
+    instrument() replaces methods of an object with timed wrappers:
+    "actions" (a click or key press) and the "phases" they run (render,
+    stats, persist, ...). Every call is timed with perf_counter, counted
+    in a log-scale histogram per name and kept in a bounded trace. After
+    each action, the time until Tk is idle again (redraw and layout
+    included) is recorded as "layout". Optionally the first N actions
+    are run under cProfile.
+    """
+
+    # Upper bounds of the histogram buckets, in milliseconds
+    BOUNDS_MS = np.geomspace(0.01, 60000, 97)
+
+    def __init__(self, trace_limit=100000):
+        self.histograms = {}  # name -> int64 counts per bucket (last = beyond the bounds)
+        self.max_ms = {}  # name -> slowest call
+        self.trace = deque(maxlen=trace_limit)  # (action, name, start, ms)
+        self.action = None  # Name of the action running now
+        self.after_idle = None  # Tk after_idle, to time layout after an action
+        self.profiler = None
+        self.profile_actions = 0  # Actions still to be profiled
+        self.profile_path = None
+
+    def instrument(self, obj, actions=(), phases=()):
+        """
+        Wraps the methods of obj named in actions and phases, which map
+        method name -> timing name. Call before the methods are handed
+        to widgets as commands.
+        """
+        for attribute, name in actions.items():
+            setattr(obj, attribute, self._timed(getattr(obj, attribute), name, action=True))
+        for attribute, name in phases.items():
+            setattr(obj, attribute, self._timed(getattr(obj, attribute), name))
+
+    def profile(self, actions, path):
+        """
+        Runs the next `actions` actions under cProfile and writes the
+        stats to path (for pstats or snakeviz) once they are done.
+        """
+        self.profiler = cProfile.Profile()
+        self.profile_actions = actions
+        self.profile_path = path
+
+    def _timed(self, func, name, action=False):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            # Nested actions (next_row inside annotate_and_next) count as part of the outer one
+            outer = action and self.action is None
+            if outer:
+                self.action = name
+                if self.profile_actions:
+                    self.profiler.enable()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.record(name, start, (end - start) * 1000)
+                if outer:
+                    self._finish_action(name, end)
+
+        return timed
+
+    def _finish_action(self, name, end):
+        self.action = None
+        if self.profile_actions:
+            self.profiler.disable()
+            self.profile_actions -= 1
+            if not self.profile_actions:
+                self.profiler.dump_stats(self.profile_path)
+                print(f"✓ Wrote profile of the last actions to {self.profile_path}")
+        if self.after_idle is not None:
+            self.after_idle(lambda: self.record("layout", end, (time.perf_counter() - end) * 1000, name))
+
+    def record(self, name, start, ms, action=None):
+        counts = self.histograms.get(name)
+        if counts is None:
+            counts = self.histograms[name] = np.zeros(len(self.BOUNDS_MS) + 1, dtype=np.int64)
+        counts[np.searchsorted(self.BOUNDS_MS, ms)] += 1
+        self.max_ms[name] = max(self.max_ms.get(name, 0.0), ms)
+        self.trace.append((action or self.action or "", name, start, ms))
+
+    def percentiles(self, name, quantiles=(50, 95, 99)):
+        """
+        Returns the given percentiles of name in ms, read off the
+        histogram (upper bound of the bucket they fall in).
+        """
+        counts = self.histograms[name]
+        cumulative = np.cumsum(counts)
+        bounds = np.append(self.BOUNDS_MS, self.max_ms[name])
+        return [
+            float(min(bounds[np.searchsorted(cumulative, cumulative[-1] * q / 100)], self.max_ms[name]))
+            for q in quantiles
+        ]
+
+    def summary(self):
+        """
+        Returns {name: {count, p50_ms, p95_ms, p99_ms, max_ms}}, slowest p95 first.
+        """
+        rows = {}
+        for name, counts in self.histograms.items():
+            p50, p95, p99 = self.percentiles(name)
+            rows[name] = {"count": int(counts.sum()), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                          "max_ms": self.max_ms[name]}
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["p95_ms"]))
+
+    def format_summary(self):
+        lines = [f"{'':<22}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}  ms"]
+        for name, row in self.summary().items():
+            lines.append(f"{name:<22}{row['count']:>7}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """
+        Writes the trace and summary: a CSV of every timed call if path
+        ends in .csv, otherwise JSON with the summary, the histograms
+        and the trace.
+        """
+        if path.endswith(".csv"):
+            def write(fh):
+                writer = csv.writer(fh)
+                writer.writerow(["action", "name", "start", "ms"])
+                writer.writerows(self.trace)
+        else:
+            report = {
+                "summary": self.summary(),
+                "histogram_bounds_ms": self.BOUNDS_MS.tolist(),
+                "histograms": {name: counts.tolist() for name, counts in self.histograms.items()},
+                "trace": [
+                    {"action": action, "name": name, "start": start, "ms": ms}
+                    for action, name, start, ms in self.trace
+                ],
+            }
+
+            def write(fh):
+                json.dump(report, fh)
+        write_atomic(path, write)
@@ -0,0 +1,142 @@
+"""
+Headless bulk operations on an annotation CSV or project file.
+
+    python annotate_cli.py stats dataset.csv
+    python annotate_cli.py apply-labels dataset.csv labels.csv --key message_id
+    python annotate_cli.py export-labeled dataset.annproj labeled.csv --classes 2 3
+    python annotate_cli.py reset-skips dataset.csv
+
+Uses the same data model as the GUI without creating a window: journaled
+changes are replayed on open, every operation is applied to whole columns
+at once, and the result is written back (CSV) or committed (project) in
+one go. apply-labels reads a CSV with a label column and either a 0-based
+`row` column or a --key column shared with the dataset.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from annotation_core import AnnotationDataset
+
+CLASSES = ["1", "2", "3"]
+
+
+def read_label_file(path, key, label_column):
+    labels = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''])
+    for column in (key, label_column):
+        if column not in labels.columns:
+            raise SystemExit(f"✗ {path} has no '{column}' column")
+    return labels[[key, label_column]].dropna()
+
+
+def target_rows(dataset, labels, key):
+    """
+    Returns the dataset row of every entry of labels (-1 if unknown).
+    """
+    if key == "row":
+        rows = pd.to_numeric(labels[key], errors="coerce").fillna(-1).to_numpy(dtype=np.int64, copy=True)
+        rows[(rows < 0) | (rows >= dataset.total_rows)] = -1
+        return rows
+
+    try:
+        keys = pd.Index(pd.Series(dataset.column_values(key)).astype(str))
+    except KeyError:
+        raise SystemExit(f"✗ The dataset has no '{key}' column")
+    if not keys.is_unique:
+        raise SystemExit(f"✗ '{key}' is not unique in the dataset")
+    return keys.get_indexer(labels[key])
+
+
+def apply_labels(dataset, args):
+    labels = read_label_file(args.labels, args.key, args.label_column)
+    rows = target_rows(dataset, labels, args.key)
+    values = labels[args.label_column].str.strip().to_numpy(dtype=object)
+
+    known = rows >= 0
+    allowed = np.isin(values, args.classes)
+    valid = known & allowed
+    if args.keep_existing:
+        valid &= dataset.df[dataset.annotation_column].isna().to_numpy()[np.where(known, rows, 0)]
+
+    # The last entry for a row wins
+    rows, values = rows[valid], values[valid]
+    _, last = np.unique(rows[::-1], return_index=True)
+    keep = np.sort(len(rows) - 1 - last)
+    rows, values = rows[keep], values[keep]
+
+    dataset.record(dataset.apply_labels(rows, values))
+    print(f"✓ Applied {len(rows):,} label(s)")
+    if (~known).any():
+        print(f"✗ {int((~known).sum()):,} entries matched no row")
+    if (known & ~allowed).any():
+        print(f"✗ {int((known & ~allowed).sum()):,} entries had a label other than {', '.join(args.classes)}")
+    return len(rows) > 0
+
+
+def export_labeled(dataset, args):
+    written = dataset.export_labeled(args.output, args.classes)
+    print(f"✓ Exported {written:,} labelled row(s) to {args.output}")
+    return False
+
+
+def reset_skips(dataset, args):
+    changes = dataset.reset_skips()
+    dataset.record(changes)
+    print(f"✓ Cleared {len(changes):,} skip flag(s)")
+    return bool(changes)
+
+
+def show_stats(dataset, args):
+    stats = dataset.stats(args.classes)
+    if args.json:
+        print(json.dumps(stats))
+        return False
+    classes = " · ".join(f"{label}: {count:,}" for label, count in stats["classes"].items())
+    print(f"Annotated: {stats['annotated']:,} / {stats['total']:,} ({stats['percentage']:.1f}%)"
+          f" | {classes} | Skipped: {stats['skipped']:,} | Notes: {stats['noted']:,}")
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, func, help):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument("dataset", help="CSV or project file (.annproj)")
+        sub.set_defaults(func=func)
+        return sub
+
+    sub = command("stats", show_stats, "print annotation counts")
+    sub.add_argument("--classes", nargs="+", default=CLASSES)
+    sub.add_argument("--json", action="store_true", help="print the counts as JSON")
+
+    sub = command("apply-labels", apply_labels, "label rows from another CSV")
+    sub.add_argument("labels", help="CSV with a label column and a row or key column")
+    sub.add_argument("--key", default="row", help="column matching the dataset (default: 0-based row)")
+    sub.add_argument("--label-column", default="label")
+    sub.add_argument("--classes", nargs="+", default=CLASSES, help="accepted labels")
+    sub.add_argument("--keep-existing", action="store_true", help="only label rows without a label")
+
+    sub = command("export-labeled", export_labeled, "write the labelled rows to a new CSV")
+    sub.add_argument("output")
+    sub.add_argument("--classes", nargs="+", help="only rows with these labels")
+
+    command("reset-skips", reset_skips, "clear every skip flag")
+
+    args = parser.parse_args(argv)
+    dataset = AnnotationDataset()
+    try:
+        dataset.open(args.dataset)
+        if args.func(dataset, args):
+            dataset.save()
+            print(f"✓ Saved to {args.dataset}")
+    finally:
+        dataset.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
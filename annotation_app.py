@@ -0,0 +1,2101 @@
+import functools
+import getpass
+import os
+import tkinter as tk
+from collections import deque
+from tkinter import ttk, filedialog, messagebox, simpledialog
+import numpy as np
+import pandas as pd
+from annotation_core import AnnotationDataset
+from annotation_merge import REVIEW_SUFFIX
+from annotation_server import AnnotationClient, NothingToLease, RemoteBatch
+from indicator_scanner import DEFAULT_INDICATORS_PATH, TAG_OPTIONS, IndicatorScanner, load_indicators
+from near_duplicates import NearDuplicateClusters
+from project_store import ProjectStore
+from render_cache import DisplayPayload, RenderCache
+from row_views import RowView, label_view, noted_view, skipped_view, unlabeled_view, value_view
+from save_worker import BackgroundSaver
+from search_index import SearchIndex
+from shards import find_manifests, global_progress
+from suggestion_engine import SuggestionEngine
+from text_render import ProgressiveTextRenderer
+from undo_history import Edit, UndoHistory
+from virtual_list import VirtualRowList
+# import sys
+
+
+class CsvAnnotationApp:
+    """
+    Enhanced GUI application for annotating phishing emails.
+    Features: Auto-save, skip tracking, notes functionality
+    """
+
+    # Methods timed by --timings: user actions, and the phases they run
+    TIMED_ACTIONS = {
+        "annotate_and_next": "action:annotate", "skip_email": "action:skip", "save_note": "action:note",
+        "label_cluster": "action:label_cluster", "next_row": "action:next", "prev_row": "action:prev",
+        "undo": "action:undo", "redo": "action:redo", "apply_key_queue": "action:keys",
+        "flush_render": "action:coalesced_render", "jump_to_row_event": "action:jump",
+        "goto_next_skipped": "action:next_skipped", "goto_prev_skipped": "action:prev_skipped",
+        "search_next": "action:search_next", "search_prev": "action:search_prev", "open_file": "action:open",
+        "select_view": "action:view",
+    }
+    TIMED_PHASES = {
+        "update_display": "render", "update_stats": "stats", "record_changes": "persist",
+        "auto_save": "save", "update_skipped_picker": "skipped_picker", "update_suggestion": "suggestion",
+        "poll_indicators": "indicators",
+    }
+    ALL_ROWS = "All rows"  # View picker entry for navigating without a filter
+
+    def __init__(self, root, timings=None):
+        self.root = root
+        self.root.title("Phishing Email Annotation Tool")
+
+        # Opt-in latency instrumentation; wraps methods before widgets bind them
+        self.timings = timings
+        self.timings_overlay = None  # Label showing the percentiles (F12)
+        self.timings_overlay_id = None  # Pending root.after() id for refreshing it
+        self.timings_path = None  # JSON or CSV trace written on exit
+        if timings is not None:
+            timings.after_idle = root.after_idle
+            timings.instrument(self, actions=self.TIMED_ACTIONS, phases=self.TIMED_PHASES)
+
+        # Maximize window to full screen
+        self.root.state('zoomed')  # Windows: maximized
+
+        # Set minimum size
+        self.root.minsize(1200, 800)
+
+        # --- State Variables ---
+        self.current_index = 0
+        self.filepath = ""
+        self.annotation_column = "phishing_type"  # Column for phishing classification
+        self.note_column = "note"  # Column for annotator notes
+        self.skip_column = "skip_flag"  # Column to track skipped emails persistently
+        # Loaded rows, skipped rows, counts and their persistence (see annotation_core)
+        self.dataset = AnnotationDataset(self.annotation_column, self.note_column, self.skip_column)
+        self.render_cache = RenderCache(self.build_display_payload)  # Formatted rows, LRU
+        self.displayed_payload = None  # Payload currently shown in the text widget
+        self.displayed_row = None  # Row of displayed_payload
+        self.prefetch_queue = []  # Rows still to format during idle time
+        self.prefetch_id = None  # Pending after_idle() id for prefetching
+        self.client = None  # Annotation server client in multi-annotator mode
+        self.remote = None  # Batch of rows currently leased from the server
+        self.saver = BackgroundSaver()  # Writes the CSV on a worker thread
+        self.save_poll_id = None  # Pending root.after() id for collecting save results
+        self.search_index = None  # Inverted index over sender/subject/source/body
+        self.search_query = ""  # Query the current hits belong to
+        self.search_hits = np.zeros(0, dtype=np.int32)  # Sorted matching rows
+        self.search_poll_id = None  # Pending root.after() id for indexing progress
+        self.clusters = None  # Near-duplicate clusters of the email bodies
+        self.cluster_poll_id = None  # Pending root.after() id for clustering progress
+        self.suggestions = None  # Label suggestions learned from the rows labelled so far
+        self.suggestion_poll_id = None  # Pending root.after() id for collecting suggestions
+        self.indicators = None  # IndicatorScanner for highlighting phishing indicators
+        self.indicator_poll_id = None  # Pending root.after() id for collecting scanned rows
+        self.visited_rows = []  # Rows left by uncertainty-first navigation, for Previous
+        self.view = None  # RowView Previous/Next step through (None = all rows)
+        self.review_view = None  # Rows of an open disagreement queue, selectable as a view
+        self.source_values = None  # source_dataset of every row as strings, read on first use
+        self.sources = []  # Distinct source_dataset values, sorted
+        self.shard_totals = None  # Counts of the other shards next to an open shard
+        self.history = UndoHistory()  # Recent edits for undo/redo
+        self.key_queue = deque()  # Keyboard actions waiting to be applied, in order
+        self.key_queue_id = None  # Pending after_idle() id for applying them
+        self.render_deferred = False  # True while queued actions are applied
+        self.render_pending = False  # A render was skipped while deferred
+        self.render_id = None  # Pending root.after() id for the coalesced render
+
+        # --- Configuration ---
+        # Phishing taxonomy classes (0-3 based on guidelines)
+        # self.annotation_classes = ["0", "1", "2", "3"]
+        self.annotation_classes = ["1", "2", "3"]
+        self.class_labels = {
+            # "0": "0: Legitimate",
+            "1": "1: Deceptive",
+            "2": "2: Targeted",
+            "3": "3: Extortion"
+        }
+        # Metadata columns shown above the email body
+        self.metadata_columns = [
+            ("sender", "Sender"),
+            ("receiver", "Receiver"),
+            ("subject", "Subject"),
+            ("source_dataset", "Source"),
+            ("annotator_labels", "Annotators"),  # Files merged by annotation_merge.py
+        ]
+        # Source datasets offered as views, at most
+        self.max_source_views = 50
+        # Rows formatted ahead of time on each side of the current one
+        self.prefetch_rows = 5
+        # Progressive rendering: characters shown at once, per streamed chunk,
+        # and the line length after which a line is collapsed (0 = never)
+        self.render_first_chars = 8000
+        self.render_chunk_chars = 32000
+        self.max_line_chars = 4000
+        # Keyboard annotation: at most one re-render per this many ms
+        self.render_interval_ms = 50
+        # Multi-annotator mode: default server, rows per lease, changes per submission
+        self.server_url = "http://127.0.0.1:8765"
+        self.server_batch_size = 50
+        self.server_submit_every = 10
+        # Rows tokenized per step of the background search indexer
+        self.search_chunk_rows = 2000
+        # Rows hashed per step of the background near-duplicate clustering
+        self.cluster_chunk_rows = 2000
+        # Columns the suggestion model reads, rows streamed to it per step,
+        # and labels needed before suggestions are shown
+        self.suggestion_columns = ["subject", "sender", "text_cleaned"]
+        self.suggestion_chunk_rows = 2000
+        self.suggestion_min_labels = 10
+        # Phishing indicators highlighted in the email (see indicators.json),
+        # and how often finished scans are collected, in ms
+        self.indicators_path = DEFAULT_INDICATORS_PATH
+        self.indicator_poll_ms = 30
+
+        # --- UI Setup ---
+
+        # Style
+        style = ttk.Style()
+        style.theme_use('clam')
+        style.configure('TButton', font=('Helvetica', 10, 'bold'), padding=5)
+        style.configure('success.TButton', background='#27ae60', foreground='white', font=('Helvetica', 10, 'bold'), padding=8)
+        style.configure('warning.TButton', background='#e67e22', foreground='white', font=('Helvetica', 10, 'bold'), padding=5)
+        style.configure('skip.TButton', background='#95a5a6', foreground='white', font=('Helvetica', 10, 'bold'), padding=5)
+        style.configure('nav.TButton', font=('Helvetica', 10), padding=5)
+        style.configure('TLabel', font=('Helvetica', 10))
+        style.configure('Header.TLabel', font=('Helvetica', 14, 'bold'))
+        style.configure('Status.TLabel', font=('Helvetica', 10, 'italic'))
+
+        # Style for the currently selected annotation button
+        style.configure('Selected.TButton', font=('Helvetica', 10, 'bold'), padding=5, background="#3498db", foreground="white")
+
+        # --- Main Frame ---
+        main_frame = ttk.Frame(root, padding="10")
+        main_frame.pack(fill="both", expand=True)
+
+        # --- 1. File Frame ---
+        file_frame = ttk.Frame(main_frame)
+        file_frame.pack(fill="x")
+
+        load_button = ttk.Button(file_frame, text="Load CSV", command=self.load_csv)
+        load_button.pack(side="left", padx=(0, 5))
+
+        new_project_button = ttk.Button(file_frame, text="New Project…", command=self.import_project)
+        new_project_button.pack(side="left", padx=(0, 5))
+
+        server_button = ttk.Button(file_frame, text="Connect to Server…", command=self.connect_to_server)
+        server_button.pack(side="left", padx=(0, 5))
+
+        self.review_button = ttk.Button(file_frame, text="Open Review Queue…", command=self.toggle_review_queue)
+        self.review_button.pack(side="left", padx=(0, 5))
+
+        self.next_shard_button = ttk.Button(
+            file_frame, text="Next Shard", command=self.open_next_shard, state="disabled"
+        )
+        self.next_shard_button.pack(side="left", padx=(0, 10))
+
+        # Navigation buttons next to Load CSV
+        self.prev_button = ttk.Button(
+            file_frame, text="< Previous", command=self.prev_row, style='nav.TButton'
+        )
+        self.prev_button.pack(side="left", padx=5)
+
+        self.skip_button = ttk.Button(
+            file_frame, text="Skip", command=self.skip_email, style='skip.TButton'
+        )
+        self.skip_button.pack(side="left", padx=5)
+
+        self.next_button = ttk.Button(
+            file_frame, text="Next >", command=self.next_row, style='nav.TButton'
+        )
+        self.next_button.pack(side="left", padx=5)
+
+        # Skipped emails: previous/next skipped and a picker listing all of them
+        ttk.Label(file_frame, text="Skipped:", font=('Helvetica', 9)).pack(side="left", padx=(10, 5))
+
+        self.goto_prev_skipped_button = ttk.Button(
+            file_frame, text="◀", width=3, command=self.goto_prev_skipped, style='nav.TButton'
+        )
+        self.goto_prev_skipped_button.pack(side="left")
+
+        self.view_skipped_button = ttk.Button(
+            file_frame, text="No skipped emails", width=18, command=self.show_skipped_emails, style='nav.TButton'
+        )
+        self.view_skipped_button.pack(side="left", padx=2)
+
+        self.goto_next_skipped_button = ttk.Button(
+            file_frame, text="▶", width=3, command=self.goto_next_skipped, style='nav.TButton'
+        )
+        self.goto_next_skipped_button.pack(side="left")
+
+        # Skipped picker window (created on demand)
+        self.skipped_window = None
+        self.skipped_list = None
+
+        self.file_label = ttk.Label(file_frame, text="No file loaded.", style='Status.TLabel', anchor="w")
+        self.file_label.pack(side="left", fill="x", expand=True, padx=(10, 0))
+
+        # --- 2. Progress and Status Frame ---
+        progress_frame = ttk.Frame(main_frame, padding=(0, 10, 0, 10))
+        progress_frame.pack(fill="x")
+
+        self.progress_label = ttk.Label(progress_frame, text="Row 0 / 0", style='Header.TLabel', anchor="w")
+        self.progress_label.pack(side="left", pady=5)
+
+        # Skipped counter
+        self.skipped_label = ttk.Label(progress_frame, text="Skipped: 0", style='Status.TLabel', foreground="#e67e22")
+        self.skipped_label.pack(side="left", padx=20, pady=5)
+
+        # Filtered navigation: Previous/Next, the row counter and Jump stay within the view
+        ttk.Label(progress_frame, text="View:").pack(side="left")
+        self.view_choice = tk.StringVar(value=self.ALL_ROWS)
+        self.view_picker = ttk.Combobox(
+            progress_frame, textvariable=self.view_choice, values=[self.ALL_ROWS], state="disabled",
+            width=22, postcommand=self.refresh_view_choices
+        )
+        self.view_picker.pack(side="left", padx=(5, 20))
+        self.view_picker.bind("<<ComboboxSelected>>", self.on_view_picked)
+
+        # Full-text search: terms are ANDed, "sender:x"/"subject:x" restrict a term, "x*" matches a prefix
+        ttk.Label(progress_frame, text="Search:").pack(side="left")
+
+        self.search_entry = ttk.Entry(progress_frame, width=30, font=('Helvetica', 10))
+        self.search_entry.pack(side="left", padx=5)
+        self.search_entry.bind("<Return>", lambda e: self.search_next())
+
+        self.search_prev_button = ttk.Button(
+            progress_frame, text="◀", width=3, command=self.search_prev, style='nav.TButton'
+        )
+        self.search_prev_button.pack(side="left")
+
+        self.search_next_button = ttk.Button(
+            progress_frame, text="▶", width=3, command=self.search_next, style='nav.TButton'
+        )
+        self.search_next_button.pack(side="left", padx=(2, 5))
+
+        self.search_status_label = ttk.Label(progress_frame, text="", style='Status.TLabel')
+        self.search_status_label.pack(side="left")
+
+        # Jump to Row controls
+        self.jump_button = ttk.Button(
+            progress_frame,
+            text="Go",
+            command=self.jump_to_row_event,
+            style='nav.TButton'
+        )
+        self.jump_button.pack(side="right", padx=(5, 0))
+
+        self.jump_entry = ttk.Entry(
+            progress_frame,
+            width=8,
+            font=('Helvetica', 10)
+        )
+        self.jump_entry.pack(side="right", padx=5)
+        self.jump_entry.bind("<Return>", self.jump_to_row_event)
+
+        self.jump_label = ttk.Label(progress_frame, text="Jump to Row:")
+        self.jump_label.pack(side="right")
+
+        # --- 3. Data Display Frame ---
+        display_frame = ttk.Frame(main_frame)
+        display_frame.pack(fill="both", expand=True, pady=10)
+
+        # Add scrollbars to the Text widget
+        text_scrollbar_y = ttk.Scrollbar(display_frame, orient="vertical")
+
+        self.text_display = tk.Text(
+            display_frame,
+            wrap="word",
+            font=("Calibri", 11),
+            bg="#fdfdfd",
+            relief="solid",
+            borderwidth=1,
+            yscrollcommand=text_scrollbar_y.set
+        )
+
+        text_scrollbar_y.config(command=self.text_display.yview)
+        text_scrollbar_y.pack(side="right", fill="y")
+        self.text_display.pack(side="left", fill="both", expand=True)
+
+        # Streams long emails into the text widget chunk by chunk
+        self.text_renderer = ProgressiveTextRenderer(
+            self.text_display,
+            first_chars=self.render_first_chars,
+            chunk_chars=self.render_chunk_chars,
+            max_line_chars=self.max_line_chars
+        )
+
+        # --- 4. Notes Frame ---
+        notes_frame = ttk.Frame(main_frame, padding=(0, 5, 0, 10))
+        notes_frame.pack(fill="x")
+
+        notes_label = ttk.Label(notes_frame, text="Note (optional):", font=('Helvetica', 10, 'bold'))
+        notes_label.pack(side="left", padx=(0, 5))
+
+        self.note_entry = ttk.Entry(notes_frame, font=('Helvetica', 10))
+        self.note_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.note_entry.bind("<Return>", lambda e: self.save_note())
+
+        self.save_note_button = ttk.Button(
+            notes_frame,
+            text="Save Note",
+            command=self.save_note,
+            style='warning.TButton',
+            width=12
+        )
+        self.save_note_button.pack(side="right", padx=(5, 0))
+
+        # --- 5. Classification Buttons Frame ---
+        annotation_frame = ttk.Frame(main_frame, padding=(0, 10, 0, 10))
+        annotation_frame.pack(fill="x")
+
+        header_subframe = ttk.Frame(annotation_frame)
+        header_subframe.pack(side="top", fill="x", pady=(0, 5))
+
+        classification_label = ttk.Label(header_subframe, text="Classify Email:", font=('Helvetica', 11, 'bold'))
+        classification_label.pack(side="left")
+
+        # Suggested class of the current email and uncertainty-first navigation
+        self.suggestion_label = ttk.Label(header_subframe, text="", style='Status.TLabel')
+        self.suggestion_label.pack(side="left", padx=15)
+
+        self.uncertainty_first = tk.BooleanVar(value=False)
+        self.uncertainty_check = ttk.Checkbutton(
+            header_subframe, text="Least certain first", variable=self.uncertainty_first,
+            command=self.toggle_uncertainty_first
+        )
+        self.uncertainty_check.pack(side="right", padx=5)
+
+        self.highlight_indicators = tk.BooleanVar(value=True)
+        self.highlight_check = ttk.Checkbutton(
+            header_subframe, text="Highlight indicators", variable=self.highlight_indicators,
+            command=self.toggle_highlighting
+        )
+        self.highlight_check.pack(side="right", padx=5)
+
+        buttons_subframe = ttk.Frame(annotation_frame)
+        buttons_subframe.pack(fill="x")
+
+        self.annotation_buttons = {}
+        num_classes = len(self.annotation_classes)
+        for i, class_num in enumerate(self.annotation_classes):
+            label_text = self.class_labels[class_num]
+            btn = ttk.Button(
+                buttons_subframe,
+                text=label_text,
+                command=lambda c=class_num: self.annotate_and_next(c)
+            )
+            btn.grid(row=0, column=i, sticky="ew", padx=5, pady=5)
+            buttons_subframe.grid_columnconfigure(i, weight=1)
+            self.annotation_buttons[class_num] = btn
+
+        # Near-duplicate cluster of the current email and batch labelling
+        cluster_subframe = ttk.Frame(annotation_frame)
+        cluster_subframe.pack(fill="x", pady=(5, 0))
+
+        self.cluster_label = ttk.Label(cluster_subframe, text="", style='Status.TLabel')
+        self.cluster_label.pack(side="left", padx=5)
+
+        self.cluster_buttons = {}
+        for class_num in reversed(self.annotation_classes):
+            btn = ttk.Button(
+                cluster_subframe,
+                text=f"Cluster → {class_num}",
+                command=lambda c=class_num: self.label_cluster(c),
+                style='nav.TButton'
+            )
+            btn.pack(side="right", padx=2)
+            self.cluster_buttons[class_num] = btn
+
+        self.cluster_unlabeled_only = tk.BooleanVar(value=True)
+        self.cluster_unlabeled_check = ttk.Checkbutton(
+            cluster_subframe, text="Unlabeled members only", variable=self.cluster_unlabeled_only,
+            command=self.update_cluster_info
+        )
+        self.cluster_unlabeled_check.pack(side="right", padx=10)
+
+        # --- 6. Save Frame ---
+        save_frame = ttk.Frame(main_frame)
+        save_frame.pack(fill="x", pady=(10, 0))
+
+        # Progress statistics
+        self.stats_label = ttk.Label(
+            save_frame,
+            text="Annotated: 0 / 0 (0.0%)",
+            style='Status.TLabel',
+            anchor="w"
+        )
+        self.stats_label.pack(fill="x", pady=(0, 5))
+
+        # Save status (updated from the background save worker)
+        self.save_status_label = ttk.Label(save_frame, text="", style='Status.TLabel', anchor="w")
+        self.save_status_label.pack(fill="x", pady=(0, 5))
+
+        self.save_button = ttk.Button(
+            save_frame, text="💾 Save Progress (Every change is journaled automatically)",
+            command=self.manual_save, style='success.TButton'
+        )
+        self.save_button.pack(fill="x")
+
+        # Export of a project back to the CSV layout
+        self.export_button = ttk.Button(
+            save_frame, text="Export Project to CSV…", command=self.export_project_csv, style='nav.TButton'
+        )
+        self.export_button.pack(fill="x", pady=(5, 0))
+
+        # --- Initial State ---
+        self.disable_controls()
+
+        # Fold journaled changes into the CSV when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Undo/redo of annotation changes (Cmd+Z / Cmd+Shift+Z on macOS)
+        modifier = "Command" if self.root.tk.call("tk", "windowingsystem") == "aqua" else "Control"
+        self.root.bind_all(f"<{modifier}-z>", self.undo)
+        self.root.bind_all(f"<{modifier}-Z>", self.redo)
+        self.root.bind_all(f"<{modifier}-y>", self.redo)
+
+        # Rapid annotation from the keyboard: 1-9 label, S skips, arrows navigate
+        for number, label in enumerate(self.annotation_classes[:9], start=1):
+            self.root.bind_all(f"<KeyPress-{number}>", functools.partial(self.queue_key_action, ("annotate", label)))
+        for key in ("s", "S"):
+            self.root.bind_all(f"<KeyPress-{key}>", functools.partial(self.queue_key_action, ("skip",)))
+        self.root.bind_all("<KeyPress-Left>", functools.partial(self.queue_key_action, ("prev",)))
+        self.root.bind_all("<KeyPress-Right>", functools.partial(self.queue_key_action, ("next",)))
+
+        if self.timings is not None:
+            self.root.bind_all("<F12>", self.toggle_timings_overlay)
+
+    # --- Shortcuts to the data model ---
+
+    @property
+    def df(self):
+        return self.dataset.df
+
+    @property
+    def total_rows(self):
+        return self.dataset.total_rows
+
+    @property
+    def project(self):
+        return self.dataset.project
+
+    @property
+    def journal(self):
+        return self.dataset.journal
+
+    @property
+    def body_store(self):
+        return self.dataset.body_store
+
+    @property
+    def notes(self):
+        return self.dataset.notes
+
+    @property
+    def skipped_indices(self):
+        return self.dataset.skipped
+
+    @property
+    def progress(self):
+        return self.dataset.progress
+
+    def load_csv(self):
+        """
+        Loads a CSV file (or an annotation project) into a pandas DataFrame.
+        """
+        filepath = filedialog.askopenfilename(
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("Annotation projects", "*" + ProjectStore.SUFFIX),
+                ("All files", "*.*")
+            ]
+        )
+        if not filepath:
+            return
+
+        self.open_file(filepath)
+
+    def toggle_review_queue(self):
+        if self.review_view is not None:
+            self.close_review_queue()
+            self.update_display()
+        else:
+            self.open_review_queue()
+
+    def open_review_queue(self):
+        """
+        Opens a disagreement queue written by annotation_merge.py: Previous
+        and Next then step through its rows only. The consolidated file
+        next to it is loaded first unless it is already open.
+        """
+        path = filedialog.askopenfilename(
+            title="Open review queue",
+            filetypes=[("Review queues", "*" + REVIEW_SUFFIX), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        try:
+            rows = pd.read_csv(path, usecols=["row"])["row"].to_numpy()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to read review queue: {e}")
+            return
+
+        dataset_path = path[:-len(REVIEW_SUFFIX)] if path.endswith(REVIEW_SUFFIX) else ""
+        if dataset_path and os.path.abspath(dataset_path) != os.path.abspath(self.filepath or ""):
+            if not os.path.exists(dataset_path):
+                messagebox.showerror("Error", f"The merged file {dataset_path} does not exist.")
+                return
+            self.open_file(dataset_path, quiet=True)
+        if self.df is None:
+            return
+
+        rows = np.unique(rows[(rows >= 0) & (rows < self.total_rows)]).astype(np.int64)
+        if not len(rows):
+            messagebox.showinfo("Review Queue", "The review queue is empty.")
+            return
+
+        self.review_view = RowView("Review queue", rows)
+        self.review_button.config(text=f"Close Review Queue ({len(rows)})")
+        self.set_view(self.review_view)
+        self.current_index = int(rows[0])
+        self.update_display()
+        print(f"✓ Opened review queue with {len(rows)} row(s) from {path}")
+
+    def close_review_queue(self):
+        if self.view is not None and self.view is self.review_view:
+            self.set_view(None)
+        self.review_view = None
+        self.review_button.config(text="Open Review Queue…")
+
+    def source_column_values(self):
+        """
+        Returns the source_dataset of every row as strings ("" if
+        missing), reading the column on first use.
+        """
+        if self.source_values is None:
+            try:
+                values = pd.Series(self.dataset.column_values("source_dataset"), dtype=object)
+            except KeyError:
+                values = pd.Series([], dtype=object)
+            self.source_values = values.fillna("").astype(str).to_numpy(dtype=object)
+            self.sources = sorted(source for source in pd.unique(self.source_values) if source)
+        return self.source_values
+
+    def view_builders(self):
+        """
+        Returns {view name: function building the view} for the open
+        file, in the order the view picker lists them.
+        """
+        dataset = self.dataset
+        builders = {
+            self.ALL_ROWS: lambda: None,
+            "Unlabeled": functools.partial(unlabeled_view, dataset, "Unlabeled"),
+        }
+        for label in self.annotation_classes:
+            name = f"Class {self.class_labels.get(label, label)}"
+            builders[name] = functools.partial(label_view, dataset, name, label)
+        builders["With note"] = functools.partial(noted_view, dataset, "With note")
+        builders["Skipped"] = functools.partial(skipped_view, dataset, "Skipped")
+        values = self.source_column_values()
+        for source in self.sources[:self.max_source_views]:
+            name = f"Source: {source}"
+            builders[name] = functools.partial(value_view, name, values, source)
+        if self.review_view is not None:
+            review_view = self.review_view
+            builders[review_view.name] = lambda: review_view
+        return builders
+
+    def refresh_view_choices(self):
+        if self.df is not None:
+            self.view_picker.config(values=list(self.view_builders()))
+
+    def on_view_picked(self, event=None):
+        # Back to the window, so number keys annotate instead of typing into the picker
+        self.root.focus_set()
+        self.select_view(self.view_choice.get())
+
+    def select_view(self, name):
+        """
+        Makes Previous/Next, the row counter and Jump work within the
+        named view and moves to its first row from the current one on.
+        """
+        if self.df is None:
+            return
+        build = self.view_builders().get(name)
+        view = build() if build is not None else None
+        if view is not None and not len(view):
+            messagebox.showinfo("View", f"There are no rows in \"{name}\".")
+            self.set_view(self.view)
+            return
+
+        self.set_view(view)
+        if view is not None and self.current_index not in view:
+            row = view.next_after(self.current_index)
+            self.current_index = row if row is not None else view.row_at(0)
+        self.visited_rows.clear()
+        self.update_display()
+
+    def set_view(self, view):
+        self.view = view
+        self.view_choice.set(self.ALL_ROWS if view is None else view.name)
+        self.jump_label.config(text="Jump to Row:" if view is None else "Jump in View:")
+
+    def open_next_shard(self):
+        """
+        Saves the open shard and opens the next one that is not fully
+        annotated yet.
+        """
+        manifest = self.dataset.manifest
+        if manifest is None:
+            return
+
+        # Shards after the current one first, then from the start
+        manifests = find_manifests(os.path.dirname(os.path.abspath(self.filepath)))
+        manifests = [m for m in manifests if m.source == manifest.source and m.index != manifest.index]
+        manifests.sort(key=lambda m: (m.index < manifest.index, m.index))
+        remaining = [m for m in manifests if not m.complete]
+        if not remaining:
+            messagebox.showinfo("All Done", "Every other shard is fully annotated.")
+            return
+
+        self.auto_save()
+        self.open_file(remaining[0].shard_path)
+
+    def refresh_shard_totals(self):
+        """
+        Re-reads the manifests of the other shards next to an open shard.
+        """
+        if self.dataset.manifest is None:
+            self.shard_totals = None
+            return
+        self.shard_totals = global_progress(os.path.dirname(os.path.abspath(self.filepath)), exclude=self.filepath)
+
+    def import_project(self):
+        """
+        Imports a CSV once into a new SQLite project file and opens it.
+        """
+        csv_path = filedialog.askopenfilename(
+            title="CSV to import",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not csv_path:
+            return
+
+        project_path = filedialog.asksaveasfilename(
+            title="Save project as",
+            initialfile=os.path.splitext(os.path.basename(csv_path))[0] + ProjectStore.SUFFIX,
+            defaultextension=ProjectStore.SUFFIX,
+            filetypes=[("Annotation projects", "*" + ProjectStore.SUFFIX)]
+        )
+        if not project_path:
+            return
+
+        try:
+            self.close_file()
+            ProjectStore.import_csv(
+                csv_path,
+                project_path,
+                self.annotation_column,
+                self.note_column,
+                self.skip_column,
+                progress=self.show_load_progress
+            ).close()
+        except Exception as e:
+            self.file_label.config(text="No file loaded.")
+            messagebox.showerror("Error", f"Failed to import file: {e}")
+            self.disable_controls()
+            return
+
+        self.open_file(project_path)
+
+    def connect_to_server(self):
+        """
+        Switches to multi-annotator mode: rows are leased in batches from
+        an annotation server instead of being read from a local file.
+        """
+        url = simpledialog.askstring(
+            "Connect to Server", "Annotation server URL:", initialvalue=self.server_url, parent=self.root
+        )
+        if not url:
+            return
+        client_id = simpledialog.askstring(
+            "Connect to Server", "Annotator name:", initialvalue=getpass.getuser(), parent=self.root
+        )
+        if not client_id:
+            return
+
+        self.server_url = url
+        self.client = AnnotationClient(url, client_id)
+        self.open_file(url)
+
+    def lease_batch(self):
+        """
+        Leases the next batch of unannotated rows from the server.
+        """
+        lease = self.client.lease(self.server_batch_size)
+        if not lease["rows"]:
+            raise NothingToLease("The server has no unannotated rows left to lease.")
+        return RemoteBatch(
+            self.client,
+            lease,
+            self.annotation_column,
+            self.note_column,
+            self.skip_column,
+            submit_every=self.server_submit_every
+        )
+
+    def finish_remote_batch_if_done(self):
+        """
+        Submits a fully annotated (or skipped) batch and leases the next one.
+        """
+        if self.remote is None:
+            return
+        open_rows = self.df[self.annotation_column].isna() & (self.df[self.skip_column] == 0)
+        if not open_rows.any():
+            self.open_file(self.client.base_url, quiet=True)
+
+    def close_file(self):
+        """
+        Releases the currently open file: waits for pending writes, then
+        closes its journal, body store or project.
+        """
+        self.saver.wait()
+        self.poll_save_results()
+
+        # The indexer and clustering may still be reading from the body store or project
+        if self.search_index is not None:
+            self.search_index.cancel()
+            self.search_index = None
+        if self.clusters is not None:
+            self.clusters.cancel()
+            self.clusters = None
+        if self.cluster_poll_id is not None:
+            self.root.after_cancel(self.cluster_poll_id)
+            self.cluster_poll_id = None
+        self.search_query = ""
+        self.search_hits = np.zeros(0, dtype=np.int32)
+        if self.search_poll_id is not None:
+            self.root.after_cancel(self.search_poll_id)
+            self.search_poll_id = None
+        if self.suggestions is not None:
+            self.suggestions.close()
+            self.suggestions = None
+        if self.suggestion_poll_id is not None:
+            self.root.after_cancel(self.suggestion_poll_id)
+            self.suggestion_poll_id = None
+        if self.indicators is not None:
+            self.indicators.close()
+            self.indicators = None
+        if self.indicator_poll_id is not None:
+            self.root.after_cancel(self.indicator_poll_id)
+            self.indicator_poll_id = None
+        self.visited_rows.clear()
+        self.close_review_queue()
+        self.set_view(None)
+        self.source_values = None
+        self.sources = []
+        self.shard_totals = None
+        self.history.clear()
+        self.key_queue.clear()
+        for after_id in (self.key_queue_id, self.render_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self.key_queue_id = self.render_id = None
+        self.render_pending = False
+
+        # The journal's records stay on disk until they are folded into the CSV
+        self.dataset.close()
+        if self.remote is not None:
+            # Send what is left and hand unfinished rows back to the pool
+            try:
+                self.remote.flush(release=True)
+            except Exception as e:
+                print(f"✗ Could not submit to the server: {e}")
+            self.remote = None
+
+    def open_file(self, filepath, quiet=False):
+        """
+        Opens a CSV file, an annotation project or (for a server URL) a
+        leased batch of rows and resumes annotation. quiet suppresses the
+        summary dialog.
+        """
+        try:
+            self.close_file()
+
+            if filepath.startswith(("http://", "https://")):
+                # Multi-annotator mode: the server leases a batch of rows
+                self.remote = self.lease_batch()
+                self.dataset.adopt(self.remote.df, filepath)
+            else:
+                # Replays changes journaled since the last save
+                self.dataset.open(filepath, progress=self.show_load_progress)
+            self.render_cache.invalidate()
+            self.displayed_payload = None
+            self.start_indicators()
+
+            self.filepath = filepath
+            manifest = self.dataset.manifest
+            if self.remote is not None:
+                self.file_label.config(text=f"Server: {filepath} · batch of {len(self.remote)} rows")
+            elif manifest is not None:
+                self.file_label.config(
+                    text=f"Loaded: {self.filepath.split('/')[-1]} · shard {manifest.index + 1} of {manifest.shards}"
+                )
+            else:
+                self.file_label.config(text=f"Loaded: {self.filepath.split('/')[-1]}")
+            self.refresh_shard_totals()
+            self.next_shard_button.config(state="normal" if manifest is not None else "disabled")
+
+            # Auto-detect where to resume (find first unannotated email)
+            self.current_index = self.dataset.resume_position()
+
+            # Update the skipped picker with loaded skip flags
+            self.update_skipped_picker()
+
+            self.update_display()
+            self.update_stats()
+            self.enable_controls()
+            self.start_search_index()
+            self.start_clustering()
+            self.start_suggestions()
+
+            # Show resume message
+            if quiet:
+                pass
+            elif self.current_index > 0:
+                annotated_count = self.progress.annotated
+                messagebox.showinfo(
+                    "Resuming Progress",
+                    f"Loaded {self.total_rows} emails.\n\n"
+                    f"✅ Found {annotated_count} already annotated.\n"
+                    f"📍 Resuming from email #{self.current_index + 1}\n\n"
+                    f"Auto-save enabled - every change is journaled instantly."
+                )
+            else:
+                messagebox.showinfo(
+                    "Success",
+                    f"Loaded {self.total_rows} emails.\n\n"
+                    f"Auto-save enabled - every change is journaled instantly."
+                )
+
+        except NothingToLease as e:
+            # The server has nothing left to hand out
+            self.file_label.config(text="No file loaded.")
+            messagebox.showinfo("All Done", str(e))
+            self.disable_controls()
+        except Exception as e:
+            self.file_label.config(text="No file loaded.")
+            messagebox.showerror("Error", f"Failed to load file: {e}")
+            self.disable_controls()
+
+    def show_load_progress(self, fraction):
+        """
+        Shows how far the CSV has been read while load_csv is parsing it.
+        """
+        self.file_label.config(text=f"Loading… {fraction * 100:.0f}%")
+        self.root.update_idletasks()
+
+    def record_changes(self, changes):
+        """
+        Persists (op, row, value) changes as one batch: a single
+        transaction in a project, otherwise one journal write. The
+        journal is folded into the CSV once it grows past the compaction
+        threshold.
+        """
+        if self.view is not None:
+            # Rows that no longer (or now) match leave (or join) the view
+            self.view.refresh([row for _, row, _ in changes])
+
+        if self.project is not None:
+            try:
+                self.dataset.record(changes)
+            except Exception as e:
+                print(f"✗ Project update failed: {e}")
+                self.save_status_label.config(text=f"✗ Save failed: {e}", foreground="#c0392b")
+            return
+
+        if self.remote is not None:
+            # Queued and submitted to the server in batches
+            try:
+                result = self.remote.apply(changes)
+                if result is not None:
+                    self.show_submit_result(result)
+            except Exception as e:
+                print(f"✗ Server submit failed: {e}")
+                self.save_status_label.config(
+                    text=f"✗ Server submit failed, {len(self.remote.pending)} change(s) queued: {e}",
+                    foreground="#c0392b"
+                )
+            return
+
+        if self.journal is None:
+            return
+
+        try:
+            self.dataset.record(changes)
+        except Exception as e:
+            print(f"✗ Journal write failed: {e}")
+            self.auto_save()
+            return
+
+        if self.journal.pending >= self.dataset.journal_compact_threshold:
+            self.auto_save()
+
+    def apply_edit(self, rows, mutate):
+        """
+        Runs mutate(), a dataset mutator changing rows, as one undoable
+        edit and persists its changes. Returns the changes.
+        """
+        before = self.dataset.row_state(rows)
+        changes = mutate()
+        if changes:
+            self.history.push(Edit(rows, before, self.dataset.row_state(rows), self.current_index))
+        self.record_changes(changes)
+        return changes
+
+    def undo(self, event=None):
+        """
+        Reverts the most recent edit and shows its row again.
+        """
+        if self.df is None or isinstance(getattr(event, "widget", None), tk.Entry):
+            return
+        edit = self.history.undo()
+        if edit is None:
+            self.save_status_label.config(text="Nothing to undo", foreground="")
+            return
+        self.restore_edit(edit, edit.before)
+        self.save_status_label.config(text=f"↶ Undone ({len(edit.rows)} row(s))", foreground="")
+
+    def redo(self, event=None):
+        """
+        Re-applies the most recently undone edit.
+        """
+        if self.df is None or isinstance(getattr(event, "widget", None), tk.Entry):
+            return
+        edit = self.history.redo()
+        if edit is None:
+            self.save_status_label.config(text="Nothing to redo", foreground="")
+            return
+        self.restore_edit(edit, edit.after)
+        self.save_status_label.config(text=f"↷ Redone ({len(edit.rows)} row(s))", foreground="")
+
+    def restore_edit(self, edit, state):
+        """
+        Puts the rows of edit into state, journaling the changes like any
+        other edit, and moves to the row the edit was made on.
+        """
+        changes = self.dataset.restore(edit.rows, state)
+        self.record_changes(changes)
+        for op, row, value in changes:
+            self.invalidate_row(row)
+            if op == "annotate" and self.suggestions is not None:
+                self.suggestions.label_changed(row, value, self.suggestion_text(row))
+
+        self.update_skipped_picker()
+        self.update_stats()
+        self.current_index = edit.position
+        self.update_display()
+
+    def queue_key_action(self, action, event):
+        """
+        Queues a keyboard action; queued actions are applied in order
+        once Tk is idle. Keys typed into an entry or with Ctrl are left
+        alone.
+        """
+        if self.df is None or isinstance(event.widget, tk.Entry) or event.state & 0x4:
+            return None
+        self.key_queue.append(action)
+        if self.key_queue_id is None:
+            self.key_queue_id = self.root.after_idle(self.apply_key_queue)
+        return "break"
+
+    def apply_key_queue(self):
+        """
+        Applies every queued keyboard action. The view is rendered once
+        afterwards (see schedule_render), not after every action.
+        """
+        self.key_queue_id = None
+        self.render_deferred = True
+        try:
+            while self.key_queue and self.df is not None:
+                kind, *args = self.key_queue.popleft()
+                if kind == "annotate":
+                    self.annotate_and_next(*args)
+                elif kind == "skip":
+                    self.skip_email()
+                elif kind == "prev":
+                    self.prev_row()
+                elif kind == "next":
+                    self.next_row()
+        finally:
+            self.render_deferred = False
+            self.key_queue.clear()
+        if self.render_pending:
+            self.schedule_render()
+
+    def schedule_render(self):
+        """
+        Renders the current row and counts within render_interval_ms. A
+        render already scheduled is kept, so a held key still shows
+        progress while it repeats.
+        """
+        if self.render_id is None:
+            self.render_id = self.root.after(self.render_interval_ms, self.flush_render)
+
+    def flush_render(self):
+        self.render_id = None
+        self.render_pending = False
+        self.update_display()
+        self.update_stats()
+
+    def update_display(self):
+        """
+        Updates the GUI elements with the data from the current row.
+        """
+        if self.render_deferred:
+            self.render_pending = True
+            return
+        if self.df is None or self.total_rows == 0:
+            return
+
+        # Update progress label
+        if self.view is not None:
+            self.progress_label.config(
+                text=f"{self.view.name} {self.view.position(self.current_index)} / {len(self.view)}"
+                     f" · Row {self.current_index + 1} / {self.total_rows}"
+            )
+        else:
+            self.progress_label.config(
+                text=f"Row {self.current_index + 1} / {self.total_rows}"
+            )
+
+        # Update skipped label
+        self.skipped_label.config(text=f"Skipped: {self.progress.skipped}")
+
+        # Pre-formatted row (usually prefetched while the UI was idle)
+        payload = self.render_cache.get(self.current_index)
+
+        # Update text widget (only when a different payload is shown); the
+        # first screenful appears now, the rest is streamed in the background
+        if payload is not self.displayed_payload:
+            self.text_renderer.render(payload.text, spans=self.indicator_spans(self.current_index, payload))
+            self.displayed_payload = payload
+            self.displayed_row = self.current_index
+
+        # Update note entry with existing note
+        self.note_entry.delete(0, "end")
+        if payload.note is not None:
+            self.note_entry.insert(0, payload.note)
+
+        # Update button states (highlight current annotation)
+        for class_num, btn in self.annotation_buttons.items():
+            if str(class_num) == payload.annotation:
+                btn.config(style='Selected.TButton')
+            else:
+                btn.config(style='TButton')
+
+        # Highlight if this email is skipped
+        if self.current_index in self.skipped_indices:
+            self.text_display.config(bg="#fff3cd")  # Light yellow background
+        else:
+            self.text_display.config(bg="#fdfdfd")  # Normal background
+
+        # Update nav button states
+        if self.view is not None:
+            has_prev = self.view.prev_before(self.current_index) is not None
+            has_next = self.view.next_after(self.current_index) is not None
+        else:
+            has_prev = self.current_index > 0
+            has_next = self.current_index < self.total_rows - 1
+        has_prev = has_prev or (self.uncertainty_first.get() and self.visited_rows)
+        has_next = has_next or self.uncertainty_first.get()
+        self.prev_button.config(state="normal" if has_prev else "disabled")
+        self.next_button.config(state="normal" if has_next else "disabled")
+
+        if self.search_query:
+            self.show_search_position()
+        self.update_cluster_info()
+        self.update_suggestion()
+
+        # Warm the cache for the neighbouring rows once the UI is idle
+        self.schedule_prefetch()
+
+    def build_display_payload(self, row):
+        """
+        Formats one row for display: metadata header, email body,
+        current annotation and note. Reads single cells instead of
+        building a full row Series.
+        """
+        df = self.df
+        fields_source = self.project if self.project is not None else self.remote
+        if fields_source is not None:
+            # One lookup for all email columns of the row
+            fields = fields_source.get_fields(row)
+            columns = list(fields)
+            cell = fields.get
+        else:
+            columns = df.columns
+            cell = lambda column: df.at[row, column]
+
+        annotation = df.at[row, self.annotation_column]
+        note = self.notes.get(row)
+        annotation = None if pd.isna(annotation) else str(annotation)
+        sender = cell('sender') if 'sender' in columns else None
+        sender = str(sender) if pd.notna(sender) else None
+
+        # Format display text - show the text_cleaned column (first column with email content)
+        try:
+            # Try to find text_cleaned column, otherwise use first column
+            if self.body_store is not None:
+                email_body = self.body_store.get(row)
+            elif 'text_cleaned' in columns:
+                email_body = cell('text_cleaned')
+            else:
+                email_body = cell(columns[0])
+
+            display_text = str(email_body) if pd.notna(email_body) else "[No email content]"
+
+            # Add metadata if available
+            metadata = []
+            for column, caption in self.metadata_columns:
+                if column in columns:
+                    value = cell(column)
+                    if pd.notna(value):
+                        metadata.append(f"{caption}: {value}")
+
+            if metadata:
+                display_text = "\n".join(metadata) + "\n" + "="*80 + "\n\n" + display_text
+
+        except Exception as e:
+            display_text = f"Error displaying email: {e}"
+
+        return DisplayPayload(display_text, annotation, note, sender)
+
+    def schedule_prefetch(self):
+        """
+        Queues prefetching of the rows around the current one, replacing
+        any prefetch still pending from a previous position.
+        """
+        if self.prefetch_id is not None:
+            self.root.after_cancel(self.prefetch_id)
+
+        center = self.current_index
+        rows = []
+        for distance in range(1, self.prefetch_rows + 1):
+            rows.extend((center + distance, center - distance))
+        self.prefetch_queue = [row for row in rows if 0 <= row < self.total_rows]
+        self.prefetch_id = self.root.after_idle(self.prefetch_next)
+
+    def prefetch_next(self):
+        """
+        Formats one queued row, then yields back to the event loop so
+        key presses are never held up by prefetching.
+        """
+        self.prefetch_id = None
+        while self.prefetch_queue and self.df is not None:
+            row = self.prefetch_queue.pop(0)
+            if row not in self.render_cache:
+                self.indicator_spans(row, self.render_cache.get(row))
+                break
+
+        if self.prefetch_queue:
+            self.prefetch_id = self.root.after_idle(self.prefetch_next)
+
+    def start_indicators(self):
+        """
+        Loads the indicator dictionary (again, so edits take effect on
+        the next file) and styles its text tags. Highlighting stays off
+        if it cannot be read.
+        """
+        try:
+            indicators = load_indicators(self.indicators_path)
+            self.indicators = IndicatorScanner(indicators)
+        except Exception as e:
+            print(f"✗ Indicator highlighting unavailable: {e}")
+            return
+        for name, entry in indicators.items():
+            self.text_display.tag_configure(name, **{key: entry[key] for key in TAG_OPTIONS if key in entry})
+        self.text_display.tag_raise("sel")
+
+    def indicator_spans(self, row, payload):
+        """
+        Returns the indicator spans of row if it was scanned already,
+        otherwise queues it for scanning (see poll_indicators) and
+        returns None.
+        """
+        if self.indicators is None or not self.highlight_indicators.get():
+            return None
+        spans = self.indicators.get(row)
+        if spans is None:
+            self.indicators.request(row, payload.text, payload.sender)
+            if self.indicator_poll_id is None:
+                self.indicator_poll_id = self.root.after(self.indicator_poll_ms, self.poll_indicators)
+        return spans
+
+    def poll_indicators(self):
+        """
+        Highlights the displayed row once its scan is done.
+        """
+        self.indicator_poll_id = None
+        if self.indicators is None:
+            return
+        done = self.indicators.take_done()
+        if self.displayed_payload is not None and self.displayed_row in done and self.highlight_indicators.get():
+            self.text_renderer.highlight(self.indicators.get(self.displayed_row))
+        if self.indicators.busy:
+            self.indicator_poll_id = self.root.after(self.indicator_poll_ms, self.poll_indicators)
+
+    def toggle_highlighting(self):
+        # Render the current email again, with or without highlights
+        self.displayed_payload = None
+        self.update_display()
+
+    def invalidate_row(self, row):
+        """
+        Drops the cached display of a row whose label, note or skip flag changed.
+        """
+        self.render_cache.invalidate(row)
+
+    def update_stats(self):
+        """
+        Updates the annotation statistics display.
+        """
+        if self.render_deferred:
+            self.render_pending = True
+            return
+        if self.df is None:
+            return
+
+        # Counts are maintained incrementally by the progress model
+        progress = self.progress
+        class_counts = " · ".join(
+            f"{class_num}: {progress.class_counts[class_num]}" for class_num in self.annotation_classes
+        )
+
+        text = (f"Annotated: {progress.annotated} / {progress.total_rows} ({progress.percentage:.1f}%)"
+                f" | {class_counts} | Skipped: {progress.skipped} | Notes: {progress.noted}")
+
+        if self.shard_totals is not None:
+            # Other shards count as of their last save
+            others = self.shard_totals
+            annotated = others["annotated"] + progress.annotated
+            total = others["total"] + progress.total_rows
+            complete = others["complete"] + (progress.annotated + progress.skipped >= progress.total_rows)
+            text += (f" | All shards: {annotated} / {total} ({annotated / max(total, 1) * 100:.1f}%),"
+                     f" {complete} of {others['shards'] + 1} done")
+
+        self.stats_label.config(text=text)
+
+    def save_note(self):
+        """
+        Saves the note for the current email.
+        """
+        if self.df is None:
+            return
+
+        note_text = self.note_entry.get().strip()
+
+        # An empty entry clears the note
+        self.apply_edit([self.current_index], lambda: self.dataset.set_note(self.current_index, note_text))
+        if note_text:
+            messagebox.showinfo("Note Saved", "Note saved successfully!")
+        else:
+            messagebox.showinfo("Note Cleared", "Note cleared.")
+
+        self.invalidate_row(self.current_index)
+
+        self.update_stats()
+
+    def skip_email(self):
+        """
+        Marks the current email as skipped and moves to next.
+        """
+        if self.df is None:
+            return
+
+        # Mark as skipped and journal the skip flag
+        self.apply_edit([self.current_index], lambda: self.dataset.skip(self.current_index))
+        self.update_skipped_picker()
+        self.invalidate_row(self.current_index)
+        self.update_stats()
+
+        # Move to next
+        self.next_row()
+        self.finish_remote_batch_if_done()
+
+    def update_skipped_picker(self):
+        """
+        Updates the skipped button caption and the picker list, if open.
+        """
+        count = len(self.skipped_indices)
+        self.view_skipped_button.config(
+            text=f"{count} skipped email(s)" if count else "No skipped emails"
+        )
+
+        state = "normal" if count and self.df is not None else "disabled"
+        self.goto_prev_skipped_button.config(state=state)
+        self.goto_next_skipped_button.config(state=state)
+
+        if self.skipped_list is not None:
+            if self.skipped_list.rows is not self.skipped_indices:
+                self.skipped_list.set_rows(self.skipped_indices)
+            else:
+                self.skipped_list.refresh()
+
+    def jump_to_skipped(self, row):
+        """
+        Jumps to the email selected in the skipped picker.
+        """
+        if self.df is not None and 0 <= row < self.total_rows:
+            self.current_index = row
+            self.update_display()
+
+    def show_skipped_emails(self):
+        """
+        Opens the skipped picker, a list of all skipped rows that only
+        renders the entries currently scrolled into view.
+        """
+        if not self.skipped_indices:
+            messagebox.showinfo("No Skipped Emails", "You haven't skipped any emails yet.")
+            return
+
+        if self.skipped_window is not None:
+            self.skipped_window.deiconify()
+            self.skipped_window.lift()
+        else:
+            self.skipped_window = tk.Toplevel(self.root)
+            self.skipped_window.title("Skipped Emails")
+            self.skipped_window.transient(self.root)
+            self.skipped_window.protocol("WM_DELETE_WINDOW", self.close_skipped_picker)
+
+            self.skipped_list = VirtualRowList(
+                self.skipped_window,
+                self.skipped_indices,
+                on_select=self.jump_to_skipped,
+                height=20,
+                padding=5
+            )
+            self.skipped_list.pack(fill="both", expand=True)
+
+            nav_frame = ttk.Frame(self.skipped_window, padding=5)
+            nav_frame.pack(fill="x")
+            ttk.Button(nav_frame, text="◀ Previous skipped", command=self.goto_prev_skipped, style='nav.TButton').pack(side="left")
+            ttk.Button(nav_frame, text="Next skipped ▶", command=self.goto_next_skipped, style='nav.TButton').pack(side="right")
+
+        self.skipped_list.scroll_to(self.skipped_indices.position(self.current_index))
+
+    def close_skipped_picker(self):
+        """Closes the skipped picker window."""
+        if self.skipped_window is not None:
+            self.skipped_window.destroy()
+        self.skipped_window = None
+        self.skipped_list = None
+
+    def goto_next_skipped(self):
+        """
+        Navigates to the next skipped email after the current position,
+        wrapping around to the first one.
+        """
+        if not self.skipped_indices:
+            messagebox.showinfo("No Skipped Emails", "No skipped emails to navigate to.")
+            return
+
+        self.current_index = self.skipped_indices.next_after(self.current_index)
+        self.update_display()
+
+    def goto_prev_skipped(self):
+        """
+        Navigates to the previous skipped email before the current
+        position, wrapping around to the last one.
+        """
+        if not self.skipped_indices:
+            messagebox.showinfo("No Skipped Emails", "No skipped emails to navigate to.")
+            return
+
+        self.current_index = self.skipped_indices.prev_before(self.current_index)
+        self.update_display()
+
+    def start_search_index(self):
+        """
+        Opens the persisted search index of the file, or starts building
+        it on a background thread. Leased server batches are not indexed.
+        """
+        if self.remote is not None:
+            self.set_search_controls("disabled")
+            return
+        self.set_search_controls("normal")
+
+        if self.project is not None:
+            # Email columns of a project never change
+            total = len(self.project)
+
+            def signature():
+                return ["project", total]
+        else:
+            # Rewritten by our own saves, after which the index re-records it
+            path = self.filepath
+
+            def signature():
+                stat = os.stat(path)
+                return [stat.st_size, stat.st_mtime_ns]
+
+        self.search_index = SearchIndex.open(self.filepath, signature, self.total_rows)
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.filepath, signature)
+            self.search_index.build(
+                self.iter_dataset_fields(SearchIndex.FIELDS, self.search_chunk_rows), self.total_rows
+            )
+        self.poll_search_index()
+
+    def iter_dataset_fields(self, columns, chunk_rows):
+        """
+        Returns a generator of (first row, {column: values}) chunks of
+        those columns the dataset has. It is consumed on a worker thread,
+        so it only captures the objects of the file open right now.
+        """
+        if self.project is not None:
+            return self.project.iter_columns(columns, chunk_rows)
+
+        df, body_store = self.df, self.body_store
+        present = [column for column in columns if column in df.columns]
+        with_bodies = body_store is not None and body_store.column in columns
+
+        def chunks():
+            for start in range(0, len(df), chunk_rows):
+                stop = min(start + chunk_rows, len(df))
+                fields = {column: df[column].iloc[start:stop].tolist() for column in present}
+                if with_bodies:
+                    fields[body_store.column] = [body_store.get(i) for i in range(start, stop)]
+                yield start, fields
+
+        return chunks()
+
+    def poll_search_index(self):
+        """
+        Shows indexing progress until the search index is complete.
+        """
+        self.search_poll_id = None
+        index = self.search_index
+        if index is None:
+            return
+
+        if index.error is not None:
+            print(f"✗ Search indexing failed: {index.error}")
+            self.search_status_label.config(text="✗ Search unavailable")
+        elif not index.complete:
+            percent = index.rows_indexed / max(index.total_rows, 1) * 100
+            self.search_status_label.config(text=f"Indexing… {percent:.0f}%")
+            self.search_poll_id = self.root.after(250, self.poll_search_index)
+        elif self.search_query:
+            # Hits found while indexing may be incomplete; search again
+            self.run_search(self.search_query)
+            self.show_search_position()
+        else:
+            self.search_status_label.config(text="")
+
+    def run_search(self, query):
+        """
+        Looks up query in the search index and keeps the hits.
+        """
+        self.search_query = query
+        self.search_hits = self.search_index.search(query) if query else np.zeros(0, dtype=np.int32)
+
+    def search_next(self):
+        """
+        Moves to the next hit of the search box query after the current
+        row, wrapping around. A new query is searched first.
+        """
+        self.step_search(forward=True)
+
+    def search_prev(self):
+        """
+        Moves to the previous hit of the search box query, wrapping around.
+        """
+        self.step_search(forward=False)
+
+    def step_search(self, forward):
+        if self.df is None or self.search_index is None:
+            return
+
+        query = self.search_entry.get().strip()
+        if query != self.search_query:
+            self.run_search(query)
+            # The first step of a new query may land on the current row
+            position = np.searchsorted(self.search_hits, self.current_index, side="left")
+        elif forward:
+            position = np.searchsorted(self.search_hits, self.current_index, side="right")
+        else:
+            position = np.searchsorted(self.search_hits, self.current_index, side="left") - 1
+
+        hits = self.search_hits
+        if len(hits):
+            self.current_index = int(hits[position % len(hits)])
+            self.update_display()
+        self.show_search_position()
+
+    def show_search_position(self):
+        """
+        Shows "Hit k / n" for the current row in the search status label.
+        """
+        hits = self.search_hits
+        if not self.search_query:
+            text = ""
+        elif not len(hits):
+            text = "No matches"
+        else:
+            position = np.searchsorted(hits, self.current_index)
+            if position < len(hits) and hits[position] == self.current_index:
+                text = f"Hit {position + 1:,} / {len(hits):,}"
+            else:
+                text = f"{len(hits):,} hits"
+        if self.search_index is not None and not self.search_index.complete and self.search_query:
+            text += " (indexing…)"
+        self.search_status_label.config(text=text)
+
+    def start_clustering(self):
+        """
+        Opens the persisted near-duplicate clusters of the file, or starts
+        computing them on a background thread.
+        """
+        if self.remote is not None or self.search_index is None:
+            self.update_cluster_info()
+            return
+
+        signature = self.search_index.signature
+        self.clusters = NearDuplicateClusters.open(self.filepath, signature, self.total_rows)
+        if self.clusters is None:
+            # Fails (and reports "unavailable") if the file has no text_cleaned column
+            chunks = (
+                (start, fields['text_cleaned'])
+                for start, fields in self.iter_dataset_fields(['text_cleaned'], self.cluster_chunk_rows)
+            )
+            self.clusters = NearDuplicateClusters(self.filepath, signature)
+            self.clusters.build(chunks, self.total_rows)
+        self.poll_clusters()
+
+    def poll_clusters(self):
+        """
+        Shows clustering progress until the clusters are ready.
+        """
+        self.cluster_poll_id = None
+        if self.clusters is None:
+            return
+
+        if self.clusters.error is None and not self.clusters.complete:
+            self.cluster_poll_id = self.root.after(500, self.poll_clusters)
+        elif self.clusters.error is not None:
+            print(f"✗ Near-duplicate clustering failed: {self.clusters.error}")
+        self.update_cluster_info()
+
+    def cluster_targets(self, members=None, unlabeled=None):
+        """
+        Returns the rows a cluster label would be applied to. members and
+        their unlabeled mask are looked up unless given.
+        """
+        if members is None:
+            members = self.clusters.members(self.current_index)
+        if not self.cluster_unlabeled_only.get():
+            return members
+        if unlabeled is None:
+            unlabeled = self.df[self.annotation_column].iloc[members].isna().to_numpy()
+        return members[unlabeled]
+
+    def update_cluster_info(self):
+        """
+        Shows the size of the current email's near-duplicate cluster and
+        enables the batch-label buttons for clusters of two or more.
+        """
+        clusters = self.clusters
+        state = "disabled"
+        if self.df is None or clusters is None:
+            text = ""
+        elif clusters.error is not None:
+            text = "✗ Near-duplicate detection unavailable"
+        elif not clusters.complete:
+            percent = clusters.rows_hashed / max(clusters.total_rows, 1) * 100
+            text = f"Finding near-duplicates… {percent:.0f}%"
+        elif clusters.size(self.current_index) < 2:
+            text = "No near-duplicates"
+        else:
+            members = clusters.members(self.current_index)
+            unlabeled = self.df[self.annotation_column].iloc[members].isna().to_numpy()
+            text = f"Near-duplicates: {len(members):,} emails in this cluster ({int(unlabeled.sum()):,} unlabeled)"
+            if len(self.cluster_targets(members, unlabeled)):
+                state = "normal"
+
+        self.cluster_label.config(text=text)
+        for btn in self.cluster_buttons.values():
+            btn.config(state=state)
+
+    def label_cluster(self, label):
+        """
+        Applies label to every member (or every unlabeled member) of the
+        current email's cluster as a single batched write, then moves on.
+        """
+        if self.df is None or self.clusters is None or not self.clusters.complete:
+            return
+
+        rows = self.cluster_targets()
+        if not len(rows):
+            return
+
+        # Labelled rows leave the skipped list, as in annotate_and_next
+        changes = self.apply_edit(rows, lambda: self.dataset.apply_labels(rows, label))
+        if len(changes) > len(rows):
+            self.update_skipped_picker()
+        for row in rows:
+            self.invalidate_row(int(row))
+            if self.suggestions is not None:
+                self.suggestions.label_changed(int(row), label, self.suggestion_text(int(row)))
+
+        print(f"✓ Labelled {len(rows)} near-duplicate email(s) as {label}")
+        self.update_stats()
+        self.next_row()
+
+    def start_suggestions(self):
+        """
+        Starts the suggestion worker process for the open file. Leased
+        server batches are too small to learn from.
+        """
+        if self.remote is not None:
+            self.update_suggestion()
+            return
+
+        columns, chunk_rows = self.suggestion_columns, self.suggestion_chunk_rows
+        iter_fields = functools.partial(self.iter_dataset_fields, columns, chunk_rows)
+
+        def chunks():
+            # Read once, on the feeder thread
+            for start, fields in iter_fields():
+                values = [fields[column] for column in columns if column in fields]
+                yield start, [self.join_text(parts) for parts in zip(*values)]
+
+        self.suggestions = SuggestionEngine(
+            self.annotation_classes, self.df[self.annotation_column], chunks,
+            min_labels=self.suggestion_min_labels
+        )
+        self.suggestions.start()
+        self.poll_suggestions()
+
+    def poll_suggestions(self):
+        """
+        Collects new models and scores from the suggestion worker.
+        """
+        self.suggestion_poll_id = None
+        if self.suggestions is None:
+            return
+        if self.suggestions.poll():
+            self.update_suggestion()
+        if self.suggestions.error is not None:
+            print(f"✗ Suggestions stopped: {self.suggestions.error}")
+            return
+        self.suggestion_poll_id = self.root.after(300, self.poll_suggestions)
+
+    @staticmethod
+    def join_text(parts):
+        return "\n".join(str(part) for part in parts if isinstance(part, str))
+
+    def suggestion_text(self, row):
+        """
+        Returns the text of row the suggestion model reads.
+        """
+        columns = self.suggestion_columns
+        fields_source = self.project if self.project is not None else self.remote
+        if fields_source is not None:
+            fields = fields_source.get_fields(row)
+        else:
+            fields = {column: self.df.at[row, column] for column in columns if column in self.df.columns}
+        if self.body_store is not None and self.body_store.column in columns:
+            fields[self.body_store.column] = self.body_store.get(row)
+        return self.join_text(fields[column] for column in columns if column in fields)
+
+    def update_suggestion(self):
+        """
+        Shows the suggested class and its confidence for the current email.
+        """
+        engine = self.suggestions
+        if self.df is None or engine is None:
+            text = ""
+        elif engine.error is not None:
+            text = "Suggestions stopped (see console)"
+        elif not engine.ready:
+            text = f"Suggestions after {engine.min_labels} labels in 2+ classes"
+        else:
+            suggestion = engine.suggestion(self.current_index, self.suggestion_text)
+            if suggestion is None:
+                text = "Suggested: scoring…"
+            else:
+                label, confidence = suggestion
+                text = f"Suggested: {self.class_labels.get(label, label)} ({confidence:.0%})"
+        self.suggestion_label.config(text=text)
+
+    def set_search_controls(self, state):
+        for widget in (self.search_entry, self.search_prev_button, self.search_next_button):
+            widget.config(state=state)
+
+    def annotate_and_next(self, label):
+        """
+        Saves the annotation for the current row and moves to the next.
+        """
+        if self.df is None:
+            return
+
+        # A skipped email also leaves the skipped list
+        changes = self.apply_edit([self.current_index], lambda: self.dataset.annotate(self.current_index, label))
+        self.invalidate_row(self.current_index)
+        if self.suggestions is not None:
+            self.suggestions.label_changed(self.current_index, label, self.suggestion_text(self.current_index))
+        if len(changes) > 1:
+            self.update_skipped_picker()
+
+        self.update_stats()
+        self.next_row()
+        self.finish_remote_batch_if_done()
+
+    def next_row(self):
+        """
+        Moves to the next row (of the active view), if possible. With
+        "Least certain first" on, moves to the unlabeled row (of the
+        view) the model is least sure about.
+        """
+        if self.df is None:
+            return
+        if self.uncertainty_first.get() and self.suggestions is not None:
+            row = self.suggestions.most_uncertain(
+                exclude=[self.current_index],
+                rows=None if self.view is None else self.view.rows,
+                skip_flags=self.df[self.skip_column].to_numpy()
+            )
+            if row is not None:
+                self.visited_rows.append(self.current_index)
+                self.current_index = row
+                self.update_display()
+                return
+        if self.view is not None:
+            row = self.view.next_after(self.current_index)
+        else:
+            row = self.current_index + 1 if self.current_index < self.total_rows - 1 else None
+        if row is not None:
+            self.current_index = row
+            self.update_display()
+
+    def toggle_uncertainty_first(self):
+        self.visited_rows.clear()
+        self.update_display()
+
+    def prev_row(self):
+        """
+        Moves to the previous row (of the active view), if possible;
+        back along the visited rows in "Least certain first" mode.
+        """
+        if self.df is None:
+            return
+        if self.uncertainty_first.get() and self.visited_rows:
+            row = self.visited_rows.pop()
+        elif self.view is not None:
+            row = self.view.prev_before(self.current_index)
+        else:
+            row = self.current_index - 1 if self.current_index > 0 else None
+        if row is not None:
+            self.current_index = row
+            self.update_display()
+
+
+    def jump_to_row_event(self, event=None):
+        """
+        Handles the 'Go' button click or <Return> key press to jump to a
+        row, or to the n-th row of the active view.
+        """
+        if self.df is None:
+            return
+
+        try:
+            row_str = self.jump_entry.get()
+            if not row_str:
+                return
+
+            row_num = int(row_str)
+
+            if self.view is not None:
+                if 1 <= row_num <= len(self.view):
+                    self.current_index = self.view.row_at(row_num - 1)
+                    self.update_display()
+                else:
+                    messagebox.showwarning(
+                        "Invalid Row",
+                        f"Please enter a position between 1 and {len(self.view)} in \"{self.view.name}\"."
+                    )
+            elif 1 <= row_num <= self.total_rows:
+                self.current_index = row_num - 1
+                self.update_display()
+            else:
+                messagebox.showwarning(
+                    "Invalid Row",
+                    f"Please enter a row number between 1 and {self.total_rows}."
+                )
+        except ValueError:
+            messagebox.showerror(
+                "Invalid Input",
+                "Please enter a valid number."
+            )
+        finally:
+            self.jump_entry.delete(0, "end")
+
+    def manual_save(self):
+        """
+        Manually saves the current state to the same CSV file.
+        """
+        if self.df is None:
+            messagebox.showwarning("No Data", "No data loaded to save.")
+            return
+
+        self.auto_save(manual=True)
+
+    def auto_save(self, manual=False):
+        """
+        Folds the journaled changes into the original file.
+        The write runs on the save worker; its outcome is reported
+        through poll_save_results().
+        """
+        if self.df is None or not self.filepath:
+            return
+
+        if self.remote is not None:
+            # Send queued changes to the server
+            try:
+                self.show_submit_result(self.remote.flush())
+                if manual:
+                    messagebox.showinfo("Success", f"Progress submitted to:\n{self.filepath}")
+            except Exception as e:
+                self.save_status_label.config(text=f"✗ Save failed: {e}", foreground="#c0392b")
+                if manual:
+                    messagebox.showerror("Error", f"Failed to submit changes: {e}")
+            return
+
+        if self.project is not None:
+            # Every change is already committed; just fold the WAL
+            try:
+                self.project.checkpoint()
+                self.save_status_label.config(text=f"✓ Saved to {self.filepath.split('/')[-1]}", foreground="#27ae60")
+                if manual:
+                    messagebox.showinfo("Success", f"Progress saved to:\n{self.filepath}")
+            except Exception as e:
+                self.save_status_label.config(text=f"✗ Save failed: {e}", foreground="#c0392b")
+                if manual:
+                    messagebox.showerror("Error", f"Failed to save file: {e}")
+            return
+
+        try:
+            # Seal the journal so changes made during the write stay journaled
+            seq, snapshot = self.dataset.snapshot()
+        except Exception as e:
+            print(f"✗ Auto-save failed: {e}")
+            self.save_status_label.config(text=f"✗ Save failed: {e}", foreground="#c0392b")
+            return
+
+        self.saver.submit(
+            self.filepath,
+            snapshot,
+            tag={"journal": self.journal, "seq": seq, "manual": manual}
+        )
+        self.save_status_label.config(text="Saving…", foreground="")
+
+        if self.save_poll_id is None:
+            self.save_poll_id = self.root.after(100, self.poll_save_results)
+
+    def show_submit_result(self, result):
+        """
+        Shows the outcome of a submission to the server (None if there
+        was nothing to send).
+        """
+        rejected = result["rejected"] if result else 0
+        if rejected:
+            print(f"✗ The server rejected {rejected} change(s): the rows were leased to someone else")
+        self.save_status_label.config(
+            text=f"✓ Submitted to {self.filepath}" + (f" ({rejected} change(s) rejected: lease expired)" if rejected else ""),
+            foreground="#e67e22" if rejected else "#27ae60"
+        )
+
+    def export_project_csv(self):
+        """
+        Exports the open project to a CSV on the save worker.
+        """
+        if self.project is None:
+            return
+
+        csv_path = filedialog.asksaveasfilename(
+            title="Export project to CSV",
+            initialfile=os.path.splitext(os.path.basename(self.filepath))[0] + ".csv",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not csv_path:
+            return
+
+        self.saver.submit(
+            csv_path,
+            self.project.export_csv,
+            tag={"journal": None, "seq": 0, "manual": True}
+        )
+        self.save_status_label.config(text="Exporting…", foreground="")
+
+        if self.save_poll_id is None:
+            self.save_poll_id = self.root.after(100, self.poll_save_results)
+
+    def poll_save_results(self):
+        """
+        Collects finished writes from the save worker and reports them
+        in the status label. Reschedules itself while writes are running.
+        """
+        self.save_poll_id = None
+
+        for result in self.saver.poll():
+            manual = any(tag["manual"] for tag in result.tags)
+
+            if result.error is not None:
+                print(f"✗ Auto-save failed: {result.error}")
+                self.save_status_label.config(text=f"✗ Save failed: {result.error}", foreground="#c0392b")
+                if manual:
+                    messagebox.showerror("Error", f"Failed to save file: {result.error}")
+                continue
+
+            # The CSV now holds every sealed change; drop those journal segments
+            for tag in result.tags:
+                if tag["journal"] is not None:
+                    tag["journal"].discard_through(tag["seq"])
+
+            print(f"✓ Auto-saved to {result.path}")
+            # Indexed columns are unchanged by our own saves
+            if result.path == self.filepath:
+                self.refresh_shard_totals()
+                self.update_stats()
+                for derived in (self.search_index, self.clusters):
+                    if derived is None:
+                        continue
+                    try:
+                        derived.record_signature()
+                    except OSError as e:
+                        print(f"✗ Could not update {derived.meta_path}: {e}")
+            self.save_status_label.config(text=f"✓ Saved to {result.path.split('/')[-1]}", foreground="#27ae60")
+            if manual:
+                messagebox.showinfo("Success", f"Progress saved to:\n{result.path}")
+
+        if self.saver.busy:
+            self.save_poll_id = self.root.after(100, self.poll_save_results)
+
+    def toggle_timings_overlay(self, event=None):
+        """
+        Shows or hides the p50/p95/p99 latencies over the window.
+        """
+        if self.timings_overlay is not None:
+            self.timings_overlay.destroy()
+            self.timings_overlay = None
+            if self.timings_overlay_id is not None:
+                self.root.after_cancel(self.timings_overlay_id)
+                self.timings_overlay_id = None
+            return
+        self.timings_overlay = tk.Label(
+            self.root, justify="left", anchor="nw", font=("Courier", 10),
+            background="#2c3e50", foreground="#ecf0f1", padx=8, pady=6
+        )
+        self.timings_overlay.place(relx=1.0, rely=0.0, anchor="ne")
+        self.refresh_timings_overlay()
+
+    def refresh_timings_overlay(self):
+        self.timings_overlay_id = None
+        if self.timings_overlay is None:
+            return
+        self.timings_overlay.config(text=self.timings.format_summary())
+        self.timings_overlay.lift()
+        self.timings_overlay_id = self.root.after(500, self.refresh_timings_overlay)
+
+    def on_close(self):
+        """
+        Folds any journaled changes into the CSV (or checkpoints the
+        project) before exiting.
+        """
+        if self.save_poll_id is not None:
+            self.root.after_cancel(self.save_poll_id)
+            self.save_poll_id = None
+
+        if self.journal is not None and self.journal.has_changes():
+            self.auto_save()
+
+        # Waits for the final write, then closes the journal, body store or project
+        self.close_file()
+        if self.save_poll_id is not None:
+            self.root.after_cancel(self.save_poll_id)
+        if self.timings_overlay_id is not None:
+            self.root.after_cancel(self.timings_overlay_id)
+        if self.timings is not None and self.timings_path:
+            try:
+                self.timings.dump(self.timings_path)
+                print(f"✓ Wrote action timings to {self.timings_path}")
+            except OSError as e:
+                print(f"✗ Could not write {self.timings_path}: {e}")
+        self.root.destroy()
+
+    def disable_controls(self):
+        """Disables all controls except the 'Load' button."""
+        for btn in self.annotation_buttons.values():
+            btn.config(state="disabled")
+        self.prev_button.config(state="disabled")
+        self.next_button.config(state="disabled")
+        self.skip_button.config(state="disabled")
+        self.save_button.config(state="disabled")
+        self.save_note_button.config(state="disabled")
+        self.export_button.config(state="disabled")
+        self.next_shard_button.config(state="disabled")
+        self.jump_button.config(state="disabled")
+        self.jump_entry.config(state="disabled")
+        self.view_picker.config(state="disabled")
+        self.note_entry.config(state="disabled")
+        self.set_search_controls("disabled")
+        # Some controls may not exist yet depending on init order; guard with hasattr
+        if hasattr(self, 'view_skipped_button') and self.view_skipped_button is not None:
+            try:
+                self.view_skipped_button.config(state="disabled")
+            except Exception:
+                pass
+        if hasattr(self, 'goto_prev_skipped_button') and self.goto_prev_skipped_button is not None:
+            try:
+                self.goto_prev_skipped_button.config(state="disabled")
+            except Exception:
+                pass
+        if hasattr(self, 'goto_next_skipped_button') and self.goto_next_skipped_button is not None:
+            try:
+                self.goto_next_skipped_button.config(state="disabled")
+            except Exception:
+                pass
+
+        self.displayed_payload = None
+        self.text_renderer.cancel()
+        self.text_display.config(state="normal")
+        self.text_display.delete("1.0", "end")
+        self.text_display.insert("1.0", "Please load a CSV file to begin annotation.\n\nEvery change is journaled next to the file and saved back into it automatically.")
+        self.text_display.config(state="disabled")
+
+    def enable_controls(self):
+        """Enables all controls after a file is loaded."""
+        for btn in self.annotation_buttons.values():
+            btn.config(state="normal")
+        self.skip_button.config(state="normal")
+        self.save_button.config(state="normal")
+        self.save_note_button.config(state="normal")
+        self.export_button.config(state="normal" if self.project is not None else "disabled")
+        self.jump_button.config(state="normal")
+        self.jump_entry.config(state="normal")
+        self.view_picker.config(state="readonly")
+        self.note_entry.config(state="normal")
+        # Guard optional controls
+        if hasattr(self, 'view_skipped_button') and self.view_skipped_button is not None:
+            try:
+                self.view_skipped_button.config(state="normal")
+            except Exception:
+                pass
+        # Nav buttons are managed by update_display(), skipped navigation by update_skipped_picker()
+        self.update_skipped_picker()
+        self.update_display()
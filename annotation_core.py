@@ -0,0 +1,592 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from annotation_journal import AnnotationJournal
+from body_store import BodyStore
+from csv_ingest import read_csv_fast
+from progress_model import ProgressModel
+from project_store import ProjectStore
+from row_ids import RowIds
+from shards import ShardManifest
+from save_worker import write_atomic, write_csv_atomic
+from skipped_index import SkippedIndex
+
+
+class AnnotationDataset:
+    """
+    The annotation data model without any GUI: one open CSV (with its
+    journal and, for large files, body store) or project file.
+
+    Mutators (annotate, skip, set_note, apply_labels, reset_skips,
+    restore) update the in-memory columns, skipped rows and counts and
+    return the (op, row, value) changes they made; record() persists
+    them (the GUI sends them to the server instead in multi-annotator
+    mode). save() folds the journal back into the CSV.
+
+    Rows of a CSV also have stable IDs (see RowIds): journal records
+    carry them, and when the CSV was replaced by a re-sorted or extended
+    export the annotations saved under those IDs are re-attached. When
+    the CSV is a shard (see shards.py), every save also updates the
+    counts in its manifest.
+
+    In memory the columns are kept compact (see normalize): labels as a
+    categorical (small-int codes, -1 for missing), skip flags as int8,
+    repetitive email columns (sender, source_dataset, ...) as
+    categoricals and notes, which few rows have, in a {row: text} dict
+    outside the DataFrame. They are written back as plain CSV values on
+    save.
+    """
+
+    def __init__(self, annotation_column="phishing_type", note_column="note", skip_column="skip_flag"):
+        self.annotation_column = annotation_column
+        self.note_column = note_column
+        self.skip_column = skip_column
+        # Files at least this large keep their email bodies out of memory
+        self.lazy_body_min_bytes = 100 * 1024 * 1024
+        # Number of journaled changes after which the GUI folds them back into the CSV
+        self.journal_compact_threshold = 500
+        # Email columns with fewer distinct values than this share of rows are held as categoricals
+        self.categorical_max_share = 0.5
+        # Rows sampled from the top of a column before counting all its distinct values
+        self.categorical_sample_rows = 10000
+
+        self.path = ""
+        self.df = None  # Label and skip columns, plus the email columns of a CSV
+        self.notes = {}  # row -> note, for the rows that have one
+        self.note_position = 0  # Column index of the notes in the CSV
+        self.journal = None  # Write-ahead journal of changes not yet folded into the CSV
+        self.body_store = None  # Memory-mapped email bodies for large files (None = bodies in df)
+        self.project = None  # SQLite project store when a .annproj file is open
+        self.row_ids = None  # Stable row IDs of a CSV
+        self.manifest = None  # ShardManifest when the CSV is a shard
+        self.skipped = SkippedIndex()  # Sorted positions of skipped emails
+        self.progress = ProgressModel()  # Running annotated/class/skip/note counts
+
+    @property
+    def total_rows(self):
+        return 0 if self.df is None else len(self.df)
+
+    # --- Loading ---
+
+    def open(self, path, progress=None):
+        """
+        Opens a CSV or project file, replaying the CSV's journal.
+        progress(fraction) is called while a CSV is parsed. Returns the
+        number of journaled changes replayed.
+        """
+        self.close()
+        replayed = 0
+        if path.endswith(ProjectStore.SUFFIX):
+            # Only the annotation columns are held in memory
+            self.project = ProjectStore(path)
+            df = self.project.read_annotations()
+        else:
+            df, self.body_store = self.read_dataset(path, progress)
+        self.df = self.normalize(df)
+        self.path = path
+
+        if self.project is not None:
+            # Skipped rows and counts come from the project's indexes
+            self.skipped = SkippedIndex(self.project.skipped_rows())
+            labels, skipped, noted = self.project.counts()
+            self.progress.set_counts(self.total_rows, labels, skipped, noted)
+            return replayed
+
+        self.manifest = ShardManifest.open(path)
+
+        # IDs are only hashed again when the CSV changed since they were saved
+        self.row_ids = RowIds(path)
+        refreshed = not self.row_ids.open(self.total_rows)
+        if refreshed:
+            previous = self.row_ids.read_previous()
+            self.row_ids.compute(
+                self.df, self.body_store, exclude=(self.annotation_column, self.note_column, self.skip_column)
+            )
+            if previous is not None:
+                new_rows = int((pd.Index(previous).get_indexer(self.row_ids.ids) < 0).sum())
+                print(f"✓ {new_rows:,} new row(s) since the last session")
+
+        # Replay changes journaled since the last save
+        self.journal = AnnotationJournal(path)
+        replayed, journaled = self.replay_journal()
+        self.journal.open()
+        if replayed:
+            print(f"✓ Replayed {replayed} journaled change(s) from {self.journal.path}")
+        self.rebuild_state()
+
+        if refreshed:
+            ledger = self.row_ids.read_ledger()
+            if ledger is not None:
+                changes = self.reattach(ledger, journaled)
+                self.record(changes)
+                if changes:
+                    print(f"✓ Re-attached {len(changes):,} annotation(s) by row ID")
+            self.row_ids.save_ids()
+        return replayed
+
+    def adopt(self, df, path):
+        """
+        Uses an already loaded DataFrame (e.g. a batch leased from the
+        annotation server) without a journal, body store or project.
+        """
+        self.close()
+        self.df = self.normalize(df)
+        self.path = path
+        self.rebuild_state()
+
+    def normalize(self, df):
+        """
+        Adds missing annotation columns and converts them, and the
+        repetitive email columns, to their compact types. The note
+        column is moved out of the DataFrame into self.notes.
+        """
+        if self.annotation_column not in df.columns:
+            df[self.annotation_column] = pd.NA
+        if self.note_column not in df.columns:
+            df[self.note_column] = pd.NA
+        if self.skip_column not in df.columns:
+            df[self.skip_column] = 0  # 0 = not skipped, 1 = skipped
+
+        labels = df[self.annotation_column]
+        if pd.api.types.is_float_dtype(labels) and (labels.dropna() % 1 == 0).all():
+            # A partly labelled CSV parses as float; keep "1", not "1.0"
+            df[self.annotation_column] = labels.astype("Int64")
+        df[self.annotation_column] = (
+            df[self.annotation_column].astype(str).replace(['', 'nan', '<NA>'], pd.NA).astype("category")
+        )
+        df[self.skip_column] = pd.to_numeric(df[self.skip_column], errors='coerce').fillna(0).astype(np.int8)
+
+        self.note_position = df.columns.get_loc(self.note_column)
+        notes = df.pop(self.note_column)
+        noted = np.flatnonzero(notes.notna().to_numpy())
+        self.notes = {
+            row: str(note) for row, note in zip(noted.tolist(), notes.iloc[noted])
+            if str(note) not in ('', 'nan', '<NA>')
+        }
+
+        # Free text (bodies, subjects) is ruled out on a sample before counting every value
+        sample_rows = self.categorical_sample_rows
+        for column in df.columns:
+            values = df[column]
+            if column in (self.annotation_column, self.skip_column) or not (
+                pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+            ):
+                continue
+            sample = values.iloc[:sample_rows]
+            if sample.nunique() >= self.categorical_max_share * len(sample):
+                continue
+            if values.nunique() < self.categorical_max_share * len(values):
+                df[column] = values.astype("category")
+        return df
+
+    def _set(self, row, column, value):
+        """
+        Sets one cell of the categorical label column, adding value to
+        its categories first if it is new.
+        """
+        if not pd.isna(value) and value not in self.df[column].cat.categories:
+            self.df[column] = self.df[column].cat.add_categories([value])
+        self.df.at[row, column] = value
+
+    def _add_categories(self, column, values):
+        categories = self.df[column].cat.categories
+        new = [value for value in pd.unique(np.asarray(values, dtype=object))
+               if not pd.isna(value) and value not in categories]
+        if new:
+            self.df[column] = self.df[column].cat.add_categories(new)
+
+    def rebuild_state(self):
+        """
+        Recomputes the skipped rows and counts from the DataFrame.
+        """
+        self.skipped = SkippedIndex(self.df.index[self.df[self.skip_column] == 1])
+        self.progress.rebuild(self.df, self.annotation_column, self.skip_column, len(self.notes))
+
+    def read_dataset(self, path, progress=None):
+        """
+        Reads the CSV into a DataFrame. Large files keep their email bodies
+        in a memory-mapped BodyStore instead of the DataFrame.
+        Returns a (DataFrame, BodyStore or None) tuple.
+        """
+        read_kwargs = dict(keep_default_na=False, na_values=[''])
+
+        if os.path.getsize(path) < self.lazy_body_min_bytes:
+            # Single-pass C parser read with sniffed encoding and progress
+            df, encoding = read_csv_fast(path, progress=progress, **read_kwargs)
+            print(f"✓ Read {path} ({encoding})")
+            return df, None
+
+        # Unchanged since the last session: only the small columns are parsed
+        store = BodyStore.open(path)
+        if store is not None:
+            df = store.read_columns(progress=progress, **read_kwargs)
+            print(f"✓ Reopened {path} with bodies from {store.data_path}")
+            return df, store
+
+        # First load: stream the bodies into the store while parsing
+        store = BodyStore(path)
+        try:
+            df, encoding = read_csv_fast(path, progress=progress, transform=store.split_chunk, **read_kwargs)
+            if not store.building:
+                # No body column to move out of memory
+                return df, None
+            store.finish_build(df)
+        except Exception:
+            store.abort_build()
+            raise
+
+        print(f"✓ Read {path} ({encoding}), bodies stored in {store.data_path}")
+        return df, store
+
+    def replay_journal(self):
+        """
+        Applies the changes recorded in the journal to the loaded DataFrame.
+        Records carrying a row ID follow that row if it moved. Returns the
+        number of records applied and the set of rows they touched.
+        """
+        applied = 0
+        journaled = set()
+        ids = self.row_ids.ids if self.row_ids is not None else None
+        for record in self.journal.read():
+            row = record["row"]
+            if ids is not None and "id" in record:
+                row_id = int(record["id"], 16)
+                if not (0 <= row < self.total_rows and ids[row] == row_id):
+                    row = self.row_ids.position(row_id)
+            if not 0 <= row < self.total_rows:
+                continue
+
+            op = record["op"]
+            if op == "annotate":
+                self._set(row, self.annotation_column, record.get("value"))
+            elif op == "skip":
+                self.df.at[row, self.skip_column] = 1
+            elif op == "unskip":
+                self.df.at[row, self.skip_column] = 0
+            elif op == "note":
+                self.notes[row] = record.get("value")
+            elif op == "clear_note":
+                self.notes.pop(row, None)
+            applied += 1
+            journaled.add(row)
+
+        return applied, journaled
+
+    def reattach(self, ledger, journaled=()):
+        """
+        Restores the labels, notes and skip flags saved under row IDs
+        (see RowIds.read_ledger) to the rows that have none, in one hash
+        join. Rows in journaled keep their journaled state. Returns the
+        changes made.
+        """
+        rows, entries = self.row_ids.match_ledger(ledger)
+        keep = ~np.isin(rows, np.fromiter(journaled, dtype=np.int64, count=len(journaled)))
+        rows, entries = rows[keep], entries[keep]
+
+        labels = entries["label"].to_numpy(dtype=object)
+        missing = self.df[self.annotation_column].isna().to_numpy()[rows] & pd.notna(labels)
+        changes = self.apply_labels(rows[missing], labels[missing])
+
+        notes = entries["note"].to_numpy(dtype=object)
+        for row, note in zip(rows.tolist(), notes):
+            if row not in self.notes and pd.notna(note):
+                changes += self.set_note(row, note)
+
+        skipped = (entries["skip"].to_numpy() == 1) & (self.df[self.skip_column].to_numpy()[rows] == 0)
+        skipped &= self.df[self.annotation_column].isna().to_numpy()[rows]
+        for row in rows[skipped].tolist():
+            changes += self.skip(row)
+        return changes
+
+    def resume_position(self):
+        """
+        Returns the first row that hasn't been annotated yet, or 0.
+        """
+        if self.df is None or len(self.df) == 0:
+            return 0
+
+        if self.project is not None:
+            first_unannotated = self.project.first_unannotated()
+            return first_unannotated if first_unannotated is not None else 0
+
+        unannotated_mask = self.df[self.annotation_column].isna()
+        return int(unannotated_mask.idxmax()) if unannotated_mask.any() else 0
+
+    def column_values(self, column):
+        """
+        Returns one email column for every row as an object array.
+        """
+        if self.project is not None:
+            if column not in self.project.email_columns:
+                raise KeyError(column)
+            return np.array(
+                [value for _, fields in self.project.iter_columns([column]) for value in fields[column]],
+                dtype=object
+            )
+        if self.body_store is not None and column == self.body_store.column:
+            return np.array([self.body_store.get(i) for i in range(self.total_rows)], dtype=object)
+        return self.df[column].to_numpy(dtype=object)
+
+    # --- Changes ---
+
+    def annotate(self, row, label):
+        """
+        Labels one row; a skipped row stops being skipped.
+        """
+        self.progress.label_changed(self.df.at[row, self.annotation_column], label)
+        self._set(row, self.annotation_column, label)
+        changes = [("annotate", row, label)]
+
+        if row in self.skipped:
+            self.skipped.discard(row)
+            self.progress.skip_changed(1, 0)
+            self.df.at[row, self.skip_column] = 0
+            changes.append(("unskip", row, None))
+        return changes
+
+    def skip(self, row):
+        self.skipped.add(row)
+        self.progress.skip_changed(self.df.at[row, self.skip_column], 1)
+        self.df.at[row, self.skip_column] = 1
+        return [("skip", row, None)]
+
+    def set_note(self, row, note):
+        """
+        Sets the note of one row; an empty note clears it.
+        """
+        old_note = self.notes.get(row)
+        if note:
+            self.notes[row] = note
+            changes = [("note", row, note)]
+        else:
+            self.notes.pop(row, None)
+            changes = [("clear_note", row, None)]
+        self.progress.note_changed(old_note, self.notes.get(row))
+        return changes
+
+    def apply_labels(self, rows, labels):
+        """
+        Labels many rows at once; labels is one label or one per row.
+        Skipped rows among them stop being skipped.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        labels = np.broadcast_to(np.asarray(labels, dtype=object), rows.shape)
+        if not len(rows):
+            return []
+
+        # Counts are updated per distinct new label
+        old_labels = self.df[self.annotation_column].iloc[rows]
+        for label in pd.unique(labels):
+            self.progress.labels_changed(old_labels[labels == label], label)
+        self._add_categories(self.annotation_column, labels)
+        self.df.iloc[rows, self.df.columns.get_loc(self.annotation_column)] = labels
+        changes = [("annotate", row, label) for row, label in zip(rows.tolist(), labels.tolist())]
+        return changes + self.reset_skips(rows)
+
+    def reset_skips(self, rows=None):
+        """
+        Clears the skip flag of rows (every skipped row if None).
+        """
+        skip_flags = self.df[self.skip_column].to_numpy()
+        if rows is None:
+            skipped = np.flatnonzero(skip_flags == 1)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            skipped = np.unique(rows[skip_flags[rows] == 1])
+        if not len(skipped):
+            return []
+
+        self.df.iloc[skipped, self.df.columns.get_loc(self.skip_column)] = 0
+        self.progress.skipped -= len(skipped)
+        if len(skipped) > 1000:
+            self.skipped = SkippedIndex(np.flatnonzero(self.df[self.skip_column].to_numpy() == 1))
+        else:
+            for row in skipped.tolist():
+                self.skipped.discard(row)
+        return [("unskip", row, None) for row in skipped.tolist()]
+
+    def row_state(self, rows):
+        """
+        Returns the (labels, notes, skip flags) arrays of rows, as
+        restore() takes them back.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return (
+            self.df[self.annotation_column].to_numpy(dtype=object)[rows],
+            np.array([self.notes.get(row) for row in rows.tolist()], dtype=object),
+            self.df[self.skip_column].to_numpy()[rows].astype(np.int8),
+        )
+
+    def restore(self, rows, state):
+        """
+        Puts rows back into a state returned by row_state(), e.g. to undo
+        an edit. Only values that differ are changed.
+        """
+        labels, notes, skips = state
+        changes = []
+        for row, label, note, skip in zip(np.asarray(rows, dtype=np.int64).tolist(), labels, notes, skips):
+            old_label = self.df.at[row, self.annotation_column]
+            if pd.isna(old_label) != pd.isna(label) or (not pd.isna(label) and old_label != label):
+                self.progress.label_changed(old_label, label)
+                self._set(row, self.annotation_column, label)
+                changes.append(("annotate", row, None if pd.isna(label) else label))
+
+            old_note = self.notes.get(row)
+            if pd.isna(old_note) != pd.isna(note) or (not pd.isna(note) and old_note != note):
+                changes += self.set_note(row, None if pd.isna(note) else note)
+
+            if self.df.at[row, self.skip_column] != skip:
+                if skip == 1:
+                    changes += self.skip(row)
+                else:
+                    self.skipped.discard(row)
+                    self.progress.skip_changed(1, 0)
+                    self.df.at[row, self.skip_column] = 0
+                    changes.append(("unskip", row, None))
+        return changes
+
+    def record(self, changes):
+        """
+        Persists changes: one transaction in a project, otherwise one
+        journal write.
+        """
+        if not changes:
+            return
+        if self.project is not None:
+            self.project.apply_many(changes)
+        elif self.journal is not None:
+            self.journal.append_many(changes, self.row_ids.ids if self.row_ids is not None else None)
+
+    # --- Statistics ---
+
+    def stats(self, classes=None):
+        """
+        Returns the counts as a dict; classes fixes the order (and
+        zero entries) of the per-class counts.
+        """
+        progress = self.progress
+        if classes is None:
+            classes = sorted(label for label, count in progress.class_counts.items() if count)
+        return {
+            "total": progress.total_rows,
+            "annotated": progress.annotated,
+            "percentage": round(progress.percentage, 1),
+            "classes": {label: progress.class_counts[label] for label in classes},
+            "skipped": progress.skipped,
+            "noted": progress.noted,
+        }
+
+    # --- Saving ---
+
+    def frame(self):
+        """
+        Returns a copy of the DataFrame with the notes put back as a
+        column at their place in the CSV.
+        """
+        df = self.df.copy()
+        notes = np.full(len(df), np.nan, dtype=object)
+        if self.notes:
+            notes[np.fromiter(self.notes, dtype=np.int64, count=len(self.notes))] = list(self.notes.values())
+        df.insert(min(self.note_position, len(df.columns)), self.note_column, notes)
+        return df
+
+    def snapshot(self):
+        """
+        Seals the journal and returns (journal segment, snapshot): the
+        snapshot is a DataFrame copy, or a callable taking the target
+        path when the bodies are streamed back from the body store or
+        the annotations are also saved by row ID (and in the shard
+        manifest). Once it is written, journal.discard_through(segment)
+        drops the changes it contains.
+        """
+        # Changes made during the write stay journaled
+        seq = self.journal.rotate() if self.journal is not None else 0
+        snapshot = self.frame()
+        if self.body_store is not None:
+            # Bodies are streamed back in from the store while writing
+            write = functools.partial(self.body_store.save, snapshot)
+        elif self.row_ids is not None:
+            write = functools.partial(write_csv_atomic, snapshot)
+        else:
+            return seq, snapshot
+        if self.row_ids is None:
+            return seq, write
+        return seq, functools.partial(
+            self._write_with_sidecars, write, snapshot, self.row_ids, self.manifest, self.stats()
+        )
+
+    def _write_with_sidecars(self, write, snapshot, row_ids, manifest, stats, path):
+        """
+        Writes the CSV, then the annotations by row ID, the new CSV
+        signature the IDs belong to and the shard's counts. Runs on the
+        save worker.
+        """
+        write(path)
+        if path != row_ids.csv_path:
+            return
+        row_ids.save_ledger(snapshot, self.annotation_column, self.note_column, self.skip_column)
+        row_ids.record_signature()
+        if manifest is not None:
+            manifest.progress = stats
+            manifest.save()
+
+    def save(self):
+        """
+        Writes every change back into the file: folds the journal into
+        the CSV, or checkpoints the project.
+        """
+        if self.project is not None:
+            self.project.checkpoint()
+            return
+
+        seq, snapshot = self.snapshot()
+        if callable(snapshot):
+            snapshot(self.path)
+        else:
+            write_csv_atomic(snapshot, self.path)
+        if self.journal is not None:
+            self.journal.discard_through(seq)
+
+    def export_labeled(self, path, classes=None):
+        """
+        Writes only the labelled rows (of the given classes, if any) to
+        a CSV with the file's column layout. Returns the number of rows.
+        """
+        if self.project is not None:
+            labels, _, _ = self.project.counts()
+            return self.project.export_csv(path, labels=list(classes or labels))
+
+        labels = self.df[self.annotation_column]
+        mask = labels.notna() if not classes else labels.isin(list(classes))
+        rows = np.flatnonzero(mask.to_numpy())
+        subset = self.frame().iloc[rows]
+        if self.body_store is not None:
+            write_atomic(path, lambda fh: self.body_store.write_csv(subset, fh, rows=rows))
+        else:
+            write_csv_atomic(subset, path)
+        return len(rows)
+
+    def close(self):
+        """
+        Closes the journal, body store or project. The journal's records
+        stay on disk until they are folded into the CSV.
+        """
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.body_store is not None:
+            self.body_store.close()
+            self.body_store = None
+        if self.project is not None:
+            self.project.close()
+            self.project = None
+        self.df = None
+        self.notes = {}
+        self.path = ""
+        self.row_ids = None
+        self.manifest = None
+        self.skipped = SkippedIndex()
+        self.progress = ProgressModel()
@@ -0,0 +1,155 @@
+import glob
+import json
+import os
+
+from row_ids import format_id
+
+
+class AnnotationJournal:
+    """
+    Append-only write-ahead journal of annotation changes.
+
+    Every annotate/skip/note change is written as one small JSON line to
+    a file next to the CSV (<file>.csv.journal) and fsync'd, so a click
+    costs a single append no matter how big the dataset is. The journal
+    is replayed on load and emptied once its changes have been folded
+    back into the CSV.
+
+    When a save starts, the active journal is sealed into a numbered
+    segment (<file>.csv.journal.<n>) and new changes go to a fresh file.
+    The segments are only deleted once the save has reached the disk.
+    """
+
+    # Supported operations
+    OPS = ("annotate", "skip", "unskip", "note", "clear_note")
+
+    def __init__(self, csv_path):
+        self.path = csv_path + ".journal"
+        self.pending = 0  # Records written since the last save started
+        self._fh = None
+
+    def open(self):
+        """
+        Opens the journal for appending and counts the records already in it.
+        """
+        self.pending = sum(1 for _ in self.read())
+
+        # Drop a torn trailing line so new records start on a fresh line
+        if os.path.exists(self.path):
+            with open(self.path, "rb+") as fh:
+                data = fh.read()
+                if data and not data.endswith(b"\n"):
+                    fh.truncate(data.rfind(b"\n") + 1)
+
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def append(self, op, row, value=None):
+        """
+        Appends a single change and forces it to disk.
+        """
+        self.append_many([(op, row, value)])
+
+    def append_many(self, changes, row_ids=None):
+        """
+        Appends (op, row, value) changes with a single write and fsync.
+        With row_ids (stable ID per row) each record also carries the
+        row's ID, so it can be replayed onto a re-sorted CSV.
+        """
+        lines = []
+        for op, row, value in changes:
+            if op not in self.OPS:
+                raise ValueError(f"Unknown journal operation: {op}")
+            record = {"op": op, "row": int(row)}
+            if row_ids is not None:
+                record["id"] = format_id(row_ids[row])
+            if value is not None:
+                record["value"] = value
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if not lines:
+            return
+        if self._fh is None:
+            self.open()
+
+        self._fh.write("".join(lines))
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.pending += len(lines)
+
+    def segments(self):
+        """
+        Returns the (number, path) pairs of sealed segments, oldest first.
+        """
+        found = []
+        for path in glob.glob(glob.escape(self.path) + ".*"):
+            suffix = path.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                found.append((int(suffix), path))
+        return sorted(found)
+
+    def read(self):
+        """
+        Yields the records stored in the journal, oldest first.
+        A torn trailing line (crash in the middle of a write) is ignored.
+        """
+        paths = [path for _, path in self.segments()] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    if not line.endswith("\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get("op") in self.OPS and "row" in record:
+                        yield record
+
+    def has_changes(self):
+        """
+        Returns True when there are changes not yet folded into the CSV.
+        """
+        if self.segments():
+            return True
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def rotate(self):
+        """
+        Seals the active journal into a numbered segment before a save
+        takes its snapshot. Returns the number of the newest segment, to
+        be passed to discard_through() once the save has succeeded.
+        """
+        segments = self.segments()
+        seq = segments[-1][0] if segments else 0
+
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            seq += 1
+            os.replace(self.path, f"{self.path}.{seq}")
+
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self.pending = 0
+        return seq
+
+    def discard_through(self, seq):
+        """
+        Deletes the sealed segments up to and including number seq.
+        """
+        for number, path in self.segments():
+            if number <= seq:
+                os.remove(path)
+
+    def close(self):
+        """
+        Closes the journal file, removing it when it holds no changes.
+        """
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if os.path.exists(self.path) and os.path.getsize(self.path) == 0:
+            os.remove(self.path)
@@ -0,0 +1,404 @@
+"""
+Merges the files of several annotators and reports their agreement.
+
+    python annotation_merge.py alice.csv bob.csv carol.csv -o merged.csv --key message_id
+
+Rows are aligned by --key (a column every file has) or, by default, by
+their position. Only the key and annotation columns of each file are
+held in memory, as hashed keys and int8 label codes; journaled changes
+not yet saved into a file are included. The report gives Cohen's kappa
+and the confusion matrix of every pair of annotators and Fleiss' kappa
+over all of them.
+
+Two files are written:
+- the consolidated file: the first file's rows, streamed chunk by chunk,
+  with the majority label (empty when there is none), the annotators'
+  notes and an annotator_labels column such as "2|2|3";
+- <output>.review.csv, the disagreement queue: every row the annotators
+  labelled differently. "Open Review Queue…" in the annotation tool
+  steps through these rows of the consolidated file.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from annotation_journal import AnnotationJournal
+from csv_ingest import iter_csv_chunks
+from row_ids import RowIds, disambiguate, hash_rows, hashed_columns
+from save_worker import write_atomic, write_csv_atomic
+
+CLASSES = ["1", "2", "3"]
+REVIEW_SUFFIX = ".review.csv"
+
+
+class AnnotatorFile:
+    """
+    The annotation columns of one annotator's CSV: hashed row keys,
+    label codes (position in classes, -1 if unlabelled), skip flags and
+    the sparse notes.
+    """
+
+    def __init__(self, path, key="row", classes=CLASSES, annotation_column="phishing_type",
+                 note_column="note", skip_column="skip_flag", chunk_rows=100000):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.key = key
+        self.classes = list(classes)
+        self.unknown_labels = 0  # Labels outside classes, treated as unlabelled
+
+        wanted = {key, annotation_column, note_column, skip_column}
+        read_kwargs = dict(
+            usecols=lambda column: column in wanted,
+            dtype=str, keep_default_na=False, na_values=[''],
+        )
+        keys, labels, skips, notes = [], [], [], {}
+        for chunk in iter_csv_chunks(path, chunk_rows=chunk_rows, **read_kwargs):
+            if len(chunk) and chunk.index[0] == 0:
+                # The parser restarted from the top
+                keys, labels, skips, notes = [], [], [], {}
+            if key != "row":
+                if key not in chunk.columns:
+                    raise ValueError(f"{path} has no '{key}' column")
+                keys.append(pd.util.hash_array(chunk[key].fillna("").to_numpy(dtype=object)))
+            labels.append(self._codes(chunk[annotation_column]) if annotation_column in chunk.columns
+                          else np.full(len(chunk), -1, dtype=np.int8))
+            skips.append(
+                pd.to_numeric(chunk[skip_column], errors='coerce').fillna(0).to_numpy() == 1
+                if skip_column in chunk.columns else np.zeros(len(chunk), dtype=bool)
+            )
+            if note_column in chunk.columns:
+                noted = chunk[note_column].dropna()
+                notes.update(zip(noted.index.tolist(), noted.tolist()))
+
+        self.labels = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int8)
+        self.skips = np.concatenate(skips) if skips else np.zeros(0, dtype=bool)
+        self.notes = notes  # row -> note
+        if key == "row":
+            self.keys = np.arange(len(self.labels), dtype=np.uint64)
+        else:
+            self.keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint64)
+            if not pd.Index(self.keys).is_unique:
+                raise ValueError(f"'{key}' is not unique in {path}")
+        self.replayed = self._replay_journal(
+            annotation_column, (annotation_column, note_column, skip_column), chunk_rows
+        )
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _codes(self, values):
+        # "2.0": labels of a partly labelled file that went through a float column
+        spellings = pd.Index(self.classes + [label + ".0" for label in self.classes])
+        codes = spellings.get_indexer(values)
+        odd = np.flatnonzero((codes < 0) & values.notna().to_numpy())
+        if len(odd):
+            codes[odd] = spellings.get_indexer(values.iloc[odd].str.strip())
+        codes = np.where(codes >= 0, codes % len(self.classes), -1).astype(np.int8)
+        self.unknown_labels += int(((codes < 0) & values.notna().to_numpy()).sum())
+        return codes
+
+    def _replay_journal(self, annotation_column, own_columns, chunk_rows):
+        """
+        Applies changes journaled since the file was last saved. Records
+        carrying a row ID follow that row if it moved, as when the
+        annotation tool replays them; records whose row is gone are
+        skipped.
+        """
+        applied = 0
+        row_ids = None
+        for record in AnnotationJournal(self.path).read():
+            row = record["row"]
+            if "id" in record:
+                if row_ids is None:
+                    row_ids = self._row_ids(own_columns, chunk_rows)
+                row_id = int(record["id"], 16)
+                if not (0 <= row < len(self) and row_ids.ids[row] == row_id):
+                    row = row_ids.position(row_id)
+            if not 0 <= row < len(self):
+                continue
+            op = record["op"]
+            if op == "annotate":
+                label = str(record.get("value"))
+                self.labels[row] = self.classes.index(label) if label in self.classes else -1
+            elif op in ("skip", "unskip"):
+                self.skips[row] = op == "skip"
+            elif op == "note":
+                self.notes[row] = record.get("value")
+            elif op == "clear_note":
+                self.notes.pop(row, None)
+            applied += 1
+        return applied
+
+    def _row_ids(self, own_columns, chunk_rows):
+        """
+        Returns the RowIds of the file: the persisted IDs if they belong
+        to the CSV as it is now, otherwise hashed in a second pass over
+        the CSV the way the annotation tool computes them.
+        """
+        row_ids = RowIds(self.path)
+        if row_ids.open(len(self)):
+            return row_ids
+        hashes, columns = [], None
+        for chunk in iter_csv_chunks(self.path, chunk_rows=chunk_rows, keep_default_na=False, na_values=['']):
+            if len(chunk) and chunk.index[0] == 0:
+                hashes = []
+            if columns is None:
+                columns = hashed_columns(list(chunk.columns), exclude=own_columns)
+            hashes.append(hash_rows(chunk[columns]))
+        row_ids.ids = disambiguate(np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint64))
+        return row_ids
+
+    def aligned_to(self, keys):
+        """
+        Returns this file's row for each key (-1 where it has none).
+        """
+        return pd.Index(self.keys).get_indexer(keys)
+
+
+def label_matrix(files):
+    """
+    Returns a rows x annotators int8 matrix of label codes aligned to
+    the first file's rows (-1 where a row is unlabelled or missing).
+    """
+    base = files[0]
+    matrix = np.full((len(base), len(files)), -1, dtype=np.int8)
+    matrix[:, 0] = base.labels
+    for j, other in enumerate(files[1:], start=1):
+        rows = other.aligned_to(base.keys)
+        found = rows >= 0
+        matrix[found, j] = other.labels[rows[found]]
+    return matrix
+
+
+def category_counts(matrix, k):
+    """
+    Returns a rows x k matrix with the number of annotators per label.
+    """
+    counts = np.zeros((len(matrix), k), dtype=np.int32)
+    for j in range(matrix.shape[1]):
+        labelled = matrix[:, j] >= 0
+        np.add.at(counts, (np.flatnonzero(labelled), matrix[labelled, j]), 1)
+    return counts
+
+
+def cohen_kappa(a, b, k):
+    """
+    Returns (kappa, k x k confusion matrix, rows compared) over the rows
+    both annotators labelled. kappa is NaN when undefined.
+    """
+    both = (a >= 0) & (b >= 0)
+    n = int(both.sum())
+    confusion = np.bincount(a[both].astype(np.int64) * k + b[both], minlength=k * k).reshape(k, k)
+    if n == 0:
+        return float("nan"), confusion, 0
+    observed = np.trace(confusion) / n
+    expected = (confusion.sum(axis=1) @ confusion.sum(axis=0)) / (n * n)
+    kappa = (observed - expected) / (1 - expected) if expected < 1 else float("nan")
+    return float(kappa), confusion, n
+
+
+def fleiss_kappa(counts):
+    """
+    Fleiss' kappa over the rows rated by at least two annotators; rows
+    may have different numbers of ratings. Returns (kappa, rows used).
+    """
+    raters = counts.sum(axis=1)
+    counts, raters = counts[raters >= 2], raters[raters >= 2]
+    if not len(counts):
+        return float("nan"), 0
+    agreement = ((counts * (counts - 1)).sum(axis=1) / (raters * (raters - 1))).mean()
+    proportions = counts.sum(axis=0) / raters.sum()
+    expected = (proportions ** 2).sum()
+    kappa = (agreement - expected) / (1 - expected) if expected < 1 else float("nan")
+    return float(kappa), len(counts)
+
+
+def majority(counts):
+    """
+    Returns the label code with a strict majority of each row's ratings
+    (-1 where there is none).
+    """
+    raters = counts.sum(axis=1)
+    top = counts.argmax(axis=1)
+    has_majority = counts[np.arange(len(counts)), top] * 2 > raters
+    return np.where(has_majority, top, -1).astype(np.int8)
+
+
+def write_consolidated(files, matrix, consensus, output, review_rows, annotation_column="phishing_type",
+                       note_column="note", skip_column="skip_flag", chunk_rows=20000):
+    """
+    Streams the first file into output with the merged annotation columns.
+    Returns the key values of review_rows (sorted rows), picked up on the way.
+    """
+    base = files[0]
+    review_keys = np.empty(len(review_rows), dtype=object)
+    classes = np.array(base.classes + [""], dtype=object)  # code -1 -> ""
+    labels = np.array(base.classes + [None], dtype=object)
+    names = [f.name for f in files]
+    aligned = [None] + [other.aligned_to(base.keys) for other in files[1:]]
+
+    # Notes are sparse: join them per row of the first file once
+    parts = {}
+    for name, other, positions in zip(names, files, aligned):
+        if positions is None:
+            base_row = np.arange(len(other))
+        else:
+            base_row = np.full(len(other), -1, dtype=np.int64)
+            found = positions >= 0
+            base_row[positions[found]] = np.flatnonzero(found)
+        for row, note in other.notes.items():
+            if note and base_row[row] >= 0:
+                parts.setdefault(int(base_row[row]), []).append(f"{name}: {note}")
+    notes = {row: " | ".join(row_parts) for row, row_parts in parts.items()}
+
+    # "2|2|3" for every combination of label codes, looked up by one number per row
+    k = len(base.classes) + 1
+    weights = k ** np.arange(len(files), dtype=np.int64)
+    if k ** len(files) <= 1 << 16:
+        combinations = np.array([
+            "|".join(classes[(code // weights) % k - 1]) for code in range(k ** len(files))
+        ], dtype=object)
+    else:
+        combinations = None
+
+    def label_strings(rows):
+        codes = matrix[rows].astype(np.int64) + 1
+        if combinations is not None:
+            return combinations[codes @ weights]
+        return ["|".join(row_labels) for row_labels in classes[codes - 1].tolist()]
+
+    def any_skip(rows):
+        skipped = base.skips[rows].copy()
+        for other, positions in zip(files[1:], aligned[1:]):
+            found = positions[rows] >= 0
+            skipped[found] |= other.skips[positions[rows][found]]
+        return skipped
+
+    def write(fh):
+        written = 0
+        for chunk in iter_csv_chunks(base.path, chunk_rows=chunk_rows, keep_default_na=False, na_values=['']):
+            if len(chunk) and chunk.index[0] == 0 and written:
+                # The parser restarted from the top
+                fh.seek(0)
+                fh.truncate()
+                written = 0
+            rows = chunk.index.to_numpy()
+            chunk[annotation_column] = labels[consensus[rows]]
+            chunk[note_column] = [notes.get(row) for row in rows.tolist()]
+            # Rows without a majority stay skipped if any annotator skipped them
+            chunk[skip_column] = ((consensus[rows] < 0) & any_skip(rows)).astype(int)
+            chunk["annotator_labels"] = label_strings(rows)
+            chunk.to_csv(fh, index=False, header=(written == 0))
+            written += len(chunk)
+
+            if base.key != "row" and len(rows):
+                first, last = np.searchsorted(review_rows, [rows[0], rows[-1] + 1])
+                review_keys[first:last] = chunk[base.key].to_numpy(dtype=object)[review_rows[first:last] - rows[0]]
+
+    write_atomic(output, write)
+    return review_keys
+
+
+def merge(paths, output, key="row", classes=CLASSES, chunk_rows=100000):
+    """
+    Merges the annotator files, writes the consolidated file and the
+    disagreement queue, and returns the agreement report as a dict.
+    """
+    files = [AnnotatorFile(path, key, classes, chunk_rows=chunk_rows) for path in paths]
+    for i, f in enumerate(files):
+        if [other.name for other in files].count(f.name) > 1:
+            f.name = f"{f.name}_{i + 1}"
+    k = len(classes)
+    matrix = label_matrix(files)
+    counts = category_counts(matrix, k)
+    consensus = majority(counts)
+
+    pairs = []
+    for i in range(len(files)):
+        for j in range(i + 1, len(files)):
+            kappa, confusion, n = cohen_kappa(matrix[:, i], matrix[:, j], k)
+            pairs.append({
+                "annotators": [files[i].name, files[j].name],
+                "rows": n,
+                "cohen_kappa": None if np.isnan(kappa) else round(kappa, 4),
+                "confusion": confusion.tolist(),  # rows: first annotator, columns: second
+            })
+    fleiss, fleiss_rows = fleiss_kappa(counts)
+
+    # Labelled by two or more annotators who did not all agree
+    raters = counts.sum(axis=1)
+    disagreements = np.flatnonzero((raters >= 2) & (counts.max(axis=1) < raters))
+
+    review_keys = write_consolidated(files, matrix, consensus, output, disagreements)
+    review = pd.DataFrame({"row": disagreements})
+    if key != "row":
+        review[key] = review_keys
+    for j, f in enumerate(files):
+        review[f.name] = np.array(classes + [""], dtype=object)[matrix[disagreements, j]]
+    review["majority"] = np.array(classes + [""], dtype=object)[consensus[disagreements]]
+    write_csv_atomic(review, output + REVIEW_SUFFIX)
+
+    return {
+        "annotators": [f.name for f in files],
+        "rows": len(files[0]),
+        "classes": list(classes),
+        "labelled_by": {str(n): int(c) for n, c in enumerate(np.bincount(raters, minlength=len(files) + 1))},
+        "missing_rows": {f.name: int((f.aligned_to(files[0].keys) < 0).sum()) for f in files[1:]},
+        "unknown_labels": {f.name: f.unknown_labels for f in files if f.unknown_labels},
+        "journaled_changes": {f.name: f.replayed for f in files if f.replayed},
+        "fleiss_kappa": None if np.isnan(fleiss) else round(fleiss, 4),
+        "fleiss_rows": fleiss_rows,
+        "pairs": pairs,
+        "majority_labels": int((consensus >= 0).sum()),
+        "disagreements": len(disagreements),
+    }
+
+
+def print_report(report):
+    print(f"Annotators: {', '.join(report['annotators'])} · {report['rows']:,} rows")
+    for n, count in report["labelled_by"].items():
+        print(f"  labelled by {n}: {count:,}")
+    for name, missing in report["missing_rows"].items():
+        if missing:
+            print(f"✗ {name} lacks {missing:,} row(s) of the first file")
+    for name, unknown in report["unknown_labels"].items():
+        print(f"✗ {name} has {unknown:,} label(s) outside {', '.join(report['classes'])}")
+
+    fleiss = report["fleiss_kappa"]
+    print(f"Fleiss' kappa: {'n/a' if fleiss is None else f'{fleiss:.3f}'} over {report['fleiss_rows']:,} rows")
+    width = max(len(label) for label in report["classes"]) + 2
+    for pair in report["pairs"]:
+        kappa = pair["cohen_kappa"]
+        first, second = pair["annotators"]
+        print(f"\nCohen's kappa {first} / {second}: {'n/a' if kappa is None else f'{kappa:.3f}'}"
+              f" over {pair['rows']:,} rows")
+        print(" " * width + "".join(f"{label:>{width + 6}}" for label in report["classes"]))
+        for label, line in zip(report["classes"], pair["confusion"]):
+            print(f"{label:>{width}}" + "".join(f"{count:>{width + 6},}" for count in line))
+    print(f"\n✓ Majority label for {report['majority_labels']:,} rows, "
+          f"{report['disagreements']:,} disagreement(s) to review")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="annotator CSVs (the first one's rows are kept)")
+    parser.add_argument("-o", "--output", required=True, help="consolidated CSV to write")
+    parser.add_argument("--key", default="row", help="column identifying a row (default: its position)")
+    parser.add_argument("--classes", nargs="+", default=CLASSES)
+    parser.add_argument("--report", help="also write the report as JSON to this file")
+    args = parser.parse_args()
+    if len(args.files) < 2:
+        parser.error("at least two annotator files are needed")
+
+    report = merge(args.files, args.output, args.key, args.classes)
+    print_report(report)
+    if args.report:
+        write_atomic(args.report, lambda fh: json.dump(report, fh, indent=2))
+    print(f"✓ Wrote {args.output} and {args.output + REVIEW_SUFFIX}")
+
+
+if __name__ == "__main__":
+    main()
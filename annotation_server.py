@@ -0,0 +1,383 @@
+"""
+Local annotation server for several annotators working on one dataset.
+
+    python annotation_server.py dataset.annproj --port 8765
+
+The server owns a project store (a CSV is imported into one next to it)
+and leases batches of unannotated rows to clients, so two annotators
+never see the same email. Leases expire after --lease-seconds unless the
+client submits within that time. Endpoints (JSON over HTTP):
+
+    POST /lease    {"client": id, "size": n}
+    POST /submit   {"client": id, "lease_id": id, "changes": [...], "release": bool}
+    POST /release  {"client": id, "lease_id": id}
+    GET  /stats
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from annotation_journal import AnnotationJournal
+from project_store import ProjectStore
+
+
+class LeaseError(Exception):
+    """Raised for requests that refer to an unknown or foreign lease."""
+
+
+class NothingToLease(Exception):
+    """Raised when the server has no unannotated rows left to lease."""
+
+
+class Lease:
+    __slots__ = ("lease_id", "client", "rows", "expires_at")
+
+    def __init__(self, lease_id, client, rows, expires_at):
+        self.lease_id = lease_id
+        self.client = client
+        self.rows = rows  # Set of project rows held by the lease
+        self.expires_at = expires_at
+
+
+class LeaseManager:
+    """
+    Hands out disjoint batches of unannotated rows and applies the
+    annotations clients send back. All methods are thread-safe.
+    """
+
+    def __init__(self, store, lease_seconds=900):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.leases = {}  # lease_id -> Lease
+        self.leased_rows = {}  # row -> lease_id
+        self.expired = {}  # client -> {lease_id: Lease} of its expired leases, for re-letting
+        self.rejected = 0  # Changes refused because the row was not leased to the sender
+        self._ids = itertools.count(1)
+
+    def _expire(self, now):
+        for lease in [lease for lease in self.leases.values() if lease.expires_at <= now]:
+            self._drop(lease)
+            self.expired.setdefault(lease.client, {})[lease.lease_id] = lease
+
+    def _drop(self, lease):
+        for row in lease.rows:
+            self.leased_rows.pop(row, None)
+        del self.leases[lease.lease_id]
+
+    def lease(self, client, size):
+        """
+        Leases up to size unannotated rows to client.
+        """
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+
+            rows = []
+            after = -1
+            while len(rows) < size:
+                candidates = self.store.unlabeled_rows(after, limit=max(size * 4, 256))
+                if not candidates:
+                    break
+                rows.extend(row for row in candidates if row not in self.leased_rows)
+                after = candidates[-1]
+            rows = rows[:size]
+
+            lease = Lease(f"{client}-{next(self._ids)}", client, set(rows), now + self.lease_seconds)
+            if rows:
+                self.leases[lease.lease_id] = lease
+                for row in rows:
+                    self.leased_rows[row] = lease.lease_id
+
+            return {
+                "lease_id": lease.lease_id,
+                "expires_at": lease.expires_at,
+                "rows": self.store.read_rows(rows),
+            }
+
+    def _get_lease(self, client, lease_id):
+        lease = self.leases.get(lease_id)
+        if lease is None:
+            raise LeaseError(f"Unknown or expired lease: {lease_id}")
+        if lease.client != client:
+            raise LeaseError(f"Lease {lease_id} belongs to another client")
+        return lease
+
+    def submit(self, client, lease_id, changes, release=False):
+        """
+        Applies a batch of {"op", "row", "value"} changes in one
+        transaction. Changes to rows the client does not hold are
+        rejected. The lease is renewed, or returned to the pool when
+        release is set. An expired lease of the client is taken out
+        again for its rows that no other lease holds and nobody changed
+        since it expired, so late changes are not lost.
+        """
+        if not isinstance(changes, list):
+            raise ValueError("changes must be a list")
+        for change in changes:
+            if not isinstance(change, dict):
+                raise ValueError(f"Invalid change: {change!r}")
+            if change.get("op") not in AnnotationJournal.OPS or not isinstance(change.get("row"), int):
+                raise ValueError(f"Invalid change: {change}")
+
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+            lease = self.leases.get(lease_id)
+            if lease is not None and lease.client != client:
+                raise LeaseError(f"Lease {lease_id} belongs to another client")
+            relet = 0
+            expired = self.expired.get(client, {}).pop(lease_id, None)
+            if lease is None and expired is not None:
+                # Only the owner wrote to the rows before the lease expired
+                rows = expired.rows - set(self.leased_rows)
+                rows -= self.store.changed_since(rows, expired.expires_at)
+                if rows:
+                    lease = Lease(lease_id, client, rows, now + self.lease_seconds)
+                    self.leases[lease_id] = lease
+                    for row in rows:
+                        self.leased_rows[row] = lease_id
+                    relet = len(rows)
+
+            accepted = []
+            rejected = 0
+            for change in changes:
+                op, row = change["op"], change["row"]
+                if lease is None or row not in lease.rows:
+                    rejected += 1
+                    continue
+                accepted.append((op, row, change.get("value")))
+
+            self.store.apply_many(accepted)
+            self.rejected += rejected
+
+            if lease is not None:
+                # Rows stay leased until release, so the client can still
+                # revisit them; annotated rows are never leased again
+                if release:
+                    self._drop(lease)
+                else:
+                    lease.expires_at = now + self.lease_seconds
+
+            return {"applied": len(accepted), "rejected": rejected, "relet": relet}
+
+    def release(self, client, lease_id):
+        """
+        Returns the rows of a lease to the pool.
+        """
+        with self.lock:
+            self._drop(self._get_lease(client, lease_id))
+            return {"released": lease_id}
+
+    def stats(self):
+        with self.lock:
+            self._expire(time.time())
+            labels, skipped, noted = self.store.counts()
+            return {
+                "total": len(self.store),
+                "annotated": sum(labels.values()),
+                "class_counts": labels,
+                "skipped": skipped,
+                "noted": noted,
+                "active_leases": len(self.leases),
+                "leased_rows": len(self.leased_rows),
+                "rejected": self.rejected,
+            }
+
+
+class AnnotationRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON front end of the LeaseManager.
+    """
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.server.manager.stats())
+        else:
+            self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        manager = self.server.manager
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("The request body must be a JSON object")
+            client = str(request.get("client", "anonymous"))
+
+            if self.path == "/lease":
+                self._reply(200, manager.lease(client, int(request.get("size", 50))))
+            elif self.path == "/submit":
+                self._reply(200, manager.submit(
+                    client,
+                    request.get("lease_id"),
+                    request.get("changes", []),
+                    bool(request.get("release", False))
+                ))
+            elif self.path == "/release":
+                self._reply(200, manager.release(client, request.get("lease_id")))
+            else:
+                self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+        except LeaseError as e:
+            self._reply(409, {"error": str(e)})
+        except (ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(project_path, host="127.0.0.1", port=8765, lease_seconds=900, quiet=False):
+    """
+    Creates (but does not start) a server for a project file.
+    """
+    store = ProjectStore(project_path, check_same_thread=False)
+    server = ThreadingHTTPServer((host, port), AnnotationRequestHandler)
+    server.daemon_threads = True
+    server.manager = LeaseManager(store, lease_seconds)
+    server.quiet = quiet
+    return server
+
+
+class AnnotationClient:
+    """
+    Minimal client for the annotation server.
+    """
+
+    def __init__(self, base_url, client_id, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.timeout = timeout
+
+    def _call(self, path, payload=None):
+        data = None
+        if payload is not None:
+            data = json.dumps(dict(payload, client=self.client_id)).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            message = json.loads(e.read() or b"{}").get("error", e.reason)
+            if e.code == 409:
+                raise LeaseError(message) from None
+            raise RuntimeError(f"Server error {e.code}: {message}") from None
+
+    def lease(self, size=50):
+        return self._call("/lease", {"size": size})
+
+    def submit(self, lease_id, changes, release=False):
+        return self._call("/submit", {"lease_id": lease_id, "changes": changes, "release": release})
+
+    def release(self, lease_id):
+        return self._call("/release", {"lease_id": lease_id})
+
+    def stats(self):
+        return self._call("/stats")
+
+
+class RemoteBatch:
+    """
+    One leased batch as seen by the annotation app.
+
+    Rows are addressed by their position in the batch; changes are
+    queued and sent to the server once submit_every have accumulated.
+    """
+
+    def __init__(self, client, lease, annotation_column, note_column, skip_column, submit_every=10):
+        self.client = client
+        self.lease_id = lease["lease_id"]
+        self.expires_at = lease["expires_at"]
+        self.records = lease["rows"]
+        self.submit_every = submit_every
+        self.pending = []  # Changes not yet sent
+
+        self.df = pd.DataFrame({
+            annotation_column: [record["label"] for record in self.records],
+            note_column: [record["note"] for record in self.records],
+            skip_column: [int(record["skip"] or 0) for record in self.records],
+        }, dtype=object)
+        for column in (annotation_column, note_column):
+            self.df[column] = self.df[column].where(self.df[column].notna(), pd.NA)
+        self.df[skip_column] = self.df[skip_column].astype(int)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_fields(self, position):
+        return self.records[position]["fields"]
+
+    def server_row(self, position):
+        return self.records[position]["row"]
+
+    def apply(self, changes):
+        """
+        Queues (op, position, value) changes, all of them before anything
+        is sent, and submits the queue once it is full. Returns the
+        server's result if it was submitted, otherwise None.
+        """
+        for op, position, value in changes:
+            self.pending.append({"op": op, "row": self.server_row(position), "value": value})
+        if len(self.pending) >= self.submit_every:
+            return self.flush()
+        return None
+
+    def flush(self, release=False):
+        """
+        Sends the queued changes. They stay queued if the request fails.
+        """
+        if not self.pending and not release:
+            return None
+        result = self.client.submit(self.lease_id, self.pending, release=release)
+        self.pending = []
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", help="project file (.annproj) or CSV to import")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--lease-seconds", type=int, default=900, help="time before an idle lease expires")
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args()
+
+    project_path = args.dataset
+    if not project_path.endswith(ProjectStore.SUFFIX):
+        project_path = os.path.splitext(args.dataset)[0] + ProjectStore.SUFFIX
+        if not os.path.exists(project_path):
+            print(f"Importing {args.dataset} into {project_path}…")
+            ProjectStore.import_csv(args.dataset, project_path, "phishing_type", "note", "skip_flag").close()
+
+    server = make_server(project_path, args.host, args.port, args.lease_seconds, args.quiet)
+    print(f"✓ Serving {project_path} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.manager.store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the legacy load_csv read path with the fast ingest path.
+
+    python benchmarks/bench_load.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_ingest import read_csv_fast  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+
+def legacy_read(path):
+    """
+    The read path load_csv used before the fast ingest path.
+    """
+    try:
+        return pd.read_csv(path, keep_default_na=False, na_values=[''], engine='python')
+    except UnicodeDecodeError:
+        return pd.read_csv(path, keep_default_na=False, na_values=[''], engine='python', encoding='latin1')
+
+
+def fast_read(path):
+    df, _ = read_csv_fast(path, keep_default_na=False, na_values=[''])
+    return df
+
+
+def timed(func, path, repeat):
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(func(path))
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the synthetic corpus")
+    parser.add_argument("--mean-words", type=int, default=120, help="mean email body length in words")
+    parser.add_argument("--latin1-rows", type=int, default=10, help="trailing rows written as latin1")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per reader (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.csv")
+        generate_corpus(path, args.rows, mean_words=args.mean_words, latin1_rows=args.latin1_rows)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"Corpus: {args.rows} rows, {size_mb:.1f} MB, {args.latin1_rows} latin1 rows")
+
+        legacy_time, legacy_rows = timed(legacy_read, path, args.repeat)
+        fast_time, fast_rows = timed(fast_read, path, args.repeat)
+
+    print(f"legacy (python engine): {legacy_time:8.2f} s  {legacy_rows} rows")
+    print(f"fast   (C engine):      {fast_time:8.2f} s  {fast_rows} rows")
+    print(f"speedup: {legacy_time / fast_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures near-duplicate clustering: time, peak memory and how many of
+the planted campaign copies end up clustered. Times include streaming
+the bodies from the CSV.
+
+    python benchmarks/bench_near_duplicates.py --rows 200000 --duplicate-rate 0.3 --memory
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_ingest import iter_csv_chunks  # noqa: E402
+from near_duplicates import NearDuplicateClusters  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the synthetic corpus")
+    parser.add_argument("--mean-words", type=int, default=120, help="mean email body length in words")
+    parser.add_argument("--duplicate-rate", type=float, default=0.3, help="share of rows copied from campaigns")
+    parser.add_argument("--campaigns", type=int, default=200, help="number of campaign templates")
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="rows hashed per chunk")
+    parser.add_argument("--memory", action="store_true",
+                        help="also measure peak traced memory in a second (much slower) run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.csv")
+        generate_corpus(path, args.rows, mean_words=args.mean_words,
+                        duplicate_rate=args.duplicate_rate, campaigns=args.campaigns)
+        print(f"Corpus: {args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB, "
+              f"~{args.duplicate_rate:.0%} campaign copies from {args.campaigns} templates")
+
+        def chunks():
+            # Bodies are streamed from the CSV, as a worker would read them
+            for chunk in iter_csv_chunks(path, chunk_rows=args.chunk_rows, usecols=["text_cleaned"],
+                                         keep_default_na=False, na_values=['']):
+                if len(chunk):
+                    yield int(chunk.index[0]), chunk["text_cleaned"].tolist()
+
+        clusters = NearDuplicateClusters(path, lambda: None)
+        clusters.total_rows = args.rows
+        start = time.perf_counter()
+        labels = clusters.cluster(chunks())
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if args.memory:
+            tracemalloc.start()
+            clusters.cluster(chunks())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    sizes = np.bincount(labels)
+    clustered = int((sizes[labels] > 1).sum())
+    print(f"clustered {args.rows} rows in {elapsed:.2f} s ({args.rows / elapsed:,.0f} rows/s)")
+    if peak is not None:
+        print(f"peak traced memory: {peak / 1e6:.1f} MB")
+    print(f"{int((sizes > 1).sum())} clusters of 2+ rows, {clustered} rows in them; "
+          f"largest {int(sizes.max())}")
+    print(pd.Series(sizes[sizes > 1]).describe().to_string())
+
+
+if __name__ == "__main__":
+    main()
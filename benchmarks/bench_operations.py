@@ -0,0 +1,229 @@
+"""
+Times the annotation tool's operations as the dataset grows, with the
+peak memory of each run, and flags regressions against a baseline.
+
+    python benchmarks/bench_operations.py --sizes 1000 100000 1000000 -o results.json
+    python benchmarks/bench_operations.py --sizes 100000 --compare results.json
+    xvfb-run python benchmarks/bench_operations.py --sizes 100000 --gui
+
+Every size runs in a fresh process on a synthetic corpus (cached in
+--corpus-dir), so peak memory is per size. By default the operations run
+headless on the data model (annotation_core), the way the GUI calls it:
+
+    load_csv          open the CSV (sidecars removed first: a cold load)
+    update_display    format a row for display, as the GUI does
+    annotate_and_next label a row and journal the change
+    skip_email        skip a row and journal the change
+    update_stats      read the annotation counts
+    auto_save         write every change back into the CSV
+
+--gui drives the real window instead (needs a display, e.g. xvfb-run),
+including Tk rendering. --compare exits with status 1 when an operation
+got slower than --threshold times its baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+OPERATIONS = ["load_csv", "update_display", "annotate_and_next", "skip_email", "update_stats", "auto_save"]
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def remove_sidecars(csv_path):
+    directory, name = os.path.split(os.path.abspath(csv_path))
+    for other in os.listdir(directory):
+        if other.startswith(name + "."):
+            os.remove(os.path.join(directory, other))
+
+
+def timed_calls(func, arguments):
+    """
+    Calls func once per argument. Returns the times in ms.
+    """
+    times = []
+    for argument in arguments:
+        start = time.perf_counter()
+        func(argument)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def run_core(csv_path, actions):
+    """
+    Runs the operations on AnnotationDataset. Returns {operation: [ms, ...]}.
+    """
+    import annotation_app
+    from annotation_core import AnnotationDataset
+
+    dataset = AnnotationDataset()
+    times = {}
+
+    start = time.perf_counter()
+    dataset.open(csv_path)
+    times["load_csv"] = [(time.perf_counter() - start) * 1000]
+
+    rows = list(range(min(actions, dataset.total_rows)))
+    # The GUI's formatting code, on a stand-in for the window
+    view = types.SimpleNamespace(
+        df=dataset.df, notes=dataset.notes, project=None, remote=None, body_store=dataset.body_store,
+        annotation_column=dataset.annotation_column, note_column=dataset.note_column,
+        metadata_columns=[("sender", "Sender"), ("receiver", "Receiver"), ("subject", "Subject"),
+                          ("source_dataset", "Source")],
+    )
+    times["update_display"] = timed_calls(
+        lambda row: annotation_app.CsvAnnotationApp.build_display_payload(view, row), rows
+    )
+    times["annotate_and_next"] = timed_calls(lambda row: dataset.record(dataset.annotate(row, "2")), rows)
+    times["skip_email"] = timed_calls(lambda row: dataset.record(dataset.skip(row)), rows[::-1])
+    times["update_stats"] = timed_calls(lambda row: dataset.stats(), rows)
+    times["auto_save"] = timed_calls(lambda _: dataset.save(), [None])
+    dataset.close()
+    return times
+
+
+def run_gui(csv_path, actions):
+    """
+    Runs the operations on the real window. Returns {operation: [ms, ...]}.
+    """
+    import tkinter as tk
+
+    import annotation_app
+
+    for name in ("showinfo", "showwarning", "showerror"):
+        setattr(annotation_app.messagebox, name, lambda *args, **kwargs: None)
+    root = tk.Tk()
+    app = annotation_app.CsvAnnotationApp(root)
+    root.update()
+
+    def settled(func):
+        # Includes Tk's redraw of the result
+        def call(argument):
+            func(argument)
+            root.update()
+        return call
+
+    def show(row):
+        app.current_index = row
+        app.update_display()
+
+    times = {"load_csv": timed_calls(settled(lambda path: app.open_file(path, quiet=True)), [csv_path])}
+    rows = list(range(min(actions, app.total_rows)))
+    times["update_display"] = timed_calls(settled(show), rows)
+    app.current_index = 0
+    times["annotate_and_next"] = timed_calls(settled(lambda _: app.annotate_and_next("2")), rows)
+    times["skip_email"] = timed_calls(settled(lambda _: app.skip_email()), rows)
+    times["update_stats"] = timed_calls(settled(lambda _: app.update_stats()), rows)
+    times["auto_save"] = timed_calls(settled(lambda _: (app.auto_save(), app.saver.wait())), [None])
+    app.close_file()
+    root.destroy()
+    return times
+
+
+def run_child(args):
+    remove_sidecars(args.run)
+    times = (run_gui if args.gui else run_core)(args.run, args.actions)
+    summary = {
+        name: {"calls": len(values), "median_ms": statistics.median(values), "max_ms": max(values)}
+        for name, values in times.items()
+    }
+    print(json.dumps({"operations": summary, "peak_memory_mb": peak_memory_mb()}))
+
+
+def corpus_path(directory, rows, args):
+    from synthetic_corpus import generate_corpus
+
+    path = os.path.join(directory, f"corpus-{rows}-{args.lengths}-{args.mean_words}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {rows:,} rows…", flush=True)
+        generate_corpus(path + ".tmp", rows, mean_words=args.mean_words, length_distribution=args.lengths,
+                        label_rate=args.label_rate, skip_rate=args.skip_rate)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the operations slower than threshold x baseline. Returns their number.
+    """
+    regressions = 0
+    for size, result in results.items():
+        for name, entry in result["operations"].items():
+            before = baseline.get(size, {}).get("operations", {}).get(name)
+            if before and entry["median_ms"] > threshold * max(before["median_ms"], 0.01):
+                print(f"✗ {name} at {int(size):,} rows: {entry['median_ms']:.2f} ms, "
+                      f"was {before['median_ms']:.2f} ms")
+                regressions += 1
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="corpus sizes in rows")
+    parser.add_argument("--actions", type=int, default=200, help="calls per per-row operation")
+    parser.add_argument("--mean-words", type=int, default=120, help="mean email body length in words")
+    parser.add_argument("--lengths", default="lognormal", help="body length distribution (see synthetic_corpus.py)")
+    parser.add_argument("--label-rate", type=float, default=0.3, help="share of rows already labelled")
+    parser.add_argument("--skip-rate", type=float, default=0.02, help="share of rows already skipped")
+    parser.add_argument("--corpus-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora"))
+    parser.add_argument("--gui", action="store_true", help="drive the real window (needs a display)")
+    parser.add_argument("-o", "--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown counted as a regression")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_child(args)
+        return 0
+
+    os.makedirs(args.corpus_dir, exist_ok=True)
+    results = {}
+    for rows in args.sizes:
+        path = corpus_path(args.corpus_dir, rows, args)
+        command = [sys.executable, os.path.abspath(__file__), "--run", path, "--actions", str(args.actions)]
+        if args.gui:
+            command.append("--gui")
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results[str(rows)] = result
+
+        memory = result["peak_memory_mb"]
+        print(f"\n{rows:,} rows" + (f", peak memory {memory:,.0f} MB" if memory is not None else ""))
+        for name in OPERATIONS:
+            entry = result["operations"][name]
+            print(f"  {name:<18} median {entry['median_ms']:10.2f} ms   max {entry['max_ms']:10.2f} ms"
+                  f"   ({entry['calls']} call(s))")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if compare(results, baseline, args.threshold):
+            return 1
+        print("✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Measures how long the annotation tool takes to show its first window,
+to be ready, and to show the first email of a CSV.
+
+    python benchmarks/bench_startup.py --rows 100000
+    python benchmarks/bench_startup.py --app dist/annotation_tool.app/Contents/MacOS/annotation_tool
+
+Each run launches the tool with --startup-trace, which exits once the
+first email is shown. --app benchmarks a packaged build instead of the
+source. Needs a display (use xvfb-run on a headless Linux machine).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+TOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annotation_tool.py")
+MARKS = [("first_window", "first window"), ("ready", "tool ready"), ("first_email", "first email")]
+
+
+def launch(command, csv_path, trace_path):
+    """
+    Runs the tool once. Returns seconds from launch to each mark.
+    """
+    start = time.time()
+    subprocess.run(command + ["--startup-trace", trace_path, csv_path], check=True, timeout=600)
+    with open(trace_path, "r", encoding="utf-8") as fh:
+        marks = json.load(fh)
+    return {name: when - start for name, when in marks.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="rows in the synthetic corpus")
+    parser.add_argument("--mean-words", type=int, default=120, help="mean email body length in words")
+    parser.add_argument("--repeat", type=int, default=5, help="launches (the median is reported)")
+    parser.add_argument("--app", help="packaged executable to launch instead of annotation_tool.py")
+    args = parser.parse_args()
+
+    command = [args.app] if args.app else [sys.executable, TOOL]
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "corpus.csv")
+        generate_corpus(csv_path, args.rows, mean_words=args.mean_words)
+        print(f"Corpus: {args.rows} rows, {os.path.getsize(csv_path) / 1e6:.1f} MB")
+
+        runs = []
+        for i in range(args.repeat):
+            # Every launch reads the CSV from scratch
+            for name in os.listdir(tmp):
+                if name != "corpus.csv":
+                    os.remove(os.path.join(tmp, name))
+            runs.append(launch(command, csv_path, os.path.join(tmp, "trace.json")))
+
+    for name, label in MARKS:
+        times = [run[name] for run in runs if name in run]
+        if times:
+            print(f"{label:<14} median {statistics.median(times):6.2f} s   best {min(times):6.2f} s")
+        else:
+            print(f"{label:<14} not reached")
+
+
+if __name__ == "__main__":
+    main()
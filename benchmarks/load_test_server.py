@@ -0,0 +1,131 @@
+"""
+Load test for the annotation server: N simulated annotators lease,
+label and submit rows concurrently until the dataset is done.
+
+    python benchmarks/load_test_server.py --clients 8 --rows 20000
+
+Without --url a server is started in-process on a synthetic project.
+At the end every row must be annotated exactly once and no change may
+have been rejected.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_server import AnnotationClient, make_server  # noqa: E402
+from project_store import ProjectStore  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def simulate_annotator(url, name, batch_size, submit_every, think_time, latencies, counts, errors):
+    """
+    Leases batches until the server runs dry, labelling every row.
+    """
+    client = AnnotationClient(url, name, timeout=60)
+    rng = random.Random(name)
+    labelled = 0
+
+    def call(func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    try:
+        while True:
+            lease = call(client.lease, batch_size)
+            if not lease["rows"]:
+                break
+            changes = []
+            for record in lease["rows"]:
+                if think_time:
+                    time.sleep(think_time)
+                changes.append({"op": "annotate", "row": record["row"], "value": rng.choice("123")})
+                if len(changes) >= submit_every:
+                    call(client.submit, lease["lease_id"], changes)
+                    labelled += len(changes)
+                    changes = []
+            call(client.submit, lease["lease_id"], changes, release=True)
+            labelled += len(changes)
+    except Exception as e:
+        errors.append(f"{name}: {e}")
+    counts[name] = labelled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="existing server to test (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent simulated annotators")
+    parser.add_argument("--rows", type=int, default=10000, help="rows in the synthetic project")
+    parser.add_argument("--batch-size", type=int, default=50, help="rows per lease")
+    parser.add_argument("--submit-every", type=int, default=10, help="changes per submission")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="simulated time spent per email")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        url = args.url
+        if url is None:
+            csv_path = os.path.join(tmp, "corpus.csv")
+            generate_corpus(csv_path, args.rows, mean_words=60)
+            project_path = os.path.join(tmp, "corpus" + ProjectStore.SUFFIX)
+            ProjectStore.import_csv(csv_path, project_path, "phishing_type", "note", "skip_flag").close()
+            server = make_server(project_path, port=0, quiet=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        latencies = []
+        counts = {}
+        errors = []
+        threads = [
+            threading.Thread(target=simulate_annotator, args=(
+                url, f"annotator-{i}", args.batch_size, args.submit_every,
+                args.think_ms / 1000, latencies, counts, errors
+            ))
+            for i in range(args.clients)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stats = AnnotationClient(url, "load-test").stats()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            server.manager.store.close()
+
+    labelled = sum(counts.values())
+    print(f"{args.clients} clients labelled {labelled} rows in {elapsed:.2f} s ({labelled / elapsed:,.0f} rows/s)")
+    print(f"requests: {len(latencies)}  latency p50 {percentile(latencies, 50) * 1000:.1f} ms  "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms  p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"server: {stats['annotated']}/{stats['total']} annotated, {stats['rejected']} rejected, "
+          f"{stats['active_leases']} active leases")
+
+    ok = not errors and stats["rejected"] == 0 and labelled == stats["annotated"]
+    if args.url is None:
+        ok = ok and stats["annotated"] == stats["total"]
+    for error in errors:
+        print(f"✗ {error}")
+    print("✓ Every row annotated exactly once" if ok else "✗ Load test failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Writes synthetic phishing corpora for the benchmarks.
+
+    python benchmarks/synthetic_corpus.py corpus.csv --rows 1000000
+    python benchmarks/synthetic_corpus.py corpus.csv --rows 5000000 --lengths pareto --spread 1.5 \\
+        --label-rate 0.3 --skip-rate 0.02
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+WORDS = (
+    "please verify your account password immediately urgent wire transfer "
+    "invoice attached payment overdue click the link below to confirm your "
+    "identity we noticed unusual activity on your mailbox bank security team "
+    "regards meeting tomorrow report quarterly update thanks for your help "
+    "bitcoin wallet compromised pay within hours or your files will be shared"
+).split()
+
+SOURCES = ["nazario", "enron", "spamassassin", "nigerian_fraud", "ling", "internal"]
+DOMAINS = ["example.com", "mail.example.org", "secure-bank.co", "corp.local", "gmail.com"]
+
+
+LENGTH_DISTRIBUTIONS = ("lognormal", "uniform", "fixed", "pareto")
+
+
+def body_lengths(rng, count, mean_words, distribution="lognormal", spread=0.6):
+    """
+    Draws count body lengths in words with the given mean. spread is the
+    lognormal sigma, or the Pareto shape for the heavy-tailed "pareto"
+    (lower = heavier tail; must be above 1).
+    """
+    if distribution == "lognormal":
+        # Median at mean_words, as in earlier versions of this corpus
+        lengths = rng.lognormal(np.log(mean_words), spread, count)
+    elif distribution == "uniform":
+        lengths = rng.uniform(1, 2 * mean_words, count)
+    elif distribution == "fixed":
+        lengths = np.full(count, mean_words)
+    elif distribution == "pareto":
+        shape = max(spread, 1.01)
+        lengths = (rng.pareto(shape, count) + 1) * mean_words * (shape - 1) / shape
+    else:
+        raise ValueError(f"Unknown length distribution: {distribution}")
+    return np.maximum(lengths.astype(np.int64), 1)
+
+
+def join_words(rng, words, lengths):
+    """
+    Returns one body per length, made of random words.
+    """
+    picks = [words[i] for i in rng.integers(len(words), size=int(lengths.sum())).tolist()]
+    ends = np.cumsum(lengths).tolist()
+    return [" ".join(picks[start:end]) for start, end in zip([0] + ends[:-1], ends)]
+
+
+def generate_corpus(path, rows, mean_words=120, seed=0, chunk_rows=10000, latin1_rows=0,
+                    duplicate_rate=0.0, campaigns=100, length_distribution="lognormal", length_spread=0.6,
+                    label_rate=0.0, skip_rate=0.0, classes=("1", "2", "3")):
+    """
+    Writes a synthetic phishing corpus with the columns the annotation
+    tool expects. Body lengths follow length_distribution (see
+    body_lengths) around mean_words. The last latin1_rows rows are
+    written latin1-encoded, as found in mixed-encoding email dumps. A
+    duplicate_rate share of the bodies are copies of one of `campaigns`
+    templates with two words changed, like the near-identical emails of
+    a phishing campaign. With label_rate or skip_rate, that share of the
+    rows is already labelled (uniformly over classes) or skipped, as in
+    a file annotation has started on. The same arguments always write
+    the same file.
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    templates = [
+        rng.choice(words, max(int(rng.lognormal(np.log(mean_words), 0.6)), 10))
+        for _ in range(campaigns if duplicate_rate else 0)
+    ]
+
+    with open(path, "wb") as fh:
+        for start in range(0, rows, chunk_rows):
+            count = min(chunk_rows, rows - start)
+            lengths = body_lengths(rng, count, mean_words, length_distribution, length_spread)
+            bodies = join_words(rng, WORDS, lengths)
+            for i in np.flatnonzero(rng.random(count) < duplicate_rate):
+                body = templates[rng.integers(len(templates))].copy()
+                body[rng.integers(len(body), size=2)] = rng.choice(words, 2)
+                bodies[i] = " ".join(body)
+
+            chunk = pd.DataFrame({
+                "text_cleaned": bodies,
+                "sender": [f"user{i}@{DOMAINS[i % len(DOMAINS)]}" for i in rng.integers(0, 5000, count)],
+                "receiver": "annotator@example.com",
+                "subject": join_words(rng, WORDS, np.full(count, 6)),
+                "source_dataset": rng.choice(SOURCES, count),
+            })
+            if label_rate:
+                labels = rng.choice(np.array(classes, dtype=object), count)
+                chunk["phishing_type"] = np.where(rng.random(count) < label_rate, labels, None)
+            if skip_rate:
+                # Labelled rows are never skipped
+                skipped = rng.random(count) < skip_rate
+                if label_rate:
+                    skipped &= chunk["phishing_type"].isna().to_numpy()
+                chunk["skip_flag"] = skipped.astype(int)
+
+            data = chunk.to_csv(index=False, header=(start == 0))
+            if latin1_rows and start + count > rows - latin1_rows:
+                # Bodies are single-line, so one CSV line per row
+                lines = data.splitlines(keepends=True)
+                cut = max(rows - latin1_rows - start, 0) + (1 if start == 0 else 0)
+                head = "".join(lines[:cut]).encode("utf-8")
+                tail = "".join(lines[cut:]).replace("e", "é").encode("latin1")
+                fh.write(head + tail)
+            else:
+                fh.write(data.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV to write")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--mean-words", type=int, default=120, help="mean email body length in words")
+    parser.add_argument("--lengths", choices=LENGTH_DISTRIBUTIONS, default="lognormal",
+                        help="body length distribution (default: lognormal)")
+    parser.add_argument("--spread", type=float, default=0.6,
+                        help="lognormal sigma, or Pareto shape for --lengths pareto")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of rows copied from campaigns")
+    parser.add_argument("--label-rate", type=float, default=0.0, help="share of rows already labelled")
+    parser.add_argument("--skip-rate", type=float, default=0.0, help="share of rows already skipped")
+    parser.add_argument("--latin1-rows", type=int, default=0, help="trailing rows written as latin1")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_corpus(
+        args.path, args.rows, mean_words=args.mean_words, seed=args.seed, latin1_rows=args.latin1_rows,
+        duplicate_rate=args.duplicate_rate, length_distribution=args.lengths, length_spread=args.spread,
+        label_rate=args.label_rate, skip_rate=args.skip_rate
+    )
+    print(f"✓ Wrote {args.rows:,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
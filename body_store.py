@@ -0,0 +1,237 @@
+import json
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from save_worker import write_atomic
+
+
+class BodyStore:
+    """
+    Email bodies kept out of the DataFrame and read on demand.
+
+    On the first load of a large CSV the body column is streamed into a
+    sidecar file (<file>.csv.bodies) together with a byte-offset index
+    (<file>.csv.bodies.idx.npz). Bodies are then sliced from a memory map
+    of that file, one row at a time. The remaining small columns are
+    cached in <file>.csv.columns.csv so that reopening an unchanged CSV
+    never has to parse the bodies again.
+
+    <file>.csv.bodies.json records the size and mtime of the CSV the
+    sidecars belong to; the store is rebuilt when the CSV changes behind
+    the tool's back.
+    """
+
+    def __init__(self, csv_path, column="text_cleaned"):
+        self.csv_path = csv_path
+        self.column = column
+        self.columns = []  # Full column order of the CSV, body column included
+        self.data_path = csv_path + ".bodies"
+        self.index_path = csv_path + ".bodies.idx.npz"
+        self.meta_path = csv_path + ".bodies.json"
+        self.columns_path = csv_path + ".columns.csv"
+
+        self.offsets = None  # int64, len(rows) + 1
+        self.missing = None  # bool, True where the body was empty/NA
+        self._fh = None
+        self._mm = None
+
+        # Build state
+        self._build_fh = None
+        self._build_offsets = None
+        self._build_missing = None
+        self._build_size = 0
+
+    # --- Opening an existing store ---
+
+    @classmethod
+    def open(cls, csv_path):
+        """
+        Returns the store for csv_path, or None if there is no store or
+        it does not match the CSV on disk.
+        """
+        store = cls(csv_path)
+        try:
+            with open(store.meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("csv_signature") != store._csv_signature():
+                return None
+            if not os.path.exists(store.columns_path):
+                return None
+
+            store.column = meta["column"]
+            store.columns = meta["columns"]
+            with np.load(store.index_path) as index:
+                store.offsets = index["offsets"]
+                store.missing = index["missing"]
+            if len(store.offsets) != meta["rows"] + 1:
+                return None
+
+            store._map()
+            return store
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def read_columns(self, **read_kwargs):
+        """
+        Reads the cached small columns of the CSV.
+        """
+        from csv_ingest import read_csv_fast
+
+        df, _ = read_csv_fast(self.columns_path, **read_kwargs)
+        return df
+
+    # --- Building a store during the first load ---
+
+    def begin_build(self):
+        """
+        Starts (or restarts) streaming bodies into the sidecar file.
+        """
+        self.close()
+        self._build_fh = open(self.data_path, "wb")
+        self._build_offsets = [np.zeros(1, dtype=np.int64)]
+        self._build_missing = []
+        self._build_size = 0
+
+    def split_chunk(self, chunk):
+        """
+        read_csv_fast() transform: appends the chunk's bodies to the
+        sidecar file and returns the chunk without the body column.
+        """
+        if self.column not in chunk.columns:
+            return chunk
+
+        # Chunks carry their absolute row numbers; row 0 means a (re)start
+        if self._build_fh is None or (len(chunk) and chunk.index[0] == 0):
+            self.begin_build()
+            self.columns = list(chunk.columns)
+
+        bodies = chunk[self.column]
+        missing = bodies.isna().to_numpy()
+        encoded = [
+            b"" if is_missing else str(body).encode("utf-8")
+            for body, is_missing in zip(bodies.tolist(), missing)
+        ]
+
+        lengths = np.fromiter((len(body) for body in encoded), dtype=np.int64, count=len(encoded))
+        self._build_offsets.append(self._build_size + np.cumsum(lengths))
+        self._build_missing.append(missing)
+        self._build_fh.write(b"".join(encoded))
+        self._build_size += int(lengths.sum())
+
+        return chunk.drop(columns=[self.column])
+
+    def finish_build(self, small_df):
+        """
+        Persists the offset index and the small-column cache and maps
+        the bodies for reading. small_df is the loaded frame without the
+        body column, before any journal replay.
+        """
+        self._build_fh.flush()
+        os.fsync(self._build_fh.fileno())
+        self._build_fh.close()
+        self._build_fh = None
+
+        self.offsets = np.concatenate(self._build_offsets)
+        self.missing = (
+            np.concatenate(self._build_missing) if self._build_missing else np.zeros(0, dtype=bool)
+        )
+        self._build_offsets = self._build_missing = None
+
+        with open(self.index_path, "wb") as fh:
+            np.savez(fh, offsets=self.offsets, missing=self.missing)
+
+        self.write_columns_cache(small_df)
+        self.record_csv_signature()
+        self._map()
+
+    @property
+    def building(self):
+        return self._build_fh is not None
+
+    def abort_build(self):
+        """
+        Discards a partially built store.
+        """
+        if self._build_fh is not None:
+            self._build_fh.close()
+            self._build_fh = None
+        for path in (self.data_path, self.index_path, self.meta_path, self.columns_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # --- Reading ---
+
+    def __len__(self):
+        return 0 if self.offsets is None else len(self.offsets) - 1
+
+    def get(self, index):
+        """
+        Returns the body of row index, or None if it was empty.
+        """
+        if self.missing[index]:
+            return None
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if self._mm is None or start == end:
+            return ""
+        return self._mm[start:end].decode("utf-8")
+
+    def _map(self):
+        self._fh = open(self.data_path, "rb")
+        if os.path.getsize(self.data_path) > 0:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # --- Writing the CSV back ---
+
+    def write_csv(self, small_df, fh, chunk_rows=20000, rows=None):
+        """
+        Writes the full CSV (bodies re-inserted at their original column
+        position) to an open text file, chunk by chunk. rows gives the
+        store position of each row of small_df when it is a subset.
+        """
+        position = self.columns.index(self.column)
+        if rows is None:
+            rows = range(len(small_df))
+        for start in range(0, len(small_df), chunk_rows):
+            chunk = small_df.iloc[start:start + chunk_rows].copy()
+            bodies = [self.get(i) for i in rows[start:start + len(chunk)]]
+            chunk.insert(position, self.column, pd.Series(bodies, index=chunk.index, dtype=object))
+            chunk.to_csv(fh, index=False, header=(start == 0))
+
+        if len(small_df) == 0:
+            pd.DataFrame(columns=self.columns).to_csv(fh, index=False)
+
+    def save(self, small_df, path):
+        """
+        Writes the full CSV and the small-column cache, then marks the
+        sidecars as matching the new CSV. Runs on the save worker.
+        """
+        write_atomic(path, lambda fh: self.write_csv(small_df, fh))
+        self.write_columns_cache(small_df)
+        self.record_csv_signature()
+
+    def write_columns_cache(self, small_df):
+        write_atomic(self.columns_path, lambda fh: small_df.to_csv(fh, index=False))
+
+    def record_csv_signature(self):
+        meta = {
+            "column": self.column,
+            "columns": self.columns,
+            "rows": len(self),
+            "csv_signature": self._csv_signature(),
+        }
+        write_atomic(self.meta_path, lambda fh: json.dump(meta, fh))
+
+    def _csv_signature(self):
+        stat = os.stat(self.csv_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -1,5 +1,15 @@
 #!/bin/bash
 # macOS Build Script for Phishing Annotation Tool
+#
+# Build profiles (BUILD_PROFILE=onedir|onefile, default onedir):
+#   onedir   The app bundle holds the unpacked runtime, so a launch only
+#            maps files that are already on disk. Starts fastest.
+#   onefile  Everything in one executable that unpacks the whole runtime
+#            to a temporary folder on every launch (several seconds).
+# Both leave out optional pandas dependencies the tool never uses
+# (plotting, Arrow, SciPy, IPython). Measure with:
+#   python3 benchmarks/bench_startup.py --app dist/PhishingAnnotationTool.app/Contents/MacOS/PhishingAnnotationTool
+BUILD_PROFILE=${BUILD_PROFILE:-onedir}
 
 echo "=========================================="
 echo "Phishing Annotation Tool - macOS Builder"
@@ -30,14 +40,22 @@ echo "Installing required packages..."
 pip3 install pandas pyinstaller
 
 echo ""
-echo "Building macOS application..."
+echo "Building macOS application ($BUILD_PROFILE)..."
 echo ""
 
 # Build the application
-pyinstaller --onefile \
+pyinstaller --$BUILD_PROFILE \
     --windowed \
     --name=PhishingAnnotationTool \
     --clean \
+    --noconfirm \
+    --add-data=indicators.json:. \
+    --exclude-module=matplotlib \
+    --exclude-module=scipy \
+    --exclude-module=pyarrow \
+    --exclude-module=IPython \
+    --exclude-module=numba \
+    --exclude-module=pytest \
     annotation_tool.py
 
 # Check if build succeeded
@@ -0,0 +1,134 @@
+import codecs
+import io
+import os
+
+import pandas as pd
+
+# Bytes read from the start of the file to guess its encoding
+SNIFF_BYTES = 1 << 20
+
+# Error handler that decodes the bytes of a non-UTF-8 row as latin1, so a
+# few stray bytes never force the whole file to be parsed a second time
+LATIN1_FALLBACK = "annotation-tool-latin1-fallback"
+
+
+def _latin1_fallback(error):
+    return error.object[error.start:error.end].decode("latin1"), error.end
+
+
+codecs.register_error(LATIN1_FALLBACK, _latin1_fallback)
+
+
+def sniff_encoding(path, sample_size=SNIFF_BYTES):
+    """
+    Guesses the encoding of a file from a prefix of its bytes.
+    """
+    with open(path, "rb") as fh:
+        sample = fh.read(sample_size)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    try:
+        # Incremental decode, so a multi-byte character cut off by the
+        # sample boundary does not count as invalid
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+class _CountingReader(io.RawIOBase):
+    """
+    Raw file wrapper that counts the bytes handed to the parser.
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.fh.readinto(buffer)
+        self.bytes_read += count
+        return count
+
+    def close(self):
+        self.fh.close()
+        super().close()
+
+
+def iter_csv_chunks(path, progress=None, chunk_rows=50000, encoding=None, **read_kwargs):
+    """
+    Yields a CSV file as DataFrame chunks of up to chunk_rows rows.
+
+    Chunks keep their absolute row numbers as index. If the C parser
+    rejects the file part way through, parsing restarts from the top
+    with the python engine, so a chunk starting at row 0 tells the
+    consumer to discard what it received so far. A header-only file
+    yields one empty chunk with the columns.
+    """
+    if encoding is None:
+        encoding = sniff_encoding(path)
+    errors = LATIN1_FALLBACK if encoding in ("utf-8", "utf-8-sig") else "strict"
+    total_bytes = max(os.path.getsize(path), 1)
+
+    yielded = False
+    try:
+        raw = _CountingReader(open(path, "rb"))
+        with io.TextIOWrapper(io.BufferedReader(raw, 1 << 20), encoding=encoding, errors=errors, newline="") as fh:
+            for chunk in pd.read_csv(fh, engine="c", chunksize=chunk_rows, **read_kwargs):
+                yielded = True
+                yield chunk
+                if progress is not None:
+                    progress(min(raw.bytes_read / total_bytes, 1.0))
+
+        if not yielded:
+            # Header only: let pandas build the empty frame with its columns
+            yield pd.read_csv(path, engine="c", encoding=encoding, **read_kwargs)
+
+    except pd.errors.ParserError:
+        # Malformed quoting the C tokenizer cannot handle
+        yield from pd.read_csv(
+            path,
+            engine="python",
+            encoding=encoding,
+            encoding_errors=errors,
+            chunksize=chunk_rows,
+            **read_kwargs
+        )
+
+    if progress is not None:
+        progress(1.0)
+
+
+def read_csv_fast(path, progress=None, chunk_rows=50000, transform=None, **read_kwargs):
+    """
+    Reads a CSV file with pandas' C parser in a single pass.
+
+    The encoding is sniffed from the start of the file. Rows that turn
+    out not to be valid UTF-8 further down are decoded as latin1 on the
+    fly instead of re-reading the whole file. The file is parsed in
+    chunks of chunk_rows so progress(fraction) can be reported. Files
+    the C parser rejects fall back to the python engine.
+
+    If given, transform(chunk) is applied to every chunk before the
+    chunks are joined, e.g. to move large columns out of memory.
+
+    Returns a (DataFrame, encoding) tuple.
+    """
+    encoding = sniff_encoding(path)
+
+    chunks = []
+    for chunk in iter_csv_chunks(path, progress, chunk_rows, encoding, **read_kwargs):
+        if len(chunk) and chunk.index[0] == 0:
+            # First chunk, or the parser restarted with the python engine
+            chunks = []
+        chunks.append(transform(chunk) if transform is not None else chunk)
+
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    return df, encoding
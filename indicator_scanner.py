@@ -0,0 +1,189 @@
+import json
+import os
+import queue
+import re
+import sys
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+# Shipped next to the tool (or unpacked next to the executable by PyInstaller)
+DEFAULT_INDICATORS_PATH = os.path.join(
+    getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), "indicators.json"
+)
+MISMATCH = "mismatched_domain"
+TAG_OPTIONS = ("foreground", "background", "underline")
+
+
+def load_indicators(path=DEFAULT_INDICATORS_PATH):
+    """
+    Reads an indicator dictionary: {"indicators": {name: {"patterns":
+    [regex, ...], "phrases": [text, ...], "links": bool, "foreground",
+    "background", "underline"}}}. Returns the name -> entry mapping in
+    file order.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        indicators = json.load(fh)["indicators"]
+    for name, entry in indicators.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"Indicator '{name}' must be an object")
+    return indicators
+
+
+def registered_domain(host):
+    """
+    Returns the last two labels of a host name ("mail.paypal.com" ->
+    "paypal.com"), lower-cased.
+    """
+    labels = host.lower().rstrip(".").split(".")
+    return ".".join(labels[-2:])
+
+
+class IndicatorScanner:
+    """
+    Finds phishing indicators (links, urgency phrases, payment terms, ...)
+    in email texts for highlighting.
+
+    Every indicator of the dictionary becomes one alternative of a single
+    compiled regex, so a text is scanned in one pass. Links pointing to a
+    domain other than the sender's are reported as MISMATCH (if the
+    dictionary styles it). Rows are requested from the Tk thread and
+    scanned in batches on a background thread; the (start, end, name)
+    spans of the last cache_rows rows are kept, so a revisited row is
+    never scanned again.
+    """
+
+    def __init__(self, indicators, batch_rows=16, cache_rows=4096):
+        self.indicators = indicators
+        self.batch_rows = batch_rows
+        self.cache_rows = cache_rows
+
+        alternatives = []
+        self._names = []  # Indicator of each regex group
+        for name, entry in indicators.items():
+            parts = list(entry.get("patterns", ()))
+            phrases = sorted(entry.get("phrases", ()), key=len, reverse=True)
+            if phrases:
+                words = "|".join(r"\s+".join(map(re.escape, phrase.split())) for phrase in phrases)
+                parts.append(rf"\b(?:{words})\b")
+            if parts:
+                alternatives.append(f"(?P<i{len(self._names)}>" + "|".join(f"(?:{part})" for part in parts) + ")")
+                self._names.append(name)
+        self._regex = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        self._links = {name for name in self._names if indicators[name].get("links")}
+        self._check_domains = MISMATCH in indicators
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # row -> spans, LRU
+        self._pending = set()  # Rows requested but not scanned yet
+        self._done = []  # Rows scanned since the last take_done()
+        self._generation = 0  # Bumped by clear(); older scans are dropped
+        self._requests = queue.Queue()
+        self._thread = None
+        self._cancel = threading.Event()
+
+    def spans(self, text, sender=None):
+        """
+        Returns the (start, end, indicator) spans of text, in order.
+        """
+        if self._regex is None or not text:
+            return []
+        sender_domain = None
+        if self._check_domains and sender and "@" in sender:
+            sender_domain = registered_domain(sender.rsplit("@", 1)[1].strip(" >"))
+
+        spans = []
+        for match in self._regex.finditer(text):
+            name = self._names[int(match.lastgroup[1:])]
+            if sender_domain and name in self._links:
+                link = match.group()
+                host = urlsplit(link if "://" in link else "http://" + link).hostname
+                if host and registered_domain(host) != sender_domain:
+                    name = MISMATCH
+            spans.append((match.start(), match.end(), name))
+        return spans
+
+    # --- Cache and background scanning ---
+
+    def get(self, row):
+        """
+        Returns the cached spans of row, or None if it was not scanned.
+        """
+        with self._lock:
+            spans = self._cache.get(row)
+            if spans is not None:
+                self._cache.move_to_end(row)
+            return spans
+
+    def request(self, row, text, sender=None):
+        """
+        Queues row for scanning unless it is cached or already queued.
+        """
+        with self._lock:
+            if row in self._cache or row in self._pending:
+                return
+            self._pending.add(row)
+            generation = self._generation
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._requests.put((generation, row, text, sender))
+
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+    def take_done(self):
+        """
+        Returns the rows scanned since the last call.
+        """
+        with self._lock:
+            done, self._done = self._done, []
+        return done
+
+    def clear(self):
+        """
+        Forgets every cached and queued row, e.g. when another file is opened.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._pending.clear()
+            self._done = []
+            self._generation += 1
+        while True:
+            try:
+                self._requests.get_nowait()
+            except queue.Empty:
+                break
+
+    def close(self):
+        self._cancel.set()
+        self.clear()
+        self._requests.put(None)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._cancel.is_set():
+            request = self._requests.get()
+            batch = []
+            while request is not None:
+                batch.append(request)
+                if len(batch) >= self.batch_rows:
+                    break
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    request = None
+
+            results = [(generation, row, self.spans(text, sender)) for generation, row, text, sender in batch]
+            with self._lock:
+                for generation, row, spans in results:
+                    if generation != self._generation:
+                        continue  # Cleared while it was scanned
+                    self._pending.discard(row)
+                    self._cache[row] = spans
+                    self._done.append(row)
+                while len(self._cache) > self.cache_rows:
+                    self._cache.popitem(last=False)
@@ -0,0 +1,85 @@
+from collections import Counter
+
+import pandas as pd
+
+
+class ProgressModel:
+    """
+    Running annotation counts for the loaded dataset.
+
+    The counts are computed with one vectorized pass when a file is
+    loaded and then updated in O(1) on every annotate, re-annotate,
+    skip and note change, so no click has to rescan whole columns.
+    """
+
+    def __init__(self):
+        self.total_rows = 0
+        self.annotated = 0
+        self.class_counts = Counter()  # label -> number of rows
+        self.skipped = 0
+        self.noted = 0
+
+    def rebuild(self, df, annotation_column, skip_column, noted):
+        """
+        Recomputes every count from the DataFrame; noted is the number
+        of rows with a note.
+        """
+        labels = df[annotation_column].dropna()
+        self.set_counts(
+            len(df),
+            labels.value_counts().items(),
+            (df[skip_column] == 1).sum(),
+            noted
+        )
+
+    def set_counts(self, total_rows, class_counts, skipped, noted):
+        """
+        Sets every count at once, e.g. from indexed database queries.
+        class_counts is a mapping or (label, count) pairs.
+        """
+        if hasattr(class_counts, "items"):
+            class_counts = class_counts.items()
+        self.total_rows = int(total_rows)
+        self.class_counts = Counter({str(label): int(count) for label, count in class_counts})
+        self.annotated = sum(self.class_counts.values())
+        self.skipped = int(skipped)
+        self.noted = int(noted)
+
+    def label_changed(self, old, new):
+        """
+        Records that a row's label went from old to new (either may be NA).
+        """
+        if not pd.isna(old):
+            self.annotated -= 1
+            self.class_counts[str(old)] -= 1
+        if not pd.isna(new):
+            self.annotated += 1
+            self.class_counts[str(new)] += 1
+
+    def labels_changed(self, old_labels, new):
+        """
+        Records that every row of old_labels (a Series of previous
+        labels, NA for unlabeled) now has label new.
+        """
+        for label, count in old_labels.dropna().value_counts().items():
+            self.annotated -= int(count)
+            self.class_counts[str(label)] -= int(count)
+        if not pd.isna(new):
+            self.annotated += len(old_labels)
+            self.class_counts[str(new)] += len(old_labels)
+
+    def skip_changed(self, old, new):
+        """
+        Records that a row's skip flag went from old to new.
+        """
+        self.skipped += int(new == 1) - int(old == 1)
+
+    def note_changed(self, old, new):
+        """
+        Records that a row's note went from old to new (either may be NA).
+        """
+        self.noted += (not pd.isna(new)) - (not pd.isna(old))
+
+    @property
+    def percentage(self):
+        return (self.annotated / self.total_rows * 100) if self.total_rows > 0 else 0
@@ -0,0 +1,348 @@
+import json
+import sqlite3
+import time
+
+import pandas as pd
+
+from csv_ingest import iter_csv_chunks
+from save_worker import write_atomic
+
+
+class ProjectStore:
+    """
+    SQLite project file (<name>.annproj) used instead of the flat CSV.
+
+    The CSV is imported once: email columns go into the `emails` table,
+    labels, skip flags, notes and timestamps into `annotations`, one row
+    per email keyed by its 0-based position. Every change is a single-row
+    UPDATE in WAL mode, and resume position, skipped rows and counts are
+    answered from partial indexes instead of full scans. export_csv()
+    writes the original CSV layout back on demand.
+    """
+
+    SUFFIX = ".annproj"
+
+    def __init__(self, path, check_same_thread=True):
+        self.path = path
+        # check_same_thread=False lets a server share the connection
+        # between threads; callers then serialize access themselves
+        self.conn = self._connect(path, check_same_thread)
+        self.meta = {
+            key: json.loads(value)
+            for key, value in self.conn.execute("SELECT key, value FROM project")
+        }
+        self.columns = self.meta["columns"]  # Output column order of the CSV
+        self.email_columns = self.meta["email_columns"]  # CSV name of each emails.cN column
+        self.annotation_column = self.meta["annotation_column"]
+        self.note_column = self.meta["note_column"]
+        self.skip_column = self.meta["skip_column"]
+        self.total_rows = self.conn.execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
+
+    @staticmethod
+    def _connect(path, check_same_thread=True):
+        conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Import ---
+
+    @classmethod
+    def import_csv(cls, csv_path, path, annotation_column, note_column, skip_column,
+                   progress=None, chunk_rows=20000):
+        """
+        Creates a project file at path from a CSV and returns it opened.
+        """
+        conn = cls._connect(path)
+        try:
+            conn.executescript("""
+                DROP TABLE IF EXISTS project;
+                DROP TABLE IF EXISTS emails;
+                DROP TABLE IF EXISTS annotations;
+                CREATE TABLE project (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                CREATE TABLE annotations (
+                    row INTEGER PRIMARY KEY,
+                    label TEXT,
+                    skip_flag INTEGER NOT NULL DEFAULT 0,
+                    note TEXT,
+                    updated_at REAL
+                );
+            """)
+
+            own_columns = (annotation_column, note_column, skip_column)
+            columns = email_columns = None
+
+            for chunk in iter_csv_chunks(csv_path, progress, chunk_rows,
+                                         keep_default_na=False, na_values=['']):
+                if email_columns is None:
+                    columns = list(chunk.columns)
+                    email_columns = [c for c in columns if c not in own_columns]
+                    fields = ", ".join(f"c{i} TEXT" for i in range(len(email_columns)))
+                    conn.execute(f"CREATE TABLE emails (row INTEGER PRIMARY KEY, {fields})")
+                elif len(chunk) and chunk.index[0] == 0:
+                    # The parser restarted from the top
+                    conn.execute("DELETE FROM emails")
+                    conn.execute("DELETE FROM annotations")
+
+                cls._insert_chunk(conn, chunk, email_columns, own_columns)
+
+            # Columns the tool adds are appended, as load_csv does
+            for column in own_columns:
+                if column not in columns:
+                    columns.append(column)
+
+            conn.executescript("""
+                CREATE INDEX idx_annotations_label ON annotations(label);
+                CREATE INDEX idx_annotations_unlabeled ON annotations(row) WHERE label IS NULL;
+                CREATE INDEX idx_annotations_skipped ON annotations(row) WHERE skip_flag = 1;
+                CREATE INDEX idx_annotations_noted ON annotations(row) WHERE note IS NOT NULL;
+            """)
+            meta = {
+                "columns": columns,
+                "email_columns": email_columns,
+                "annotation_column": annotation_column,
+                "note_column": note_column,
+                "skip_column": skip_column,
+                "source_csv": csv_path,
+            }
+            conn.executemany(
+                "INSERT INTO project (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in meta.items()]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        return cls(path)
+
+    @staticmethod
+    def _insert_chunk(conn, chunk, email_columns, own_columns):
+        annotation_column, note_column, skip_column = own_columns
+        rows = chunk.index.tolist()
+
+        emails = chunk[email_columns].astype(object)
+        emails = emails.where(emails.notna(), None)
+        placeholders = ", ".join("?" * (len(email_columns) + 1))
+        conn.executemany(
+            f"INSERT INTO emails VALUES ({placeholders})",
+            ([row] + values for row, values in zip(rows, emails.values.tolist()))
+        )
+
+        # Same normalization as load_csv
+        def text_column(column):
+            if column not in chunk.columns:
+                return [None] * len(chunk)
+            values = chunk[column]
+            if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+                values = values.astype("Int64")  # "1", not "1.0"
+            values = values.astype(str).replace(['', 'nan', '<NA>'], pd.NA)
+            return values.astype(object).where(values.notna(), None).tolist()
+
+        if skip_column in chunk.columns:
+            skips = pd.to_numeric(chunk[skip_column], errors='coerce').fillna(0).astype(int).tolist()
+        else:
+            skips = [0] * len(chunk)
+
+        conn.executemany(
+            "INSERT INTO annotations (row, label, skip_flag, note) VALUES (?, ?, ?, ?)",
+            zip(rows, text_column(annotation_column), skips, text_column(note_column))
+        )
+
+    # --- Queries ---
+
+    def __len__(self):
+        return self.total_rows
+
+    def read_annotations(self):
+        """
+        Returns the label, note and skip columns as a DataFrame indexed by row.
+        """
+        df = pd.read_sql_query(
+            "SELECT label, note, skip_flag FROM annotations ORDER BY row", self.conn
+        )
+        df.columns = [self.annotation_column, self.note_column, self.skip_column]
+        for column in (self.annotation_column, self.note_column):
+            df[column] = df[column].astype(object).where(df[column].notna(), pd.NA)
+        return df
+
+    def get_fields(self, row):
+        """
+        Returns the email columns of one row as a {csv column: value} dict.
+        """
+        values = self.conn.execute("SELECT * FROM emails WHERE row = ?", (row,)).fetchone()
+        if values is None:
+            return {}
+        return dict(zip(self.email_columns, values[1:]))
+
+    def first_unannotated(self):
+        """
+        Returns the first row without a label, or None.
+        """
+        return self.conn.execute(
+            "SELECT MIN(row) FROM annotations WHERE label IS NULL"
+        ).fetchone()[0]
+
+    def skipped_rows(self):
+        return [row for (row,) in self.conn.execute(
+            "SELECT row FROM annotations WHERE skip_flag = 1 ORDER BY row"
+        )]
+
+    def counts(self):
+        """
+        Returns (label counts, skipped count, noted count).
+        """
+        labels = dict(self.conn.execute(
+            "SELECT label, COUNT(*) FROM annotations WHERE label IS NOT NULL GROUP BY label"
+        ))
+        skipped = self.conn.execute("SELECT COUNT(*) FROM annotations WHERE skip_flag = 1").fetchone()[0]
+        noted = self.conn.execute("SELECT COUNT(*) FROM annotations WHERE note IS NOT NULL").fetchone()[0]
+        return labels, skipped, noted
+
+    # --- Updates ---
+
+    # Journal operation -> column assignment
+    UPDATES = {
+        "annotate": "label = :value",
+        "skip": "skip_flag = 1",
+        "unskip": "skip_flag = 0",
+        "note": "note = :value",
+        "clear_note": "note = NULL",
+    }
+
+    def apply(self, op, row, value=None):
+        """
+        Applies one change (same operations as the CSV journal) as a
+        single-row UPDATE and commits it.
+        """
+        self.apply_many([(op, row, value)])
+
+    def apply_many(self, changes):
+        """
+        Applies (op, row, value) changes in a single transaction.
+        """
+        now = time.time()
+        with self.conn:
+            for op, row, value in changes:
+                self.conn.execute(
+                    f"UPDATE annotations SET {self.UPDATES[op]}, updated_at = :now WHERE row = :row",
+                    {"value": value, "now": now, "row": row}
+                )
+
+    def changed_since(self, rows, since):
+        """
+        Returns the rows among rows that were changed after time since.
+        """
+        changed = set()
+        rows = list(rows)
+        for start in range(0, len(rows), 500):
+            part = rows[start:start + 500]
+            changed.update(row for (row,) in self.conn.execute(
+                f"SELECT row FROM annotations WHERE updated_at > ? AND row IN ({', '.join('?' * len(part))})",
+                [since, *part]
+            ))
+        return changed
+
+    def unlabeled_rows(self, after=-1, limit=1000):
+        """
+        Returns up to limit rows after row `after` that have no label and
+        are not skipped, in order.
+        """
+        return [row for (row,) in self.conn.execute(
+            "SELECT row FROM annotations WHERE label IS NULL AND skip_flag = 0 AND row > ? "
+            "ORDER BY row LIMIT ?",
+            (after, limit)
+        )]
+
+    def read_rows(self, rows):
+        """
+        Returns the email columns and annotation state of the given rows.
+        """
+        records = []
+        for row in rows:
+            state = self.conn.execute(
+                "SELECT label, note, skip_flag FROM annotations WHERE row = ?", (row,)
+            ).fetchone()
+            if state is None:
+                continue
+            records.append({
+                "row": row,
+                "fields": self.get_fields(row),
+                "label": state[0],
+                "note": state[1],
+                "skip": state[2],
+            })
+        return records
+
+    def iter_columns(self, columns, chunk_rows=20000):
+        """
+        Yields (first row, {csv column: values}) chunks of those email
+        columns the project has. Uses its own connection, so it can run
+        on a worker thread.
+        """
+        present = [c for c in columns if c in self.email_columns]
+        fields = ", ".join(f"c{self.email_columns.index(c)}" for c in present)
+        conn = sqlite3.connect(self.path)
+        try:
+            last = -1
+            while True:
+                records = conn.execute(
+                    f"SELECT row{', ' + fields if fields else ''} FROM emails WHERE row > ? ORDER BY row LIMIT ?",
+                    (last, chunk_rows)
+                ).fetchall()
+                if not records:
+                    break
+                yield records[0][0], {
+                    column: [record[i + 1] for record in records] for i, column in enumerate(present)
+                }
+                last = records[-1][0]
+        finally:
+            conn.close()
+
+    def checkpoint(self):
+        """
+        Folds the WAL into the main database file.
+        """
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # --- Export ---
+
+    def export_csv(self, csv_path, progress=None, chunk_rows=20000, labels=None):
+        """
+        Writes the project back to a CSV with the original column layout;
+        with labels, only the rows labelled with one of them. Uses its own
+        connection, so it can run on the save worker. Returns the number
+        of rows written.
+        """
+        email_fields = ", ".join(f"e.c{i}" for i in range(len(self.email_columns)))
+        where, params = "", ()
+        if labels is not None:
+            where = f"WHERE a.label IN ({', '.join('?' * len(labels))}) "
+            params = tuple(str(label) for label in labels)
+        query = (
+            f"SELECT {email_fields}, a.label, a.note, a.skip_flag "
+            f"FROM emails e JOIN annotations a ON a.row = e.row {where}ORDER BY e.row"
+        )
+        names = self.email_columns + [self.annotation_column, self.note_column, self.skip_column]
+        written = 0
+
+        def write(fh):
+            nonlocal written
+            conn = sqlite3.connect(self.path)
+            try:
+                for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_rows):
+                    chunk.columns = names
+                    chunk[self.columns].to_csv(fh, index=False, header=(written == 0))
+                    written += len(chunk)
+                    if progress is not None:
+                        progress(written / max(self.total_rows, 1))
+                if written == 0:
+                    pd.DataFrame(columns=self.columns).to_csv(fh, index=False)
+            finally:
+                conn.close()
+
+        write_atomic(csv_path, write)
+        return written
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class DisplayPayload:
+    """
+    Everything update_display needs to show one row, pre-formatted.
+    """
+
+    __slots__ = ("text", "annotation", "note", "sender")
+
+    def __init__(self, text, annotation=None, note=None, sender=None):
+        self.text = text  # Metadata header plus email body
+        self.annotation = annotation  # Current label, or None
+        self.note = note  # Current note, or None
+        self.sender = sender  # Sender address, for the indicator scan
+
+
+class RenderCache:
+    """
+    Small LRU cache of DisplayPayloads keyed by row position.
+
+    build(row) creates the payload for a row on a miss. Rows whose label,
+    note or skip flag change must be invalidated.
+    """
+
+    def __init__(self, build, capacity=64):
+        self.build = build
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def __contains__(self, row):
+        return row in self._entries
+
+    def get(self, row):
+        """
+        Returns the payload for row, building it on a miss.
+        """
+        payload = self._entries.get(row)
+        if payload is not None:
+            self._entries.move_to_end(row)
+            return payload
+
+        payload = self.build(row)
+        self._entries[row] = payload
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return payload
+
+    def invalidate(self, row=None):
+        """
+        Drops the payload of one row, or of every row when row is None.
+        """
+        if row is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(row, None)
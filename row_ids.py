@@ -0,0 +1,191 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from save_worker import write_atomic, write_csv_atomic
+
+# Columns that identify an email when the CSV has one, in order of preference
+ID_COLUMNS = ("id", "message_id", "email_id", "uid")
+# Otherwise the ID is a hash of these columns (of all email columns if none exist)
+CONTENT_COLUMNS = ("sender", "receiver", "subject", "text_cleaned")
+
+
+def format_id(row_id):
+    return f"{int(row_id):016x}"
+
+
+def hashed_columns(columns, exclude=()):
+    """
+    Returns the columns row IDs are computed from, out of the CSV's
+    columns in file order: the first ID column, else the email content.
+    """
+    present = [column for column in ID_COLUMNS if column in columns]
+    if present:
+        return present[:1]
+    content = [column for column in columns if column in CONTENT_COLUMNS]
+    return content or [column for column in columns if column not in exclude]
+
+
+def hash_rows(frame):
+    """
+    Returns a uint64 hash per row of frame. Values are hashed as strings
+    (missing ones as ""), so a re-export that changes a column's dtype
+    keeps the hashes.
+    """
+    text = frame.astype(str).where(frame.notna(), "")
+    return pd.util.hash_pandas_object(text, index=False).to_numpy(dtype=np.uint64)
+
+
+def disambiguate(hashes):
+    """
+    Gives identical rows distinct IDs: the k-th repeat of a hash is mixed
+    with k, so duplicates keep their IDs as long as their order does.
+    """
+    repeat = pd.Series(hashes).groupby(hashes, sort=False).cumcount().to_numpy(dtype=np.uint64)
+    return np.where(repeat > 0, hashes ^ (repeat * np.uint64(0x9E3779B97F4A7C15)), hashes)
+
+
+class RowIds:
+    """
+    Stable 64-bit IDs for the rows of a CSV, independent of row order.
+
+    An ID is the hash of the CSV's ID column when it has one, otherwise
+    of the email's content, computed vectorized and persisted next to
+    the CSV as <file>.rowids.npy plus <file>.rowids.json (CSV signature
+    the IDs belong to, and their source). Every save also writes the
+    annotations by ID to <file>.ledger.csv. When the CSV is replaced by
+    a re-exported, re-sorted or extended version, the IDs are recomputed
+    and the ledger re-attaches the earlier annotations in one hash join;
+    rows with unknown IDs are the new ones.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.ids_path = csv_path + ".rowids.npy"
+        self.meta_path = csv_path + ".rowids.json"
+        self.ledger_path = csv_path + ".ledger.csv"
+        self.ids = None  # uint64 ID per row
+        self.source = None  # Column name, or "content:<columns>"
+        self._positions = None  # pd.Index over ids, built on first lookup
+
+    def signature(self):
+        stat = os.stat(self.csv_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    # --- Loading ---
+
+    def open(self, total_rows):
+        """
+        Reads the persisted IDs if they belong to the CSV as it is on disk
+        now. Returns False if they have to be computed.
+        """
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("signature") != self.signature() or meta.get("rows") != total_rows:
+                return False
+            ids = np.load(self.ids_path)
+            if len(ids) != total_rows:
+                return False
+        except (OSError, ValueError, KeyError):
+            return False
+        self.ids, self.source = ids, meta.get("source")
+        self._positions = None
+        return True
+
+    def read_previous(self):
+        """
+        Returns the IDs persisted for an earlier version of the CSV, or None.
+        """
+        try:
+            return np.load(self.ids_path)
+        except (OSError, ValueError):
+            return None
+
+    def compute(self, df, body_store=None, exclude=(), chunk_rows=50000):
+        """
+        Computes the IDs of every row. Bodies kept in a body store are
+        hashed chunk by chunk, in their original column position, so the
+        IDs do not depend on whether the bodies were in memory.
+        """
+        order = body_store.columns if body_store is not None else list(df.columns)
+        columns = hashed_columns(order, exclude)
+        self.source = columns[0] if columns[0] in ID_COLUMNS else "content:" + ",".join(columns)
+
+        with_bodies = body_store is not None and body_store.column in columns
+        if not with_bodies:
+            hashes = hash_rows(df[columns])
+        else:
+            parts = []
+            for start in range(0, len(df), chunk_rows):
+                frame = df.iloc[start:start + chunk_rows][[c for c in columns if c != body_store.column]].copy()
+                frame[body_store.column] = [body_store.get(i) for i in range(start, start + len(frame))]
+                parts.append(hash_rows(frame[columns]))
+            hashes = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+
+        self.ids = disambiguate(hashes)
+        self._positions = None
+
+    def save_ids(self):
+        """
+        Persists the IDs for the CSV as it is on disk now.
+        """
+        with open(self.ids_path, "wb") as fh:
+            np.save(fh, self.ids)
+        self.record_signature()
+
+    def record_signature(self):
+        meta = {"rows": len(self.ids), "source": self.source, "signature": self.signature()}
+        write_atomic(self.meta_path, lambda fh: json.dump(meta, fh))
+
+    # --- Lookups ---
+
+    def position(self, row_id):
+        """
+        Returns the row with the given ID, or -1.
+        """
+        if self._positions is None:
+            self._positions = pd.Index(self.ids)
+        positions = self._positions.get_indexer([np.uint64(row_id)])
+        return int(positions[0])
+
+    # --- Ledger of annotations by ID ---
+
+    def read_ledger(self):
+        """
+        Returns the annotations saved under IDs as a DataFrame with
+        id (uint64), label, note and skip columns, or None.
+        """
+        try:
+            ledger = pd.read_csv(self.ledger_path, dtype=str, keep_default_na=False, na_values=[''])
+            ledger["id"] = [int(value, 16) for value in ledger["id"]]
+            ledger["id"] = ledger["id"].astype(np.uint64)
+            ledger["skip"] = pd.to_numeric(ledger["skip"], errors="coerce").fillna(0).astype(int)
+            return ledger
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save_ledger(self, df, annotation_column, note_column, skip_column):
+        """
+        Writes the annotated rows of df (labelled, noted or skipped) by ID.
+        """
+        annotated = (df[annotation_column].notna() | df[note_column].notna() | (df[skip_column] == 1)).to_numpy()
+        rows = np.flatnonzero(annotated)
+        ledger = pd.DataFrame({
+            "id": [format_id(row_id) for row_id in self.ids[rows]],
+            "label": df[annotation_column].iloc[rows].to_numpy(),
+            "note": df[note_column].iloc[rows].to_numpy(),
+            "skip": df[skip_column].iloc[rows].to_numpy(),
+        })
+        write_csv_atomic(ledger, self.ledger_path)
+
+    def match_ledger(self, ledger):
+        """
+        Hash-joins the ledger onto the current rows. Returns (rows, ledger
+        entries) of the rows whose ID the ledger knows.
+        """
+        entries = pd.Index(ledger["id"].to_numpy(dtype=np.uint64)).get_indexer(self.ids)
+        rows = np.flatnonzero(entries >= 0)
+        return rows, ledger.iloc[entries[rows]]
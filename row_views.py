@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class RowView:
+    """
+    A filtered view of the dataset: the sorted positions of the rows it
+    shows, as a NumPy array.
+
+    Next/previous/position lookups are binary searches. A view defined
+    by a condition on the annotation columns (match) is built with one
+    vectorized mask and then kept current with refresh(), which only
+    re-checks the rows that changed; a view without a condition (e.g. a
+    review queue) holds a fixed set of rows.
+    """
+
+    def __init__(self, name, rows, match=None):
+        self.name = name
+        self.rows = np.unique(np.asarray(rows, dtype=np.int64))
+        self.match = match  # match(rows) -> bool array, rows an index array or slice(None)
+
+    @classmethod
+    def build(cls, name, match):
+        return cls(name, np.flatnonzero(match(slice(None))), match)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, row):
+        i = np.searchsorted(self.rows, row)
+        return i < len(self.rows) and self.rows[i] == row
+
+    def position(self, row):
+        """
+        Returns how many rows of the view come before row or are row,
+        i.e. the 1-based position of row if it is in the view.
+        """
+        return int(np.searchsorted(self.rows, row, side="right"))
+
+    def row_at(self, position):
+        return int(self.rows[position])
+
+    def next_after(self, row):
+        """
+        Returns the first row of the view after row, or None.
+        """
+        i = np.searchsorted(self.rows, row, side="right")
+        return int(self.rows[i]) if i < len(self.rows) else None
+
+    def prev_before(self, row):
+        """
+        Returns the last row of the view before row, or None.
+        """
+        i = np.searchsorted(self.rows, row, side="left")
+        return int(self.rows[i - 1]) if i > 0 else None
+
+    def refresh(self, rows):
+        """
+        Re-checks the condition for rows that changed, adding the ones
+        that now match and dropping the ones that no longer do.
+        """
+        if self.match is None:
+            return
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if not len(rows):
+            return
+        matches = self.match(rows)
+        slots = np.searchsorted(self.rows, rows)
+        present = np.zeros(len(rows), dtype=bool)
+        inside = slots < len(self.rows)
+        present[inside] = self.rows[slots[inside]] == rows[inside]
+
+        drop = present & ~matches
+        if drop.any():
+            self.rows = np.delete(self.rows, slots[drop])
+        add = ~present & matches
+        if add.any():
+            self.rows = np.insert(self.rows, np.searchsorted(self.rows, rows[add]), rows[add])
+
+
+def label_view(dataset, name, label):
+    """
+    Rows labelled label.
+    """
+    def match(rows):
+        return (dataset.df[dataset.annotation_column].iloc[rows] == label).fillna(False).to_numpy(dtype=bool)
+    return RowView.build(name, match)
+
+
+def unlabeled_view(dataset, name):
+    """
+    Rows neither labelled nor skipped.
+    """
+    def match(rows):
+        df = dataset.df
+        unlabeled = df[dataset.annotation_column].iloc[rows].isna().to_numpy()
+        return unlabeled & (df[dataset.skip_column].iloc[rows].to_numpy() == 0)
+    return RowView.build(name, match)
+
+
+def noted_view(dataset, name):
+    def match(rows):
+        notes = dataset.notes
+        if isinstance(rows, slice):
+            noted = np.zeros(dataset.total_rows, dtype=bool)
+            noted[np.fromiter(notes, dtype=np.int64, count=len(notes))] = True
+            return noted[rows]
+        return np.array([row in notes for row in rows.tolist()], dtype=bool)
+    return RowView.build(name, match)
+
+
+def skipped_view(dataset, name):
+    def match(rows):
+        return dataset.df[dataset.skip_column].iloc[rows].to_numpy() == 1
+    return RowView.build(name, match)
+
+
+def value_view(name, values, value):
+    """
+    Rows whose entry in values (one email column, as strings) is value.
+    Fixed: email columns are never edited.
+    """
+    return RowView(name, np.flatnonzero(values == value))
@@ -0,0 +1,147 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+
+# Read once at import: os.umask() can only be queried by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def fsync_directory(directory):
+    """
+    Forces a rename in directory to disk. Not possible (nor needed) on
+    Windows, where directories cannot be opened.
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, write):
+    """
+    Calls write(fh) on a temporary file next to path and renames it over
+    path, so a crash mid-write never truncates the existing file. The
+    file keeps its permissions.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+            write(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        # mkstemp creates the file readable by its owner only
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(directory)
+
+
+def write_csv_atomic(df, path):
+    """
+    Atomically writes a DataFrame to path as CSV.
+    """
+    write_atomic(path, lambda fh: df.to_csv(fh, index=False))
+
+
+class SaveResult:
+    """
+    Outcome of one completed write, as handed back to the GUI thread.
+    """
+
+    def __init__(self, path, tags, error=None):
+        self.path = path
+        self.tags = tags  # Tags of every save request merged into this write
+        self.error = error
+
+
+class BackgroundSaver:
+    """
+    Writes DataFrame snapshots on a worker thread.
+
+    Requests that arrive while a write is running are merged, so only
+    the newest snapshot for each path is written once the current write
+    finishes. Results are collected with poll() from the GUI thread.
+
+    A snapshot is either a DataFrame (written with write_csv_atomic) or
+    a callable taking the target path that performs the write itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # path -> (snapshot, tags)
+        self._thread = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._results = queue.Queue()
+
+    def submit(self, path, snapshot, tag=None):
+        """
+        Queues a snapshot to be written to path.
+        """
+        with self._lock:
+            tags = self._pending.pop(path, (None, []))[1]
+            if tag is not None:
+                tags.append(tag)
+            self._pending[path] = (snapshot, tags)
+
+            if self._thread is None:
+                self._idle.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="csv-save-worker", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    self._idle.set()
+                    return
+                path = next(iter(self._pending))
+                snapshot, tags = self._pending.pop(path)
+
+            try:
+                if callable(snapshot):
+                    snapshot(path)
+                else:
+                    write_csv_atomic(snapshot, path)
+                self._results.put(SaveResult(path, tags))
+            except Exception as e:
+                self._results.put(SaveResult(path, tags, e))
+
+    @property
+    def busy(self):
+        return not self._idle.is_set()
+
+    def poll(self):
+        """
+        Returns the results of the writes finished since the last poll.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every queued write has finished.
+        """
+        return self._idle.wait(timeout)
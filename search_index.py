@@ -0,0 +1,273 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from save_worker import write_atomic
+
+
+class SearchIndex:
+    """
+    Inverted index from lower-cased word tokens to sorted row positions.
+
+    The body column is indexed by plain tokens; metadata columns are
+    indexed both plainly and as "<column>:<token>", so a query can be
+    restricted to a column ("sender:paypal", "from:paypal"). A query
+    matches the rows containing every term; "wire*" matches any token
+    starting with "wire".
+
+    The index is built chunk by chunk on a background thread and can be
+    searched while it is being built (hits then cover the rows indexed so
+    far). Once complete it is persisted next to the dataset as
+    <file>.search.npz plus <file>.search.json, which records the dataset
+    signature the index belongs to.
+    """
+
+    FIELDS = ("text_cleaned", "sender", "subject", "source_dataset")
+    FIELD_ALIASES = {"from": "sender", "source": "source_dataset", "body": "text_cleaned"}
+    TOKEN_PATTERN = r"\w+"
+    MAX_TOKEN_CHARS = 40  # Longer runs (base64, hashes) are not indexed
+
+    def __init__(self, data_path, signature, body_column="text_cleaned"):
+        self.data_path = data_path
+        self.index_path = data_path + ".search.npz"
+        self.meta_path = data_path + ".search.json"
+        self.signature = signature  # Callable returning the dataset's current signature
+        self.body_column = body_column
+
+        self.total_rows = 0
+        self.rows_indexed = 0
+        self.complete = False
+        self.persisted = False  # True once the complete index is on disk
+        self.error = None
+
+        self._lock = threading.Lock()
+        self._token_re = re.compile(self.TOKEN_PATTERN)
+        self._vocab = {}  # token -> id, while building
+        self._postings = {}  # token id -> list of row arrays, while building
+        self._tokens = None  # Sorted token array once finalized
+        self._offsets = None  # int64, len(tokens) + 1
+        self._rows = None  # int32 row positions, grouped by token
+        self._thread = None
+        self._cancel = threading.Event()
+
+    # --- Opening a persisted index ---
+
+    @classmethod
+    def open(cls, data_path, signature, total_rows, body_column="text_cleaned"):
+        """
+        Returns the persisted index for data_path, or None if there is
+        none or it belongs to a different version of the dataset.
+        """
+        index = cls(data_path, signature, body_column)
+        try:
+            with open(index.meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("signature") != signature() or meta.get("rows") != total_rows:
+                return None
+
+            with np.load(index.index_path) as data:
+                tokens = data["tokens"].tobytes().decode("utf-8")
+                index._tokens = np.array(tokens.split("\n") if tokens else [], dtype=object)
+                index._offsets = data["offsets"]
+                index._rows = data["rows"]
+            if len(index._offsets) != len(index._tokens) + 1:
+                return None
+
+            index.total_rows = index.rows_indexed = total_rows
+            index.complete = index.persisted = True
+            return index
+        except (OSError, ValueError, KeyError):
+            return None
+
+    # --- Building ---
+
+    def build(self, chunks, total_rows):
+        """
+        Indexes chunks on a background thread, then persists the index.
+        chunks yields (first row, {column: values}) in row order and is
+        iterated on that thread.
+        """
+        self.total_rows = total_rows
+        # A stale index must not look valid while the new one is written
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        self._thread = threading.Thread(target=self._run, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _run(self, chunks):
+        try:
+            for start, fields in chunks:
+                if self._cancel.is_set():
+                    return
+                self.add_chunk(start, fields)
+            self._finalize()
+        except Exception as e:
+            self.error = e
+            return
+
+        try:
+            self.save()
+        except Exception as e:
+            print(f"✗ Could not save the search index: {e}")
+
+    def add_chunk(self, start, fields):
+        """
+        Adds the rows start.. of a chunk. fields maps column names to
+        equally long sequences of strings (None/NaN for missing values).
+        """
+        findall = self._token_re.findall
+        vocab = self._vocab
+        ids = []
+        rows = []
+        count = 0
+        for column, values in fields.items():
+            count = len(values)
+            qualified = column != self.body_column
+            for row, text in enumerate(values, start):
+                if not isinstance(text, str):
+                    continue
+                tokens = [token for token in set(findall(text.lower())) if len(token) <= self.MAX_TOKEN_CHARS]
+                if qualified:
+                    tokens += [column + ":" + token for token in tokens]
+                ids.extend(vocab.setdefault(token, len(vocab)) for token in tokens)
+                rows.extend([row] * len(tokens))
+
+        # Group by token id; the stable sort keeps each group's rows ascending
+        ids = np.array(ids, dtype=np.int64)
+        rows = np.array(rows, dtype=np.int32)
+        order = np.argsort(ids, kind="stable")
+        ids, rows = ids[order], rows[order]
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else ids
+        bounds = np.r_[starts, len(ids)]
+
+        with self._lock:
+            for i, token_id in enumerate(ids[starts].tolist()):
+                group = rows[bounds[i]:bounds[i + 1]]
+                # A token can occur in several columns of the same row
+                if len(group) > 1 and not (group[1:] > group[:-1]).all():
+                    group = np.unique(group)
+                self._postings.setdefault(token_id, []).append(group)
+            self.rows_indexed = start + count
+
+    def _finalize(self):
+        """
+        Packs the posting lists into three flat arrays.
+        """
+        with self._lock:
+            vocab, postings = self._vocab, self._postings
+        tokens = sorted(token for token, token_id in vocab.items() if token_id in postings)
+        lists = [np.concatenate(postings[vocab[token]]) for token in tokens]
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(rows) for rows in lists], dtype=np.int64)
+
+        with self._lock:
+            self._tokens = np.array(tokens, dtype=object)
+            self._offsets = offsets
+            self._rows = np.concatenate(lists) if lists else np.zeros(0, dtype=np.int32)
+            self._vocab = {}
+            self._postings = {}
+            self.rows_indexed = self.total_rows
+            self.complete = True
+
+    def save(self):
+        """
+        Writes the index, then the metadata that marks it as valid.
+        """
+        tokens = np.frombuffer("\n".join(self._tokens).encode("utf-8"), dtype=np.uint8)
+        with open(self.index_path, "wb") as fh:
+            np.savez(fh, tokens=tokens, offsets=self._offsets, rows=self._rows)
+        self.persisted = True
+        self.record_signature()
+
+    def record_signature(self):
+        """
+        Marks the persisted index as matching the dataset on disk, e.g.
+        after the tool itself rewrote the dataset.
+        """
+        if not self.persisted:
+            return
+        meta = {"rows": self.total_rows, "signature": self.signature()}
+        write_atomic(self.meta_path, lambda fh: json.dump(meta, fh))
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel(self):
+        """
+        Stops a running build and waits for the worker to exit.
+        """
+        self._cancel.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # --- Searching ---
+
+    def search(self, query):
+        """
+        Returns the sorted row positions matching every term of query.
+        """
+        terms = self.parse(query)
+        if not terms:
+            return np.zeros(0, dtype=np.int32)
+
+        with self._lock:
+            result = None
+            for term, prefix in terms:
+                rows = self._lookup_prefix(term) if prefix else self._lookup(term)
+                result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+                if not len(result):
+                    break
+        return result
+
+    @classmethod
+    def parse(cls, query):
+        """
+        Splits a query into (token, is_prefix) terms, with column
+        qualifiers folded into the token.
+        """
+        terms = []
+        for part in query.lower().split():
+            part = part.strip('"\'')
+            column = None
+            if ":" in part:
+                name, rest = part.split(":", 1)
+                name = cls.FIELD_ALIASES.get(name, name)
+                if name in cls.FIELDS:
+                    column, part = name, rest
+            prefix = part.endswith("*")
+            tokens = re.findall(cls.TOKEN_PATTERN, part)
+            for i, token in enumerate(tokens):
+                if column is not None and column != "text_cleaned":
+                    token = column + ":" + token
+                terms.append((token, prefix and i == len(tokens) - 1))
+        return terms
+
+    def _lookup(self, token):
+        if self._tokens is not None:
+            i = np.searchsorted(self._tokens, token)
+            if i < len(self._tokens) and self._tokens[i] == token:
+                return self._rows[self._offsets[i]:self._offsets[i + 1]]
+            return np.zeros(0, dtype=np.int32)
+
+        lists = self._postings.get(self._vocab.get(token))
+        return np.concatenate(lists) if lists else np.zeros(0, dtype=np.int32)
+
+    def _lookup_prefix(self, prefix):
+        if self._tokens is not None:
+            first = np.searchsorted(self._tokens, prefix)
+            last = np.searchsorted(self._tokens, prefix + "\uffff")
+            if first == last:
+                return np.zeros(0, dtype=np.int32)
+            rows = self._rows[self._offsets[first]:self._offsets[last]]
+        else:
+            lists = [rows for token, token_id in self._vocab.items()
+                     if token.startswith(prefix) for rows in self._postings.get(token_id, ())]
+            if not lists:
+                return np.zeros(0, dtype=np.int32)
+            rows = np.concatenate(lists)
+        return np.unique(rows)
@@ -0,0 +1,311 @@
+"""
+Splits a large annotation CSV into fixed-size shards and merges them back.
+
+    python shards.py split dataset.csv shards/ --rows 5000
+    python shards.py status shards/
+    python shards.py merge shards/ merged.csv
+
+Shards (dataset.shard-00001.csv, …) are ordinary CSVs that the annotation
+tool opens like any other file, so annotators can work on different
+shards, or one annotator on one small shard per session. Each shard has a
+manifest next to it (<shard>.manifest.json) with the range of source rows
+it holds, a checksum of their emails and its annotation counts; the tool
+updates the counts on every save and shows the progress over all shards
+from the manifests alone.
+
+split and merge stream the data in one pass each; merge verifies every
+shard against its manifest and refuses shards with unsaved (journaled)
+changes.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+
+from annotation_journal import AnnotationJournal
+from csv_ingest import iter_csv_chunks
+from row_ids import hash_rows, hashed_columns
+from save_worker import write_atomic, write_csv_atomic
+
+MANIFEST_SUFFIX = ".manifest.json"
+ANNOTATION_COLUMNS = ("phishing_type", "note", "skip_flag")
+
+
+def count_progress(df, annotation_column="phishing_type", note_column="note", skip_column="skip_flag"):
+    """
+    Returns the annotation counts of a frame in the form of
+    AnnotationDataset.stats().
+    """
+    labels = df[annotation_column].dropna().astype(str)
+    annotated = len(labels)
+    return {
+        "total": len(df),
+        "annotated": annotated,
+        "percentage": round(annotated / len(df) * 100, 1) if len(df) else 0,
+        "classes": {label: int(count) for label, count in labels.value_counts().sort_index().items()},
+        "skipped": int((pd.to_numeric(df[skip_column], errors="coerce") == 1).sum()),
+        "noted": int(df[note_column].notna().sum()),
+    }
+
+
+class ShardChecksum:
+    """
+    Running SHA-256 over the row hashes of a shard's email columns, so
+    chunking, dtypes and the annotation columns do not affect it.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._digest = hashlib.sha256()
+
+    def update(self, frame):
+        self._digest.update(hash_rows(frame[self.columns]).tobytes())
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+
+class ShardManifest:
+    """
+    The manifest of one shard: which source rows it holds (rows is the
+    half-open [first, end) range), the checksum of their emails and the
+    annotation counts as of the last save.
+    """
+
+    def __init__(self, shard_path, source, index, shards, rows, columns, checksum, progress):
+        self.shard_path = shard_path
+        self.source = source
+        self.index = index  # 0-based position of the shard
+        self.shards = shards  # Number of shards of the source
+        self.rows = rows
+        self.columns = columns  # Columns the checksum covers
+        self.checksum = checksum
+        self.progress = progress
+
+    @property
+    def path(self):
+        return self.shard_path + MANIFEST_SUFFIX
+
+    @property
+    def complete(self):
+        """
+        True once every row is labelled or skipped.
+        """
+        return self.progress["annotated"] + self.progress["skipped"] >= self.progress["total"]
+
+    @classmethod
+    def open(cls, shard_path):
+        """
+        Returns the manifest of shard_path, or None if it is not a shard.
+        """
+        try:
+            with open(shard_path + MANIFEST_SUFFIX, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            return cls(
+                shard_path, meta["source"], meta["index"], meta["shards"], meta["rows"],
+                meta["columns"], meta["checksum"], meta["progress"]
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self):
+        meta = {
+            "source": self.source,
+            "index": self.index,
+            "shards": self.shards,
+            "rows": self.rows,
+            "columns": self.columns,
+            "checksum": self.checksum,
+            "progress": self.progress,
+        }
+        write_atomic(self.path, lambda fh: json.dump(meta, fh, indent=2))
+
+
+def find_manifests(directory):
+    """
+    Returns the manifests of the shards in directory, in shard order.
+    """
+    manifests = []
+    for path in glob.glob(os.path.join(glob.escape(directory), "*" + MANIFEST_SUFFIX)):
+        manifest = ShardManifest.open(path[:-len(MANIFEST_SUFFIX)])
+        if manifest is not None:
+            manifests.append(manifest)
+    return sorted(manifests, key=lambda manifest: (manifest.source, manifest.index))
+
+
+def global_progress(directory, exclude=None):
+    """
+    Sums the counts of every shard manifest in directory, leaving out
+    the shard at path exclude (e.g. the one open with live counts).
+    """
+    totals = {"shards": 0, "complete": 0, "total": 0, "annotated": 0, "skipped": 0, "noted": 0, "classes": {}}
+    for manifest in find_manifests(directory):
+        if exclude is not None and os.path.abspath(manifest.shard_path) == os.path.abspath(exclude):
+            continue
+        totals["shards"] += 1
+        totals["complete"] += manifest.complete
+        for key in ("total", "annotated", "skipped", "noted"):
+            totals[key] += manifest.progress[key]
+        for label, count in manifest.progress["classes"].items():
+            totals["classes"][label] = totals["classes"].get(label, 0) + count
+    return totals
+
+
+def shard_path(directory, source, index):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(directory, f"{stem}.shard-{index + 1:05d}.csv")
+
+
+def split(source, directory, shard_rows=5000, chunk_rows=50000, annotation_columns=ANNOTATION_COLUMNS):
+    """
+    Streams source into shards of shard_rows rows in directory. Returns
+    their manifests.
+    """
+    if shard_rows < 1:
+        raise ValueError("Shards need at least one row")
+    os.makedirs(directory, exist_ok=True)
+    annotation_column, note_column, skip_column = annotation_columns
+    read_kwargs = dict(dtype=str, keep_default_na=False, na_values=[''])
+
+    def write_shard(frame, first_row):
+        frame = frame.reset_index(drop=True)
+        for column, default in zip(annotation_columns, (pd.NA, pd.NA, 0)):
+            if column not in frame.columns:
+                frame[column] = default
+        path = shard_path(directory, source, len(manifests))
+        write_csv_atomic(frame, path)
+
+        checksum = ShardChecksum(hashed_columns(list(frame.columns), annotation_columns))
+        checksum.update(frame)
+        manifests.append(ShardManifest(
+            path, os.path.abspath(source), len(manifests), 0, [first_row, first_row + len(frame)],
+            checksum.columns, checksum.hexdigest(),
+            count_progress(frame, annotation_column, note_column, skip_column)
+        ))
+
+    manifests, pending, filled = [], [], 0
+    for chunk in iter_csv_chunks(source, chunk_rows=chunk_rows, **read_kwargs):
+        if len(chunk) and chunk.index[0] == 0:
+            # The parser restarted from the top
+            manifests, pending, filled = [], [], 0
+        offset = 0
+        while offset < len(chunk):
+            take = min(shard_rows - filled, len(chunk) - offset)
+            pending.append(chunk.iloc[offset:offset + take])
+            filled += take
+            offset += take
+            if filled == shard_rows:
+                write_shard(pd.concat(pending), int(pending[0].index[0]))
+                pending, filled = [], 0
+        if not len(chunk) and not pending:
+            pending.append(chunk)
+    if filled or not manifests:
+        first_row = int(pending[0].index[0]) if filled else 0
+        write_shard(pd.concat(pending), first_row)
+
+    for manifest in manifests:
+        manifest.shards = len(manifests)
+        manifest.save()
+    return manifests
+
+
+def merge(directory, output, allow_incomplete=False, chunk_rows=50000):
+    """
+    Streams the shards in directory back into one CSV, verifying each
+    against its manifest. Returns the number of rows written.
+    """
+    manifests = find_manifests(directory)
+    if not manifests:
+        raise ValueError(f"No shards in {directory}")
+    if len({manifest.source for manifest in manifests}) > 1:
+        raise ValueError(f"{directory} holds shards of more than one source")
+
+    expected_start = 0
+    for index, manifest in enumerate(manifests):
+        if manifest.index != index or manifest.shards != len(manifests) or manifest.rows[0] != expected_start:
+            raise ValueError(f"Shard {index + 1} of {manifests[0].shards} is missing or out of order")
+        expected_start = manifest.rows[1]
+        if not os.path.exists(manifest.shard_path):
+            raise ValueError(f"{manifest.shard_path} is missing")
+        if AnnotationJournal(manifest.shard_path).has_changes():
+            raise ValueError(f"{manifest.shard_path} has unsaved changes; open and save it first")
+    incomplete = [manifest for manifest in manifests if not manifest.complete]
+    if incomplete and not allow_incomplete:
+        raise ValueError(f"{len(incomplete)} shard(s) are not fully annotated (use --allow-incomplete)")
+
+    # Column order of the first shard, then any column a shard added
+    read_kwargs = dict(dtype=str, keep_default_na=False, na_values=[''])
+    columns = []
+    for manifest in manifests:
+        header = pd.read_csv(manifest.shard_path, nrows=0).columns
+        columns += [column for column in header if column not in columns]
+
+    def write(fh):
+        header = True
+        for manifest in manifests:
+            checksum = ShardChecksum(manifest.columns)
+            rows = 0
+            for chunk in iter_csv_chunks(manifest.shard_path, chunk_rows=chunk_rows, **read_kwargs):
+                if len(chunk) and chunk.index[0] == 0 and rows:
+                    raise ValueError(f"{manifest.shard_path} could not be streamed in one pass")
+                checksum.update(chunk)
+                rows += len(chunk)
+                chunk.reindex(columns=columns).to_csv(fh, index=False, header=header)
+                header = False
+            if rows != manifest.rows[1] - manifest.rows[0] or checksum.hexdigest() != manifest.checksum:
+                raise ValueError(f"{manifest.shard_path} no longer holds the emails its manifest lists")
+
+    write_atomic(output, write)
+    return manifests[-1].rows[1]
+
+
+def print_status(directory):
+    manifests = find_manifests(directory)
+    for manifest in manifests:
+        progress = manifest.progress
+        print(f"{os.path.basename(manifest.shard_path)}  rows {manifest.rows[0]:,}–{manifest.rows[1] - 1:,}"
+              f"  {progress['annotated']:,} / {progress['total']:,} annotated, {progress['skipped']:,} skipped"
+              + ("  ✓" if manifest.complete else ""))
+    totals = global_progress(directory)
+    percentage = totals["annotated"] / totals["total"] * 100 if totals["total"] else 0
+    print(f"All shards: {totals['annotated']:,} / {totals['total']:,} ({percentage:.1f}%)"
+          f" | {totals['complete']} of {totals['shards']} shard(s) complete")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sub = commands.add_parser("split", help="split a CSV into shards")
+    sub.add_argument("source")
+    sub.add_argument("directory")
+    sub.add_argument("--rows", type=int, default=5000, help="rows per shard (default: 5000)")
+
+    sub = commands.add_parser("status", help="show the progress of every shard")
+    sub.add_argument("directory")
+
+    sub = commands.add_parser("merge", help="merge the shards back into one CSV")
+    sub.add_argument("directory")
+    sub.add_argument("output")
+    sub.add_argument("--allow-incomplete", action="store_true", help="merge shards that are not fully annotated")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "split":
+            manifests = split(args.source, args.directory, args.rows)
+            print(f"✓ Split {args.source} into {len(manifests)} shard(s) in {args.directory}")
+        elif args.command == "status":
+            print_status(args.directory)
+        else:
+            written = merge(args.directory, args.output, args.allow_incomplete)
+            print(f"✓ Merged {written:,} row(s) into {args.output}")
+    except ValueError as e:
+        raise SystemExit(f"✗ {e}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class SkippedIndex:
+    """
+    Sorted set of skipped row positions.
+
+    Membership tests and next/previous lookups are bisections, so
+    navigating between skipped rows never sorts or scans the whole set.
+    """
+
+    def __init__(self, rows=()):
+        self._rows = sorted(set(int(row) for row in rows))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, key):
+        return self._rows[key]
+
+    def __contains__(self, row):
+        i = bisect_left(self._rows, row)
+        return i < len(self._rows) and self._rows[i] == row
+
+    def add(self, row):
+        if row not in self:
+            insort(self._rows, row)
+
+    def discard(self, row):
+        i = bisect_left(self._rows, row)
+        if i < len(self._rows) and self._rows[i] == row:
+            del self._rows[i]
+
+    def position(self, row):
+        """
+        Returns how many skipped rows come before row.
+        """
+        return bisect_left(self._rows, row)
+
+    def next_after(self, row, wrap=True):
+        """
+        Returns the first skipped row after row (wrapping to the first
+        skipped row), or None if there is none.
+        """
+        i = bisect_right(self._rows, row)
+        if i < len(self._rows):
+            return self._rows[i]
+        return self._rows[0] if wrap and self._rows else None
+
+    def prev_before(self, row, wrap=True):
+        """
+        Returns the last skipped row before row (wrapping to the last
+        skipped row), or None if there is none.
+        """
+        i = bisect_left(self._rows, row)
+        if i > 0:
+            return self._rows[i - 1]
+        return self._rows[-1] if wrap and self._rows else None
@@ -0,0 +1,432 @@
+import multiprocessing
+import queue
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def hash_features(texts, n_features):
+    """
+    Turns texts into hashed bag-of-words rows: returns (indices, values,
+    indptr) of a CSR matrix with log(1 + term frequency) values. Tokens
+    are hashed with CRC32, so the features are the same in every process.
+    """
+    words = [TOKEN_RE.findall(text.lower()) for text in texts]
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    flat = [word.encode("utf-8") for row_words in words for word in row_words]
+    hashes = np.fromiter(map(zlib.crc32, flat), dtype=np.int64, count=len(flat)) & (n_features - 1)
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    keys, counts = np.unique(owners * n_features + hashes, return_counts=True)
+    indices = keys % n_features
+    indptr = np.searchsorted(keys // n_features, np.arange(len(texts) + 1))
+    return indices, np.log1p(counts).astype(np.float32), indptr
+
+
+class NaiveBayesModel:
+    """
+    Multinomial naive Bayes over hashed features, as log-probability
+    weights. Scoring a row is a sparse dot product per class.
+    """
+
+    def __init__(self, classes, class_rows, log_prior, weights, version):
+        self.classes = classes
+        self.class_rows = class_rows  # Labelled rows per class
+        self.log_prior = log_prior  # float64, one per class
+        self.weights = weights  # float32, classes x features
+        self.version = version
+
+    def predict(self, indices, values, indptr):
+        """
+        Returns (predicted class position, confidence) arrays for CSR rows.
+        """
+        if not len(indptr) > 1:
+            return np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.float32)
+        contributions = self.weights[:, indices] * values
+        scores = np.zeros((len(indptr) - 1, len(self.classes)))
+        nonempty = indptr[1:] > indptr[:-1]
+        if len(indices):
+            sums = np.add.reduceat(contributions, indptr[:-1][nonempty], axis=1).T
+            scores[nonempty] = sums
+        scores += self.log_prior
+
+        # Softmax; the largest probability is the confidence
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities.argmax(axis=1).astype(np.int8), probabilities.max(axis=1).astype(np.float32)
+
+
+def take_rows(indices, values, indptr, take):
+    """
+    Returns the CSR rows at positions take of (indices, values, indptr).
+    """
+    starts, lengths = indptr[take], indptr[take + 1] - indptr[take]
+    new_indptr = np.zeros(len(take) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_indptr[1:])
+    gather = np.repeat(starts - new_indptr[:-1], lengths) + np.arange(new_indptr[-1])
+    return indices[gather], values[gather], new_indptr
+
+
+class _Trainer:
+    """
+    Worker-process side: label counts per hashed feature, updated as
+    labels are set, changed or removed, and the hashed features of every
+    row streamed in so far, so rows can be rescored without their text.
+    """
+
+    def __init__(self, classes, n_features, total_rows, alpha=0.1):
+        self.classes = classes
+        self.n_features = n_features
+        self.alpha = alpha
+        self.feature_counts = np.zeros((len(classes), n_features))
+        self.class_rows = np.zeros(len(classes))
+        self.rows = {}  # row -> (class position, indices, values) it was counted with
+        self.labelled = np.zeros(total_rows, dtype=bool)  # Also rows labelled outside the classes
+        self.live_rows = set()  # Rows labelled during the session
+        self.chunks = []  # (first row, indices, values, indptr) of the rows streamed in
+        self.version = 0
+
+    def add_rows(self, start, positions, texts):
+        """
+        Hashes and keeps a chunk of rows, counting the ones labelled in
+        the file. Returns the chunk's features.
+        """
+        indices, values, indptr = hash_features(texts, self.n_features)
+        features = (indices.astype(np.int32), values, indptr)
+        self.chunks.append((start,) + features)
+        labelled = np.flatnonzero(positions != -1)
+        if len(labelled):
+            self.set_labels(labelled + start, positions[labelled], take_rows(*features, labelled), False)
+        return features
+
+    def set_labels(self, rows, positions, features, live):
+        """
+        Counts rows with class positions (-1 unlabeled, -2 labelled
+        outside the classes) and their (indices, values, indptr) features.
+        """
+        indices, values, indptr = features
+        for i, (row, position) in enumerate(zip(np.asarray(rows).tolist(), np.asarray(positions).tolist())):
+            if live:
+                self.live_rows.add(row)
+            elif row in self.live_rows:
+                continue  # A newer label arrived while the dataset was being read
+
+            old = self.rows.pop(row, None)
+            if old is not None:
+                old_position, old_indices, old_values = old
+                np.subtract.at(self.feature_counts[old_position], old_indices, old_values)
+                self.class_rows[old_position] -= 1
+
+            self.labelled[row] = position != -1
+            if 0 <= position < len(self.classes):
+                row_indices = indices[indptr[i]:indptr[i + 1]].copy()
+                row_values = values[indptr[i]:indptr[i + 1]].copy()
+                np.add.at(self.feature_counts[position], row_indices, row_values)
+                self.class_rows[position] += 1
+                self.rows[row] = (position, row_indices, row_values)
+        self.version += 1
+
+    def unlabeled(self, start, features):
+        """
+        Returns the rows of a chunk not labelled yet and their features.
+        """
+        indptr = features[2]
+        take = np.flatnonzero(~self.labelled[start:start + len(indptr) - 1])
+        return take + start, take_rows(*features, take)
+
+    def model(self):
+        smoothed = self.feature_counts + self.alpha
+        weights = np.log(smoothed / smoothed.sum(axis=1, keepdims=True)).astype(np.float32)
+        log_prior = np.log((self.class_rows + 1) / (self.class_rows.sum() + len(self.classes)))
+        return NaiveBayesModel(self.classes, self.class_rows.copy(), log_prior, weights, self.version)
+
+
+def _worker(requests, results, classes, n_features, total_rows, publish_seconds=5.0):
+    """
+    Worker process: keeps the hashed features of the rows streamed in,
+    applies label updates, rebuilds the model before scoring and scores
+    unlabeled rows, all of them again on "rescore". New models are sent
+    back once updates pause, and at most every publish_seconds while
+    the dataset is being streamed through. A failure is reported as an
+    "error" message before the process exits.
+    """
+    try:
+        _serve(requests, results, _Trainer(classes, n_features, total_rows), publish_seconds)
+    except Exception as e:
+        results.put(("error", f"{type(e).__name__}: {e}"))
+        raise
+
+
+def _serve(requests, results, trainer, publish_seconds):
+    model = None
+    dirty = False  # Labels changed since the model was built
+    unpublished = False  # Model built but not yet sent back
+    published_at = 0.0
+    while True:
+        try:
+            message = requests.get(timeout=0.5 if dirty or unpublished else None)
+        except queue.Empty:
+            message = None
+
+        if dirty and (message is None or message[0] != "train"):
+            model = trainer.model()
+            dirty = False
+            unpublished = True
+        if unpublished and (message is None or time.monotonic() - published_at >= publish_seconds):
+            results.put(("model", model))
+            unpublished = False
+            published_at = time.monotonic()
+        if message is None:
+            continue
+
+        kind = message[0]
+        if kind == "stop":
+            break
+        if kind == "train":
+            _, rows, positions, texts = message
+            trainer.set_labels(rows, positions, hash_features(texts, trainer.n_features), True)
+            dirty = True
+        elif kind == "rows":
+            _, start, positions, texts = message
+            version = trainer.version
+            features = trainer.add_rows(start, positions, texts)
+            if trainer.version != version:
+                model = trainer.model()
+                unpublished = True
+            chunks = [(start,) + features]
+        elif kind == "rescore":
+            chunks = trainer.chunks
+        if kind in ("rows", "rescore") and model is not None:
+            for chunk in chunks:
+                rows, features = trainer.unlabeled(chunk[0], chunk[1:])
+                if len(rows):
+                    predicted, confidence = model.predict(*features)
+                    results.put(("scores", model.version, rows, predicted, confidence))
+
+
+class SuggestionEngine:
+    """
+    Suggests a class for each email from the rows labelled so far.
+
+    A worker process trains a naive Bayes model on hashed word features
+    and scores unlabeled rows in batches; a feeder thread in this process
+    streams the dataset to it once, so neither training nor scoring runs
+    on the Tk thread. The GUI forwards new labels with label_changed(),
+    collects models and scores with poll() and reads suggestions with
+    suggestion(). After every rescore_every new labels the worker scores
+    the unlabeled rows again from the features it kept. If the worker
+    dies, error says why and no more suggestions arrive.
+
+    chunks() must return an iterator of (first row, [text, ...]) chunks
+    covering the dataset; it is consumed on the feeder thread.
+    """
+
+    def __init__(self, classes, labels, chunks, n_features=2 ** 18, rescore_every=50, min_labels=10):
+        self.classes = list(classes)
+        self.n_features = n_features
+        self.rescore_every = rescore_every
+        self.min_labels = min_labels
+        self.chunks = chunks
+
+        # Class position per row: -1 unlabeled, -2 labelled outside the classes
+        positions = labels.astype(object).map({label: i for i, label in enumerate(self.classes)})
+        positions = positions.where(positions.notna() | labels.isna(), -2).fillna(-1)
+        self.labels = positions.to_numpy(dtype=np.int8)
+
+        self.predicted = np.full(len(labels), -1, dtype=np.int8)
+        self.confidence = np.full(len(labels), np.inf, dtype=np.float32)  # inf = not scored
+        self.scored_version = np.zeros(len(labels), dtype=np.int32)
+        self.model = None
+        self.error = None  # Why the worker stopped, if it did
+
+        self._live = deque()  # Label updates waiting for the feeder thread
+        self._labels_seen = 0
+        self._wake = threading.Event()
+        self._cancel = threading.Event()
+        self._requests = None
+        self._results = None
+        self._process = None
+        self._feeder = None
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        self._requests = context.Queue(maxsize=4)
+        # Unsent requests must never keep this process from exiting
+        self._requests.cancel_join_thread()
+        self._results = context.Queue()
+        self._process = context.Process(
+            target=_worker, args=(self._requests, self._results, self.classes, self.n_features, len(self.labels)),
+            daemon=True
+        )
+        self._process.start()
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    # --- GUI thread ---
+
+    def label_changed(self, row, label, text):
+        """
+        Records a new label (None when removed) for row. Never blocks.
+        """
+        if label is None:
+            self.labels[row] = -1
+        elif label in self.classes:
+            self.labels[row] = self.classes.index(label)
+        else:
+            self.labels[row] = -2
+        self._live.append((row, self.labels[row], text))
+        self._labels_seen += 1
+        self._wake.set()
+
+    def poll(self):
+        """
+        Collects models and scores from the worker. Returns True if
+        anything arrived or the worker was found dead.
+        """
+        changed = False
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                break
+            changed = True
+            if message[0] == "error":
+                self.error = message[1]
+            elif message[0] == "model":
+                self.model = message[1]
+            elif message[0] == "scores":
+                _, version, rows, predicted, confidence = message
+                self.predicted[rows] = predicted
+                self.confidence[rows] = confidence
+                self.scored_version[rows] = version
+
+        if self.error is None and self._process is not None and not self._process.is_alive():
+            self.error = f"worker exited with code {self._process.exitcode}"
+            changed = True
+        return changed
+
+    @property
+    def ready(self):
+        """
+        True once the model has seen enough labels of at least two classes.
+        """
+        model = self.model
+        return (
+            model is not None
+            and model.class_rows.sum() >= self.min_labels
+            and np.count_nonzero(model.class_rows) >= 2
+        )
+
+    def suggestion(self, row, text_of=None):
+        """
+        Returns (class, confidence) for row, or None. Rows not scored with
+        the current model are scored here if text_of(row) can supply
+        their text.
+        """
+        if not self.ready:
+            return None
+        if self.scored_version[row] != self.model.version and text_of is not None:
+            predicted, confidence = self.model.predict(*hash_features([text_of(row)], self.n_features))
+            self.predicted[row], self.confidence[row] = predicted[0], confidence[0]
+            self.scored_version[row] = self.model.version
+        if self.predicted[row] < 0:
+            return None
+        return self.classes[self.predicted[row]], float(self.confidence[row])
+
+    def most_uncertain(self, exclude=(), rows=None, skip_flags=None):
+        """
+        Returns the scored unlabeled row with the lowest confidence, not
+        counting the rows in exclude or flagged in skip_flags (one 0/1
+        per row), or None. rows (sorted positions) limits the choice to
+        those rows.
+        """
+        if not self.ready:
+            return None
+        open_rows = self.labels == -1
+        if skip_flags is not None:
+            open_rows &= skip_flags[:len(open_rows)] == 0
+        confidence = np.where(open_rows, self.confidence, np.inf)
+        confidence[list(exclude)] = np.inf
+        if rows is None:
+            row = int(confidence.argmin())
+        else:
+            rows = rows[rows < len(confidence)]
+            if not len(rows):
+                return None
+            row = int(rows[confidence[rows].argmin()])
+        return row if np.isfinite(confidence[row]) else None
+
+    def close(self):
+        self._cancel.set()
+        self._wake.set()
+        if self._feeder is not None:
+            self._feeder.join()
+            self._feeder = None
+        if self._process is not None:
+            try:
+                self._requests.put(("stop",), timeout=1)
+            except queue.Full:
+                pass
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+    # --- Feeder thread ---
+
+    def _send(self, message):
+        """
+        Puts a message on the bounded request queue, forwarding live
+        label updates first. Returns False once cancelled.
+        """
+        while not self._cancel.is_set() and self._process.is_alive():
+            if not self._forward_live():
+                continue
+            try:
+                self._requests.put(message, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _forward_live(self):
+        """
+        Sends the queued label updates as one batch. Returns False if the
+        request queue stayed full.
+        """
+        updates = []
+        while self._live:
+            updates.append(self._live.popleft())
+        if not updates:
+            return True
+        rows, positions, texts = zip(*updates)
+        try:
+            self._requests.put(("train", list(rows), np.array(positions, dtype=np.int8), list(texts)), timeout=0.2)
+            return True
+        except queue.Full:
+            self._live.extendleft(reversed(updates))
+            return False
+
+    def _feed(self):
+        labels_at_start = self._labels_seen
+        for start, texts in self.chunks():
+            positions = self.labels[start:start + len(texts)].copy()
+            if not self._send(("rows", start, positions, texts)):
+                return
+
+        # Rescore once enough new labels arrived
+        while not self._cancel.is_set():
+            while not self._cancel.is_set() and self._labels_seen - labels_at_start < self.rescore_every:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                self._forward_live()
+            labels_at_start = self._labels_seen
+            if not self._send(("rescore",)):
+                return
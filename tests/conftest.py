@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def emails():
+    """
+    A small unannotated email frame with a message_id key.
+    """
+    return pd.DataFrame({
+        "message_id": [f"m{i:02d}" for i in range(20)],
+        "text_cleaned": [f"email body {i}" for i in range(20)],
+        "sender": [f"user{i % 3}@example.com" for i in range(20)],
+        "subject": [f"subject {i}" for i in range(20)],
+    })
+
+
+@pytest.fixture
+def csv_path(tmp_path, emails):
+    path = str(tmp_path / "emails.csv")
+    emails.to_csv(path, index=False)
+    return path
@@ -0,0 +1,87 @@
+import json
+
+import pandas as pd
+import pytest
+
+import annotate_cli
+from project_store import ProjectStore
+
+
+def run(capsys, *argv):
+    annotate_cli.main([str(arg) for arg in argv])
+    return capsys.readouterr().out
+
+
+def stats(capsys, dataset):
+    return json.loads(run(capsys, "stats", dataset, "--json").strip().splitlines()[-1])
+
+
+def write_labels(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_apply_labels_by_key(capsys, csv_path, tmp_path):
+    labels = write_labels(tmp_path / "labels.csv", {
+        "message_id": ["m03", "m07", "m07", "nope", "m09"],
+        "label": ["2", "1", "3", "1", "9"],
+    })
+    out = run(capsys, "apply-labels", csv_path, labels, "--key", "message_id")
+    assert "✓ Applied 2 label(s)" in out
+    assert "1 entries matched no row" in out
+    assert "1 entries had a label other than" in out
+
+    saved = pd.read_csv(csv_path, dtype=str)
+    labelled = saved.dropna(subset=["phishing_type"]).set_index("message_id")["phishing_type"]
+    # The last entry for a row wins
+    assert labelled.to_dict() == {"m03": "2", "m07": "3"}
+
+
+def test_apply_labels_by_row_keeps_existing(capsys, csv_path, tmp_path):
+    run(capsys, "apply-labels", csv_path, write_labels(tmp_path / "a.csv", {"row": [0, 1], "label": ["1", "1"]}))
+    run(capsys, "apply-labels", csv_path, write_labels(tmp_path / "b.csv", {"row": [1, 2, 40], "label": ["2", "2", "2"]}),
+        "--keep-existing")
+    saved = pd.read_csv(csv_path, dtype=str)
+    assert saved["phishing_type"].iloc[:4].fillna("").tolist() == ["1", "1", "2", ""]
+
+
+def test_apply_labels_unknown_key_column(capsys, csv_path, tmp_path):
+    labels = write_labels(tmp_path / "labels.csv", {"uid": ["m01"], "label": ["1"]})
+    with pytest.raises(SystemExit):
+        run(capsys, "apply-labels", csv_path, labels, "--key", "uid")
+
+
+def test_stats(capsys, csv_path, tmp_path):
+    run(capsys, "apply-labels", csv_path,
+        write_labels(tmp_path / "labels.csv", {"row": [0, 1, 2], "label": ["1", "3", "3"]}))
+    counts = stats(capsys, csv_path)
+    assert counts["total"] == 20
+    assert counts["annotated"] == 3
+    assert counts["percentage"] == 15.0
+    assert counts["classes"] == {"1": 1, "2": 0, "3": 2}
+    assert "Annotated: 3 / 20 (15.0%)" in run(capsys, "stats", csv_path)
+
+
+def test_export_labeled(capsys, csv_path, tmp_path):
+    run(capsys, "apply-labels", csv_path,
+        write_labels(tmp_path / "labels.csv", {"row": [4, 5, 6], "label": ["1", "2", "3"]}))
+    output = tmp_path / "out.csv"
+    out = run(capsys, "export-labeled", csv_path, output, "--classes", "2", "3")
+    assert "✓ Exported 2 labelled row(s)" in out
+
+    exported = pd.read_csv(output, dtype=str)
+    assert list(exported.columns) == list(pd.read_csv(csv_path, nrows=0).columns)
+    assert exported["message_id"].tolist() == ["m05", "m06"]
+    assert exported["text_cleaned"].tolist() == ["email body 5", "email body 6"]
+
+
+def test_reset_skips_and_project(capsys, csv_path, tmp_path):
+    project = str(tmp_path / "emails.annproj")
+    ProjectStore.import_csv(csv_path, project, "phishing_type", "note", "skip_flag").close()
+    run(capsys, "apply-labels", project, write_labels(tmp_path / "labels.csv", {"row": [2], "label": ["2"]}))
+    assert stats(capsys, project)["annotated"] == 1
+
+    output = tmp_path / "out.csv"
+    run(capsys, "export-labeled", project, output)
+    assert pd.read_csv(output, dtype=str)["message_id"].tolist() == ["m02"]
+    assert "✓ Cleared 0 skip flag(s)" in run(capsys, "reset-skips", project)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from annotation_core import AnnotationDataset
+
+
+def opened(path):
+    dataset = AnnotationDataset()
+    dataset.open(path)
+    return dataset
+
+
+def test_open_adds_annotation_columns(csv_path):
+    dataset = opened(csv_path)
+    assert dataset.total_rows == 20
+    assert dataset.df[dataset.annotation_column].isna().all()
+    assert dataset.df[dataset.skip_column].dtype == np.int8
+    assert dataset.notes == {}
+    assert dataset.resume_position() == 0
+    dataset.close()
+
+
+def test_mutators_return_changes_and_keep_counts(csv_path):
+    dataset = opened(csv_path)
+    assert dataset.skip(2) == [("skip", 2, None)]
+    assert dataset.annotate(2, "1") == [("annotate", 2, "1"), ("unskip", 2, None)]
+    assert dataset.annotate(2, "3") == [("annotate", 2, "3")]
+    assert dataset.skip(5) == [("skip", 5, None)]
+    assert dataset.set_note(7, "look") == [("note", 7, "look")]
+
+    stats = dataset.stats(["1", "2", "3"])
+    assert stats == {"total": 20, "annotated": 1, "percentage": 5.0, "classes": {"1": 0, "2": 0, "3": 1},
+                     "skipped": 1, "noted": 1}
+    assert list(dataset.skipped) == [5]
+    dataset.close()
+
+
+def test_apply_labels_unskips(csv_path):
+    dataset = opened(csv_path)
+    dataset.skip(1)
+    changes = dataset.apply_labels([0, 1, 2], ["1", "2", "2"])
+    assert ("unskip", 1, None) in changes
+    assert dataset.stats()["classes"] == {"1": 1, "2": 2}
+    assert len(dataset.skipped) == 0
+    assert dataset.resume_position() == 3
+    dataset.close()
+
+
+def test_restore_undoes_an_edit(csv_path):
+    dataset = opened(csv_path)
+    dataset.annotate(3, "2")
+    before = dataset.row_state([3, 4])
+    dataset.annotate(3, "1")
+    dataset.skip(4)
+    dataset.set_note(4, "x")
+
+    changes = dataset.restore([3, 4], before)
+    assert ("annotate", 3, "2") in changes and ("unskip", 4, None) in changes
+    assert dataset.df.at[3, dataset.annotation_column] == "2"
+    assert 4 not in dataset.skipped and 4 not in dataset.notes
+    assert dataset.stats()["noted"] == 0
+    dataset.close()
+
+
+def test_save_writes_plain_values(csv_path):
+    dataset = opened(csv_path)
+    dataset.record(dataset.annotate(0, "2"))
+    dataset.record(dataset.skip(1))
+    dataset.record(dataset.set_note(1, "why"))
+    dataset.save()
+    assert not dataset.journal.has_changes()
+    dataset.close()
+
+    saved = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    assert saved.iloc[0][["phishing_type", "skip_flag", "note"]].tolist() == ["2", "0", ""]
+    assert saved.iloc[1][["phishing_type", "skip_flag", "note"]].tolist() == ["", "1", "why"]
+
+
+def test_adopt_uses_a_frame_without_files(emails):
+    dataset = AnnotationDataset()
+    frame = emails.assign(phishing_type=["1"] + [None] * 19, note=[None] * 19 + ["n"])
+    dataset.adopt(frame, "remote")
+    assert dataset.stats()["annotated"] == 1
+    assert dataset.notes == {19: "n"}
+    assert dataset.journal is None
+    dataset.record(dataset.annotate(1, "2"))  # Nothing to persist to
+    dataset.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from annotation_core import AnnotationDataset
+from annotation_journal import AnnotationJournal
+
+
+def test_rotate_keeps_records_until_discarded(csv_path):
+    journal = AnnotationJournal(csv_path)
+    journal.open()
+    journal.append_many([("annotate", 1, "2"), ("skip", 3, None)])
+    seq = journal.rotate()
+    journal.append("note", 4, "later")
+
+    assert [record["op"] for record in journal.read()] == ["annotate", "skip", "note"]
+    assert journal.pending == 1
+
+    journal.discard_through(seq)
+    assert list(journal.read()) == [{"op": "note", "row": 4, "value": "later"}]
+    journal.close()
+    assert journal.has_changes()
+
+
+def test_torn_trailing_line_is_dropped(csv_path):
+    journal = AnnotationJournal(csv_path)
+    journal.open()
+    journal.append("annotate", 1, "2")
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as fh:
+        fh.write('{"op": "annotate", "row": 2, "va')
+
+    journal = AnnotationJournal(csv_path)
+    journal.open()
+    assert journal.pending == 1
+    journal.append("skip", 5)
+    assert [record["row"] for record in journal.read()] == [1, 5]
+    journal.close()
+
+
+def test_unknown_operation_is_refused(csv_path):
+    journal = AnnotationJournal(csv_path)
+    with pytest.raises(ValueError):
+        journal.append("delete", 1)
+    journal.close()
+    assert not journal.has_changes()
+
+
+def test_replay_restores_unsaved_changes(csv_path):
+    dataset = AnnotationDataset()
+    dataset.open(csv_path)
+    dataset.record(dataset.annotate(1, "2"))
+    dataset.record(dataset.skip(3))
+    dataset.record(dataset.set_note(4, "check sender"))
+    dataset.record(dataset.set_note(5, "gone"))
+    dataset.record(dataset.set_note(5, ""))
+    stats = dataset.stats()
+    dataset.close()
+
+    dataset.open(csv_path)
+    assert dataset.df.at[1, dataset.annotation_column] == "2"
+    assert 3 in dataset.skipped
+    assert dataset.notes == {4: "check sender"}
+    assert dataset.stats() == stats
+    dataset.close()
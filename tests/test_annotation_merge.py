@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from annotation_core import AnnotationDataset
+from annotation_merge import REVIEW_SUFFIX, cohen_kappa, fleiss_kappa, majority, merge
+
+
+def test_cohen_kappa_against_hand_computed_matrix():
+    a = np.array([0, 0, 1, 1, 2, 2, 0, 1, -1, 2], dtype=np.int8)
+    b = np.array([0, 1, 1, 1, 2, 0, 0, 1, 0, -1], dtype=np.int8)
+    kappa, confusion, n = cohen_kappa(a, b, 3)
+    assert n == 8
+    assert confusion.tolist() == [[2, 1, 0], [0, 3, 0], [1, 0, 1]]
+    # observed 6/8, expected (3*3 + 3*4 + 2*1) / 64
+    assert kappa == pytest.approx(25 / 41)
+
+
+def test_cohen_kappa_edge_cases():
+    same = np.array([0, 1, 2, 1], dtype=np.int8)
+    assert cohen_kappa(same, same, 3)[0] == pytest.approx(1.0)
+    assert np.isnan(cohen_kappa(same, np.full(4, -1, dtype=np.int8), 3)[0])
+    # Both always say the same single label: agreement by chance only
+    ones = np.ones(4, dtype=np.int8)
+    assert np.isnan(cohen_kappa(ones, ones, 3)[0])
+
+
+def test_fleiss_kappa_against_hand_computed_counts():
+    counts = np.array([[3, 0, 0], [0, 3, 0], [1, 1, 1], [2, 1, 0], [0, 0, 1]])
+    kappa, rows = fleiss_kappa(counts)
+    # The last row has a single rating and is left out
+    assert rows == 4
+    # mean agreement 7/12, expected (6/12)^2 + (5/12)^2 + (1/12)^2
+    assert kappa == pytest.approx(11 / 41)
+
+
+def test_majority_needs_more_than_half():
+    counts = np.array([[2, 1, 0], [1, 1, 0], [0, 0, 1], [0, 0, 0]])
+    assert majority(counts).tolist() == [0, -1, 2, -1]
+
+
+def annotator_csv(path, emails, labels, notes=None):
+    frame = emails.assign(phishing_type=labels, note=notes if notes is not None else [None] * len(emails),
+                          skip_flag=0)
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_merge_by_key(tmp_path, emails):
+    emails = emails.iloc[:6]
+    alice = annotator_csv(tmp_path / "alice.csv", emails, ["1", "2", "3", "1", None, "2"],
+                          notes=["phish?", None, None, None, None, None])
+    bob_labels = pd.Series(["1", "2", "1", "1", "3", None], index=emails.index)
+    # Bob's export is in another order and lacks the last row
+    order = [3, 0, 2, 1, 4]
+    bob = annotator_csv(tmp_path / "bob.csv", emails.iloc[order], bob_labels.iloc[order].tolist())
+
+    output = str(tmp_path / "merged.csv")
+    report = merge([alice, bob], output, key="message_id")
+
+    assert report["missing_rows"] == {"bob": 1}
+    (pair,) = report["pairs"]
+    assert pair["rows"] == 4
+    assert pair["confusion"] == [[2, 0, 0], [0, 1, 0], [1, 0, 0]]
+    assert report["disagreements"] == 1
+
+    merged = pd.read_csv(output, dtype=str, keep_default_na=False)
+    assert merged["message_id"].tolist() == emails["message_id"].tolist()
+    assert merged["annotator_labels"].tolist() == ["1|1", "2|2", "3|1", "1|1", "|3", "2|"]
+    assert merged["phishing_type"].tolist() == ["1", "2", "", "1", "3", "2"]
+    assert merged.at[0, "note"] == "alice: phish?"
+
+    review = pd.read_csv(output + REVIEW_SUFFIX, dtype=str)
+    assert review.to_dict("records") == [
+        {"row": "2", "message_id": "m02", "alice": "3", "bob": "1", "majority": np.nan}
+    ]
+
+
+def test_merge_includes_journaled_changes(tmp_path, emails):
+    alice = annotator_csv(tmp_path / "alice.csv", emails, [None] * len(emails))
+    bob = annotator_csv(tmp_path / "bob.csv", emails, ["2"] * len(emails))
+    dataset = AnnotationDataset()
+    dataset.open(alice)
+    dataset.record(dataset.annotate(0, "2"))
+    dataset.record(dataset.annotate(1, "3"))
+    dataset.close()
+
+    report = merge([alice, bob], str(tmp_path / "merged.csv"))
+    assert report["journaled_changes"] == {"alice": 2}
+    assert report["pairs"][0]["confusion"] == [[0, 0, 0], [0, 1, 0], [0, 1, 0]]
@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+
+import annotation_server
+from annotation_server import AnnotationClient, LeaseError, LeaseManager, RemoteBatch, make_server
+from project_store import ProjectStore
+
+
+@pytest.fixture
+def project(csv_path, tmp_path):
+    path = str(tmp_path / "emails.annproj")
+    ProjectStore.import_csv(csv_path, path, "phishing_type", "note", "skip_flag").close()
+    return path
+
+
+@pytest.fixture
+def manager(project):
+    store = ProjectStore(project)
+    yield LeaseManager(store, lease_seconds=60)
+    store.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(annotation_server.time, "time", lambda: now[0])
+    return now
+
+
+def rows_of(lease):
+    return [record["row"] for record in lease["rows"]]
+
+
+def labels(rows, label="3"):
+    return [{"op": "annotate", "row": row, "value": label} for row in rows]
+
+
+def test_leases_are_disjoint(manager, clock):
+    alice = set(rows_of(manager.lease("alice", 5)))
+    bob = set(rows_of(manager.lease("bob", 5)))
+    assert len(alice) == len(bob) == 5
+    assert not alice & bob
+
+
+def test_changes_outside_the_lease_are_rejected(manager, clock):
+    lease = manager.lease("alice", 2)
+    other = rows_of(manager.lease("bob", 1))[0]
+
+    result = manager.submit("alice", lease["lease_id"], labels([rows_of(lease)[0], other]))
+    assert result == {"applied": 1, "rejected": 1, "relet": 0}
+    assert manager.stats()["rejected"] == 1
+
+    with pytest.raises(LeaseError):
+        manager.submit("bob", lease["lease_id"], [])
+
+
+@pytest.mark.parametrize("changes", [None, [None], ["annotate"], [[1, "2"]], [{"op": "drop", "row": 1}],
+                                     [{"op": "annotate", "row": "1"}]])
+def test_malformed_changes_are_refused(manager, clock, changes):
+    lease = manager.lease("alice", 2)
+    with pytest.raises(ValueError):
+        manager.submit("alice", lease["lease_id"], changes)
+    assert manager.stats()["annotated"] == 0
+
+
+def test_expired_lease_is_relet_for_rows_nobody_holds(manager, clock):
+    lease = manager.lease("alice", 3)
+    rows = rows_of(lease)
+
+    clock[0] += 61
+    # The expired rows go back to the pool; bob takes the first one
+    assert rows_of(manager.lease("bob", 1)) == rows[:1]
+
+    result = manager.submit("alice", lease["lease_id"], labels(rows))
+    assert result == {"applied": 2, "rejected": 1, "relet": 2}
+    assert manager.stats()["annotated"] == 2
+    assert manager.leases[lease["lease_id"]].rows == set(rows[1:])
+
+
+def test_rows_changed_after_expiry_are_not_relet(manager, clock):
+    lease = manager.lease("alice", 3)
+    rows = rows_of(lease)
+    clock[0] += 61
+
+    bob = manager.lease("bob", 3)
+    assert rows_of(bob) == rows
+    clock[0] += 1
+    manager.submit("bob", bob["lease_id"], labels(rows[:1], "1"), release=True)
+
+    clock[0] += 1
+    result = manager.submit("alice", lease["lease_id"], labels(rows))
+    assert result == {"applied": 2, "rejected": 1, "relet": 2}
+    assert manager.store.read_rows(rows[:1])[0]["label"] == "1"
+
+
+def test_only_the_owner_relets_an_expired_lease(manager, clock):
+    lease = manager.lease("bob-2", 2)
+    clock[0] += 61
+    # "bob" is a prefix of the owner's name
+    result = manager.submit("bob", lease["lease_id"], labels(rows_of(lease)))
+    assert result == {"applied": 0, "rejected": 2, "relet": 0}
+    result = manager.submit("bob-2", lease["lease_id"], labels(rows_of(lease)))
+    assert result["applied"] == 2
+
+
+def test_release_returns_rows_to_the_pool(manager, clock):
+    lease = manager.lease("alice", 20)
+    assert not manager.lease("bob", 1)["rows"]
+    manager.release("alice", lease["lease_id"])
+    assert len(manager.lease("bob", 20)["rows"]) == 20
+
+
+def test_http_round_trip(project):
+    server = make_server(project, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        client = AnnotationClient(url, "alice")
+        batch = RemoteBatch(client, client.lease(4), "phishing_type", "note", "skip_flag", submit_every=3)
+        assert batch.apply([("annotate", 0, "2"), ("skip", 1, None)]) is None
+        assert batch.apply([("note", 2, "odd")]) == {"applied": 3, "rejected": 0, "relet": 0}
+        assert client.stats()["annotated"] == 1
+
+        with pytest.raises(RuntimeError, match="400"):
+            client.submit(batch.lease_id, ["not a change"])
+        with pytest.raises(LeaseError):
+            AnnotationClient(url, "bob").submit(batch.lease_id, [])
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.manager.store.close()
@@ -0,0 +1,115 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from annotation_core import AnnotationDataset
+from body_store import BodyStore
+from csv_ingest import read_csv_fast
+
+BODIES = ["plain", None, "héllo wörld ✓", "", "line one\nline two, \"quoted\"", "last"]
+READ_KWARGS = dict(keep_default_na=False, na_values=[""])
+
+
+def write_emails(tmp_path):
+    path = str(tmp_path / "emails.csv")
+    pd.DataFrame({
+        "message_id": [f"m{i}" for i in range(len(BODIES))],
+        "text_cleaned": BODIES,
+        "sender": [f"s{i}@example.com" for i in range(len(BODIES))],
+    }).to_csv(path, index=False)
+    return path
+
+
+def build(path, chunk_rows=4):
+    store = BodyStore(path)
+    df, _ = read_csv_fast(path, chunk_rows=chunk_rows, transform=store.split_chunk, **READ_KWARGS)
+    store.finish_build(df)
+    return store, df
+
+
+def test_offsets_index_the_bodies(tmp_path):
+    store, df = build(write_emails(tmp_path))
+    assert list(df.columns) == ["message_id", "sender"]
+    assert store.columns == ["message_id", "text_cleaned", "sender"]
+    assert len(store) == len(BODIES)
+
+    encoded = [(body or "").encode("utf-8") for body in BODIES]
+    assert store.offsets.tolist() == [0] + np.cumsum([len(body) for body in encoded]).tolist()
+    assert store.missing.tolist() == [False, True, False, True, False, False]
+    assert [store.get(i) for i in range(len(BODIES))] == ["plain", None, "héllo wörld ✓", None,
+                                                          BODIES[4], "last"]
+    store.close()
+
+
+def test_a_restart_at_row_0_discards_the_partial_build(tmp_path):
+    path = write_emails(tmp_path)
+    store = BodyStore(path)
+    chunk = pd.read_csv(path, **READ_KWARGS)
+    store.split_chunk(chunk.iloc[:3])
+    small = store.split_chunk(chunk)
+    store.finish_build(small)
+    assert len(store) == len(BODIES)
+    assert store.get(5) == "last"
+    store.close()
+
+
+def test_reopen_matches_the_csv(tmp_path):
+    path = write_emails(tmp_path)
+    store, df = build(path)
+    store.close()
+
+    reopened = BodyStore.open(path)
+    assert reopened.get(2) == "héllo wörld ✓"
+    assert reopened.read_columns(**READ_KWARGS).equals(df)
+    reopened.close()
+
+    with open(path, "a") as fh:
+        fh.write("m9,new,x@example.com\n")
+    assert BodyStore.open(path) is None
+
+
+def test_write_csv_reinserts_bodies(tmp_path):
+    path = write_emails(tmp_path)
+    store, df = build(path)
+
+    out = io.StringIO()
+    store.write_csv(df, out, chunk_rows=4)
+    with open(path) as fh:
+        assert out.getvalue() == fh.read()
+
+    out = io.StringIO()
+    store.write_csv(df.iloc[[2, 5]], out, rows=np.array([2, 5]))
+    subset = pd.read_csv(io.StringIO(out.getvalue()), **READ_KWARGS)
+    assert subset["text_cleaned"].tolist() == ["héllo wörld ✓", "last"]
+
+    df["sender"] = "changed@example.com"
+    store.save(df, path)
+    assert pd.read_csv(path, **READ_KWARGS)["text_cleaned"].tolist()[4] == BODIES[4]
+    store.close()
+    assert BodyStore.open(path).read_columns(**READ_KWARGS)["sender"].eq("changed@example.com").all()
+
+
+def test_dataset_keeps_bodies_in_the_store(tmp_path):
+    path = write_emails(tmp_path)
+    dataset = AnnotationDataset()
+    dataset.lazy_body_min_bytes = 0
+    dataset.open(path)
+    assert dataset.body_store is not None
+    assert "text_cleaned" not in dataset.df.columns
+    assert dataset.column_values("text_cleaned")[2] == "héllo wörld ✓"
+
+    dataset.record(dataset.annotate(2, "1"))
+    dataset.save()
+    dataset.close()
+    saved = pd.read_csv(path, **READ_KWARGS)
+    assert saved["text_cleaned"].tolist()[4] == BODIES[4]
+    assert saved["phishing_type"].tolist()[2] == 1
+
+    dataset = AnnotationDataset()
+    dataset.lazy_body_min_bytes = 0
+    dataset.open(path)
+    assert os.path.exists(dataset.body_store.data_path)
+    assert dataset.df.at[2, dataset.annotation_column] == "1"
+    dataset.close()
@@ -0,0 +1,84 @@
+import codecs
+
+import pandas as pd
+import pytest
+
+import csv_ingest
+from csv_ingest import iter_csv_chunks, read_csv_fast, sniff_encoding
+
+
+def write(tmp_path, data, name="data.csv"):
+    path = str(tmp_path / name)
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return path
+
+
+@pytest.mark.parametrize("data, encoding", [
+    (codecs.BOM_UTF8 + b"a\n1\n", "utf-8-sig"),
+    ("a\nx\n".encode("utf-16"), "utf-16"),
+    ("a\ncafé\n".encode("utf-8"), "utf-8"),
+    ("a\ncafé\n".encode("latin1"), "latin1"),
+])
+def test_sniff_encoding(tmp_path, data, encoding):
+    assert sniff_encoding(write(tmp_path, data)) == encoding
+
+
+def test_sniff_ignores_a_character_cut_by_the_sample(tmp_path):
+    data = "a\né\n".encode("utf-8")
+    path = write(tmp_path, data)
+    assert sniff_encoding(path, sample_size=data.index(b"\xc3") + 1) == "utf-8"
+
+
+def test_latin1_rows_past_the_sample_are_decoded_in_one_pass(tmp_path):
+    rows = [f"{i},plain text {i}" for i in range(80000)]
+    data = ("id,text\n" + "\n".join(rows) + "\n").encode("utf-8") + "80000,café crème\n".encode("latin1")
+    path = write(tmp_path, data)
+    assert len(data) > csv_ingest.SNIFF_BYTES
+    assert sniff_encoding(path) == "utf-8"
+
+    fractions = []
+    df, encoding = read_csv_fast(path, progress=fractions.append, chunk_rows=10000, dtype=str)
+    assert encoding == "utf-8"
+    assert len(df) == 80001
+    assert df["text"].iloc[-1] == "café crème"
+    assert df["text"].iloc[1234] == "plain text 1234"
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+    assert len(fractions) > 2
+
+
+def test_chunks_keep_absolute_row_numbers(csv_path):
+    chunks = list(iter_csv_chunks(csv_path, chunk_rows=8, dtype=str))
+    assert [chunk.index[0] for chunk in chunks] == [0, 8, 16]
+    assert chunks[2]["message_id"].tolist() == ["m16", "m17", "m18", "m19"]
+
+
+def test_header_only_file(tmp_path):
+    chunks = list(iter_csv_chunks(write(tmp_path, b"a,b\n")))
+    assert len(chunks) == 1
+    assert list(chunks[0].columns) == ["a", "b"] and len(chunks[0]) == 0
+
+
+def test_parser_error_restarts_with_the_python_engine(csv_path, monkeypatch):
+    read_csv = pd.read_csv
+    engines = []
+
+    def failing_c_parser(*args, **kwargs):
+        engines.append(kwargs["engine"])
+        if kwargs["engine"] == "python":
+            return read_csv(*args, **kwargs)
+
+        def chunks():
+            reader = read_csv(*args, **kwargs)
+            yield next(reader)
+            raise pd.errors.ParserError("C error: EOF inside string")
+        return chunks()
+
+    monkeypatch.setattr(csv_ingest.pd, "read_csv", failing_c_parser)
+    starts = [chunk.index[0] for chunk in iter_csv_chunks(csv_path, chunk_rows=8, dtype=str)]
+    assert engines == ["c", "python"]
+    # The restart begins at row 0 again
+    assert starts == [0, 0, 8, 16]
+
+    df, _ = read_csv_fast(csv_path, chunk_rows=8, dtype=str)
+    assert df["message_id"].tolist() == [f"m{i:02d}" for i in range(20)]
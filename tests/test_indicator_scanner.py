@@ -0,0 +1,97 @@
+import json
+import time
+
+import pytest
+
+from indicator_scanner import MISMATCH, IndicatorScanner, load_indicators, registered_domain
+
+
+@pytest.fixture
+def scanner():
+    scanner = IndicatorScanner(load_indicators(), batch_rows=2, cache_rows=3)
+    yield scanner
+    scanner.close()
+
+
+def named(text, spans):
+    return [(text[start:end], name) for start, end, name in spans]
+
+
+def test_phrases_and_links(scanner):
+    text = "URGENT: confirm your bank\n account and Password at https://paypal.com/login or www.example.org"
+    assert named(text, scanner.spans(text)) == [
+        ("URGENT", "urgency"),
+        ("bank\n account", "payment"),
+        ("Password", "credentials"),
+        ("https://paypal.com/login", "link"),
+        ("www.example.org", "link"),
+    ]
+    # Whole words only, longest phrase first
+    assert named("loginpage immediate action", scanner.spans("loginpage immediate action")) == [
+        ("immediate action", "urgency")
+    ]
+    assert scanner.spans("") == [] and scanner.spans(None) == []
+
+
+def test_links_to_another_domain_than_the_sender(scanner):
+    text = "see https://secure.paypal.com/x and http://paypal.com.evil.io/login"
+    names = [name for _, _, name in scanner.spans(text, "PayPal <service@mail.paypal.com>")]
+    assert names == ["link", MISMATCH]
+    assert [name for _, _, name in scanner.spans(text)] == ["link", "link"]
+
+
+def test_mismatch_needs_a_style():
+    scanner = IndicatorScanner({"link": {"links": True, "patterns": [r"https?://\S+"]}})
+    assert scanner.spans("http://evil.io", "a@paypal.com") == [(0, 14, "link")]
+
+
+def test_registered_domain():
+    assert registered_domain("Mail.PayPal.com.") == "paypal.com"
+    assert registered_domain("localhost") == "localhost"
+
+
+def test_load_indicators_keeps_file_order(tmp_path):
+    path = tmp_path / "indicators.json"
+    path.write_text(json.dumps({"indicators": {"b": {"phrases": ["x"]}, "a": {"phrases": ["y"]}}}))
+    assert list(load_indicators(str(path))) == ["b", "a"]
+    path.write_text(json.dumps({"indicators": {"bad": ["x"]}}))
+    with pytest.raises(ValueError, match="'bad'"):
+        load_indicators(str(path))
+
+
+def wait_idle(scanner):
+    deadline = time.monotonic() + 10
+    while scanner.busy:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_background_scans_are_cached_lru(scanner):
+    for row in range(3):
+        scanner.request(row, f"urgent {row}")
+    wait_idle(scanner)
+    assert sorted(scanner.take_done()) == [0, 1, 2]
+    assert scanner.take_done() == []
+    assert scanner.get(1) == [(0, 6, "urgency")]
+
+    # Row 1 was used last, so row 0 is the one evicted
+    scanner.get(2)
+    scanner.get(1)
+    scanner.request(1, "ignored, cached already")
+    scanner.request(3, "password")
+    wait_idle(scanner)
+    assert scanner.take_done() == [3]
+    assert scanner.get(0) is None
+    assert scanner.get(1) == [(0, 6, "urgency")]
+    assert scanner.get(3) == [(0, 8, "credentials")]
+
+
+def test_clear_drops_cached_and_queued_rows(scanner):
+    scanner.request(0, "urgent")
+    wait_idle(scanner)
+    scanner.clear()
+    assert scanner.get(0) is None and scanner.take_done() == []
+
+    scanner.request(0, "password")
+    wait_idle(scanner)
+    assert scanner.get(0) == [(0, 8, "credentials")]
@@ -0,0 +1,98 @@
+import time
+
+import numpy as np
+import pytest
+
+from near_duplicates import NearDuplicateClusters
+
+WORDS = ("account bank verify password urgent invoice payment transfer meeting lunch report project "
+         "schedule holiday refund parcel delivery office update security").split()
+
+
+def components(n, pairs):
+    """
+    Reference union-find: the smallest row of each row's component.
+    """
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for left, right in pairs:
+        a, b = find(left), find(right)
+        parent[max(a, b)] = min(a, b)
+    return [find(x) for x in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_union_matches_a_reference_union_find(seed):
+    rng = np.random.default_rng(seed)
+    n = 300
+    left = rng.integers(0, n, size=200)
+    right = rng.integers(0, n, size=200)
+    labels = np.arange(n, dtype=np.int32)
+    # Merged in several rounds, as the bands are
+    for part in np.array_split(np.arange(200), 4):
+        NearDuplicateClusters._union(labels, left[part], right[part])
+    assert labels.tolist() == components(n, zip(left.tolist(), right.tolist()))
+
+
+def test_union_of_a_long_chain():
+    n = 1000
+    labels = np.arange(n, dtype=np.int32)
+    NearDuplicateClusters._union(labels, np.arange(n - 1, 0, -1), np.arange(n - 2, -1, -1))
+    assert (labels == 0).all()
+
+
+def bodies():
+    rng = np.random.default_rng(3)
+    base = [" ".join(rng.choice(WORDS, size=60)) for _ in range(4)]
+    texts = []
+    for i in range(4):
+        texts.append(base[i])
+        words = base[i].split()
+        words[30] = "changed"
+        texts.append(" ".join(words))  # Near-duplicate of the previous row
+    texts += [None, "", "short note", "short note"]
+    return texts
+
+
+def build(tmp_path, signature=lambda: "v1", texts=None):
+    texts = bodies() if texts is None else texts
+    clusters = NearDuplicateClusters(str(tmp_path / "emails.csv"), signature)
+    clusters.build(((start, texts[start:start + 5]) for start in range(0, len(texts), 5)), len(texts))
+    while not clusters.complete and clusters.error is None:
+        time.sleep(0.01)
+    clusters.cancel()
+    assert clusters.error is None
+    return clusters
+
+
+def test_near_duplicates_are_clustered(tmp_path):
+    clusters = build(tmp_path)
+    for i in range(4):
+        assert clusters.members(2 * i).tolist() == [2 * i, 2 * i + 1]
+    assert clusters.size(8) == clusters.size(9) == 1  # No body
+    assert clusters.members(10).tolist() == [10, 11]  # Identical short bodies
+    assert clusters.labels.tolist() == [0, 0, 2, 2, 4, 4, 6, 6, 8, 9, 10, 10]
+
+
+def test_clusters_are_persisted(tmp_path):
+    signature = ["v1"]
+    clusters = build(tmp_path, lambda: signature[0])
+    assert clusters.persisted
+    reopened = NearDuplicateClusters.open(clusters.data_path, lambda: signature[0], clusters.total_rows)
+    assert np.array_equal(reopened.labels, clusters.labels)
+    assert reopened.members(3).tolist() == [2, 3]
+
+    signature[0] = "v2"
+    assert NearDuplicateClusters.open(clusters.data_path, lambda: signature[0], clusters.total_rows) is None
+
+
+def test_queries_while_clustering():
+    clusters = NearDuplicateClusters("unused.csv", lambda: None)
+    assert clusters.size(3) == 0
+    assert clusters.members(3).tolist() == [3]
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from annotation_core import AnnotationDataset
+from annotation_merge import AnnotatorFile
+from row_ids import RowIds, disambiguate, hash_rows, hashed_columns
+
+
+def opened(path):
+    dataset = AnnotationDataset()
+    dataset.open(path)
+    return dataset
+
+
+def label_of(dataset, message_id):
+    row = int(np.flatnonzero(dataset.column_values("message_id") == message_id)[0])
+    label = dataset.df.at[row, dataset.annotation_column]
+    return (None if pd.isna(label) else label), dataset.notes.get(row), row in dataset.skipped
+
+
+def test_hashed_columns():
+    assert hashed_columns(["text_cleaned", "uid", "message_id"]) == ["message_id"]
+    assert hashed_columns(["text_cleaned", "note", "sender"], exclude=["note"]) == ["text_cleaned", "sender"]
+    assert hashed_columns(["a", "note", "b"], exclude=["note"]) == ["a", "b"]
+
+
+def test_hashes_ignore_dtypes_and_duplicates_get_distinct_ids():
+    ints = hash_rows(pd.DataFrame({"id": [1, 2, 2]}))
+    strings = hash_rows(pd.DataFrame({"id": ["1", "2", "2"]}))
+    assert np.array_equal(ints, strings)
+    assert ints[1] == ints[2]
+
+    ids = disambiguate(ints)
+    assert len(set(ids.tolist())) == 3
+    assert ids[1] == ints[1]
+
+
+def test_ids_are_reused_while_the_csv_is_unchanged(csv_path):
+    dataset = opened(csv_path)
+    dataset.save()
+    ids = dataset.row_ids.ids.copy()
+    dataset.close()
+
+    row_ids = RowIds(csv_path)
+    assert row_ids.open(20)
+    assert np.array_equal(row_ids.ids, ids)
+    assert row_ids.source == "message_id"
+    assert row_ids.position(ids[7]) == 7
+    assert row_ids.position(12345) == -1
+
+
+def test_reattach_after_reordering_and_deleting_rows(csv_path, emails):
+    dataset = opened(csv_path)
+    dataset.record(dataset.annotate(1, "2"))
+    dataset.record(dataset.annotate(2, "3"))
+    dataset.record(dataset.skip(5))
+    dataset.record(dataset.set_note(6, "check"))
+    dataset.save()
+    dataset.close()
+
+    # A fresh export: reversed, row 2 deleted, a new email added, no annotation columns
+    new_row = pd.DataFrame({"message_id": ["m99"], "text_cleaned": ["new"], "sender": ["x@y.z"], "subject": ["s"]})
+    pd.concat([emails.drop(index=2).iloc[::-1], new_row]).to_csv(csv_path, index=False)
+
+    dataset = opened(csv_path)
+    assert label_of(dataset, "m01") == ("2", None, False)
+    assert label_of(dataset, "m05") == (None, None, True)
+    assert label_of(dataset, "m06") == (None, "check", False)
+    assert label_of(dataset, "m99") == (None, None, False)
+    assert dataset.stats()["annotated"] == 1
+    assert dataset.stats()["noted"] == 1
+    dataset.close()
+
+    # The re-attached annotations were journaled and survive a reopen
+    dataset = opened(csv_path)
+    assert label_of(dataset, "m01") == ("2", None, False)
+    dataset.close()
+
+
+def test_reattach_by_content_without_an_id_column(tmp_path, emails):
+    path = str(tmp_path / "plain.csv")
+    emails.drop(columns=["message_id"]).to_csv(path, index=False)
+    dataset = opened(path)
+    dataset.record(dataset.annotate(3, "1"))
+    dataset.save()
+    dataset.close()
+
+    pd.read_csv(path).drop(columns=["phishing_type", "note", "skip_flag"]).iloc[::-1].to_csv(path, index=False)
+    dataset = opened(path)
+    assert dataset.row_ids.source.startswith("content:")
+    labelled = np.flatnonzero(dataset.df[dataset.annotation_column].notna().to_numpy()).tolist()
+    assert labelled == [16]
+    assert dataset.column_values("subject")[16] == "subject 3"
+    dataset.close()
+
+
+def test_journal_replay_follows_row_ids_after_resort(csv_path):
+    dataset = opened(csv_path)
+    dataset.record(dataset.annotate(1, "3"))
+    dataset.close()
+
+    # Replaced by a re-sorted export before the journal was folded in
+    pd.read_csv(csv_path).iloc[::-1].to_csv(csv_path, index=False)
+
+    dataset = opened(csv_path)
+    labelled = np.flatnonzero(dataset.df[dataset.annotation_column].notna().to_numpy()).tolist()
+    assert labelled == [18]
+    assert dataset.column_values("message_id")[18] == "m01"
+    dataset.close()
+
+
+def test_existing_labels_win_over_the_ledger(csv_path):
+    dataset = opened(csv_path)
+    dataset.record(dataset.annotate(4, "1"))
+    dataset.save()
+    dataset.close()
+
+    frame = pd.read_csv(csv_path, dtype=str)
+    frame.loc[4, "phishing_type"] = "3"
+    frame.iloc[::-1].to_csv(csv_path, index=False)
+    dataset = opened(csv_path)
+    assert label_of(dataset, "m04") == ("3", None, False)
+    dataset.close()
+
+
+def test_merge_replays_journal_by_row_id(csv_path, emails):
+    pd.read_csv(csv_path).assign(phishing_type=None, note=None, skip_flag=0).to_csv(csv_path, index=False)
+    dataset = opened(csv_path)
+    dataset.record(dataset.annotate(5, "3"))
+    dataset.record(dataset.set_note(7, "hi"))
+    dataset.record(dataset.annotate(9, "1"))
+    dataset.close()
+
+    # Re-sorted and without row 9 before the journal was folded in
+    pd.read_csv(csv_path).drop(index=9).iloc[::-1].to_csv(csv_path, index=False)
+    annotator = AnnotatorFile(csv_path)
+    assert annotator.replayed == 2
+    assert np.flatnonzero(annotator.labels >= 0).tolist() == [13]
+    assert annotator.notes == {11: "hi"}
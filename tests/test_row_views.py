@@ -0,0 +1,61 @@
+import numpy as np
+
+from annotation_core import AnnotationDataset
+from row_views import RowView, label_view, noted_view, skipped_view, unlabeled_view, value_view
+
+
+def test_refresh_matches_a_full_rebuild():
+    rng = np.random.default_rng(7)
+    flags = rng.random(1000) < 0.3
+    view = RowView.build("flagged", lambda rows: flags[rows])
+
+    for _ in range(50):
+        changed = rng.choice(len(flags), size=rng.integers(1, 40))
+        flags[changed] = rng.random(len(changed)) < 0.5
+        view.refresh(changed)
+        assert np.array_equal(view.rows, np.flatnonzero(flags))
+
+
+def test_navigation():
+    view = RowView("fixed", [9, 2, 5, 2])
+    assert view.rows.tolist() == [2, 5, 9]
+    assert view.next_after(5) == 9
+    assert view.next_after(9) is None
+    assert view.prev_before(5) == 2
+    assert view.prev_before(2) is None
+    assert view.position(6) == 2
+    assert 5 in view and 6 not in view
+    # Fixed views ignore refresh
+    view.refresh([3])
+    assert view.rows.tolist() == [2, 5, 9]
+
+
+def test_dataset_views_follow_edits(csv_path):
+    dataset = AnnotationDataset()
+    dataset.open(csv_path)
+    unlabeled = unlabeled_view(dataset, "Unlabeled")
+    noted = noted_view(dataset, "With note")
+    twos = label_view(dataset, "2", "2")
+    skipped = skipped_view(dataset, "Skipped")
+    views = (unlabeled, noted, twos, skipped)
+
+    edits = [dataset.annotate(1, "2"), dataset.skip(4), dataset.set_note(6, "odd"), dataset.annotate(4, "1"),
+             dataset.skip(9), dataset.apply_labels([2, 3, 9], "2"), dataset.annotate(3, "1")]
+    for changes in edits:
+        rows = [row for _, row, _ in changes]
+        for view in views:
+            view.refresh(rows)
+
+    expected = dataset.df[dataset.annotation_column].isna().to_numpy() & (dataset.df[dataset.skip_column] == 0)
+    assert np.array_equal(unlabeled.rows, np.flatnonzero(expected))
+    assert noted.rows.tolist() == [6]
+    assert twos.rows.tolist() == [1, 2, 9]
+    assert len(skipped) == 0
+    dataset.close()
+
+
+def test_value_view():
+    values = np.array(["a", "b", "a", "c", "a"], dtype=object)
+    view = value_view("a", values, "a")
+    assert view.rows.tolist() == [0, 2, 4]
+    assert view.next_after(2) == 4
@@ -0,0 +1,102 @@
+import os
+import stat
+import threading
+
+import pandas as pd
+import pytest
+
+import save_worker
+from annotation_core import AnnotationDataset
+from annotation_journal import AnnotationJournal
+from save_worker import BackgroundSaver, write_atomic, write_csv_atomic
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_write_atomic_keeps_permissions(tmp_path):
+    path = str(tmp_path / "data.csv")
+    with open(path, "w") as fh:
+        fh.write("old\n")
+    os.chmod(path, 0o644)
+    write_atomic(path, lambda fh: fh.write("new\n"))
+    assert mode(path) == 0o644
+    assert open(path).read() == "new\n"
+
+    created = str(tmp_path / "sidecar.json")
+    write_atomic(created, lambda fh: fh.write("{}"))
+    assert mode(created) == 0o666 & ~save_worker.UMASK
+
+
+def test_failed_write_leaves_the_file(tmp_path):
+    path = str(tmp_path / "data.csv")
+    write_csv_atomic(pd.DataFrame({"a": [1, 2]}), path)
+
+    def fail(fh):
+        fh.write("partial")
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        write_atomic(path, fail)
+    assert pd.read_csv(path)["a"].tolist() == [1, 2]
+    assert os.listdir(tmp_path) == ["data.csv"]
+
+
+def test_requests_during_a_write_are_merged(tmp_path):
+    path = str(tmp_path / "data.csv")
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def slow(target):
+        started.set()
+        release.wait(5)
+        written.append("slow")
+
+    saver = BackgroundSaver()
+    saver.submit(path, slow, tag=1)
+    assert started.wait(5)
+    saver.submit(path, pd.DataFrame({"a": [1]}), tag=2)
+    saver.submit(path, pd.DataFrame({"a": [3]}), tag=3)
+    release.set()
+    assert saver.wait(5)
+
+    results = saver.poll()
+    assert [result.tags for result in results] == [[1], [2, 3]]
+    assert all(result.error is None for result in results)
+    assert written == ["slow"]
+    assert pd.read_csv(path)["a"].tolist() == [3]
+
+
+def test_errors_are_reported(tmp_path):
+    saver = BackgroundSaver()
+    saver.submit(str(tmp_path / "missing" / "data.csv"), pd.DataFrame({"a": [1]}), tag="x")
+    saver.wait(5)
+    (result,) = saver.poll()
+    assert result.tags == ["x"] and result.error is not None
+    assert not saver.busy
+
+
+def test_changes_during_save_stay_journaled(csv_path):
+    dataset = AnnotationDataset()
+    dataset.open(csv_path)
+    dataset.record(dataset.annotate(1, "2"))
+    seq, snapshot = dataset.snapshot()
+    # Made while the snapshot is written
+    dataset.record(dataset.annotate(2, "3"))
+    saver = BackgroundSaver()
+    saver.submit(csv_path, snapshot)
+    saver.wait(5)
+    assert saver.poll()[0].error is None
+    dataset.journal.discard_through(seq)
+    dataset.close()
+
+    saved = pd.read_csv(csv_path, dtype=str)
+    assert saved.at[1, "phishing_type"] == "2"
+    assert pd.isna(saved.at[2, "phishing_type"])
+    assert [record["row"] for record in AnnotationJournal(csv_path).read()] == [2]
+
+    dataset.open(csv_path)
+    assert list(dataset.df[dataset.annotation_column].iloc[[1, 2]]) == ["2", "3"]
+    dataset.close()
@@ -0,0 +1,93 @@
+import re
+import time
+
+import numpy as np
+import pytest
+
+from search_index import SearchIndex
+
+BODIES = [
+    "Please wire the payment today",
+    "Your PayPal account was suspended",
+    "Lunch on Friday?",
+    "Wire transfer pending, verify your account",
+    "wireless headphones on sale",
+    None,
+    "x" * 50 + " token",
+]
+SENDERS = ["boss@corp.local", "service@paypal.com", "friend@example.com", "bank@secure-bank.co",
+           "deals@shop.example", "empty@example.com", "noise@example.com"]
+
+
+def chunks(size=3):
+    for start in range(0, len(BODIES), size):
+        yield start, {"text_cleaned": BODIES[start:start + size], "sender": SENDERS[start:start + size]}
+
+
+@pytest.fixture
+def signature():
+    value = ["v1"]
+    return value, lambda: value[0]
+
+
+@pytest.fixture
+def index(tmp_path, signature):
+    index = SearchIndex(str(tmp_path / "emails.csv"), signature[1])
+    index.build(chunks(), len(BODIES))
+    while index.building:
+        time.sleep(0.01)
+    assert index.complete and index.persisted and index.error is None
+    return index
+
+
+def brute_force(word):
+    return [row for row, text in enumerate(BODIES)
+            if isinstance(text, str) and word in re.findall(r"\w+", text.lower())]
+
+
+@pytest.mark.parametrize("word", ["wire", "account", "your", "on", "lunch", "token", "missing"])
+def test_words_match_a_scan(index, word):
+    assert index.search(word).tolist() == brute_force(word)
+
+
+def test_terms_are_combined_and_prefixes_expand(index):
+    assert index.search("wire account").tolist() == [3]
+    assert index.search("WIRE*").tolist() == [0, 3, 4]
+    assert index.search("wir* payment").tolist() == [0]
+    assert index.search("").tolist() == []
+
+
+def test_column_qualifiers(index):
+    assert index.search("sender:paypal").tolist() == [1]
+    assert index.search("from:example").tolist() == [2, 4, 5, 6]
+    # Plain terms also match metadata tokens
+    assert index.search("paypal").tolist() == [1]
+    assert index.search("body:paypal").tolist() == [1]
+    assert index.search("from:wire").tolist() == []
+
+
+def test_long_runs_are_not_indexed(index):
+    assert index.search("x" * 50).tolist() == []
+
+
+def test_search_while_building(tmp_path, signature):
+    index = SearchIndex(str(tmp_path / "emails.csv"), signature[1])
+    index.total_rows = len(BODIES)
+    start, fields = next(chunks())
+    index.add_chunk(start, fields)
+    assert index.rows_indexed == 3
+    assert index.search("wire").tolist() == [0]
+    assert index.search("pay*").tolist() == [0, 1]
+
+
+def test_persisted_index_is_reused_until_the_data_changes(index, signature):
+    reopened = SearchIndex.open(index.data_path, signature[1], len(BODIES))
+    assert reopened is not None
+    for query in ("wire", "wire*", "sender:paypal", "account your"):
+        assert np.array_equal(reopened.search(query), index.search(query))
+
+    assert SearchIndex.open(index.data_path, signature[1], len(BODIES) + 1) is None
+    signature[0][0] = "v2"
+    assert SearchIndex.open(index.data_path, signature[1], len(BODIES)) is None
+    index.record_signature()
+    assert SearchIndex.open(index.data_path, signature[1], len(BODIES)) is not None
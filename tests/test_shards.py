@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+import pytest
+
+import shards
+from annotation_core import AnnotationDataset
+
+
+@pytest.fixture
+def split_dir(tmp_path, csv_path):
+    directory = str(tmp_path / "parts")
+    # Small chunks so shards span chunk boundaries
+    shards.split(csv_path, directory, shard_rows=7, chunk_rows=5)
+    return directory
+
+
+def annotate_all(path, label="1"):
+    dataset = AnnotationDataset()
+    dataset.open(path)
+    dataset.record(dataset.apply_labels(range(dataset.total_rows), label))
+    dataset.save()
+    dataset.close()
+
+
+def test_split_writes_shards_and_manifests(csv_path, split_dir):
+    manifests = shards.find_manifests(split_dir)
+    assert [manifest.rows for manifest in manifests] == [[0, 7], [7, 14], [14, 20]]
+    assert all(manifest.shards == 3 for manifest in manifests)
+    assert manifests[0].columns == ["message_id"]
+
+    second = pd.read_csv(manifests[1].shard_path, dtype=str)
+    assert second["message_id"].tolist() == [f"m{i:02d}" for i in range(7, 14)]
+    assert {"phishing_type", "note", "skip_flag"} <= set(second.columns)
+    assert shards.global_progress(split_dir)["total"] == 20
+
+
+def test_saving_a_shard_updates_its_manifest(split_dir):
+    path = shards.find_manifests(split_dir)[1].shard_path
+    dataset = AnnotationDataset()
+    dataset.open(path)
+    dataset.record(dataset.annotate(0, "2"))
+    dataset.record(dataset.skip(1))
+    dataset.save()
+    dataset.close()
+
+    manifest = shards.ShardManifest.open(path)
+    assert manifest.progress["annotated"] == 1 and manifest.progress["skipped"] == 1
+    totals = shards.global_progress(split_dir)
+    assert (totals["annotated"], totals["skipped"], totals["classes"]) == (1, 1, {"2": 1})
+    assert shards.global_progress(split_dir, exclude=path)["total"] == 13
+
+
+def test_merge_round_trip(csv_path, split_dir, tmp_path):
+    for manifest in shards.find_manifests(split_dir):
+        annotate_all(manifest.shard_path, "3")
+    output = str(tmp_path / "merged.csv")
+    assert shards.merge(split_dir, output, chunk_rows=4) == 20
+
+    merged = pd.read_csv(output, dtype=str)
+    source = pd.read_csv(csv_path, dtype=str)
+    assert merged[source.columns].equals(source)
+    assert (merged["phishing_type"] == "3").all()
+
+
+def test_merge_refuses_incomplete_or_unsaved_shards(split_dir, tmp_path):
+    output = str(tmp_path / "merged.csv")
+    with pytest.raises(ValueError, match="not fully annotated"):
+        shards.merge(split_dir, output)
+    assert shards.merge(split_dir, output, allow_incomplete=True) == 20
+
+    path = shards.find_manifests(split_dir)[0].shard_path
+    dataset = AnnotationDataset()
+    dataset.open(path)
+    dataset.record(dataset.annotate(0, "1"))
+    dataset.close()
+    with pytest.raises(ValueError, match="unsaved changes"):
+        shards.merge(split_dir, output, allow_incomplete=True)
+
+
+def test_merge_detects_edited_and_missing_shards(split_dir, tmp_path):
+    output = str(tmp_path / "merged.csv")
+    manifests = shards.find_manifests(split_dir)
+
+    frame = pd.read_csv(manifests[2].shard_path, dtype=str)
+    frame.loc[3, "message_id"] = "changed"
+    frame.to_csv(manifests[2].shard_path, index=False)
+    with pytest.raises(ValueError, match="no longer holds"):
+        shards.merge(split_dir, output, allow_incomplete=True)
+
+    os.remove(manifests[1].path)
+    with pytest.raises(ValueError, match="missing or out of order"):
+        shards.merge(split_dir, output, allow_incomplete=True)
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after(statement):
+    """
+    Runs statement in a fresh interpreter. Returns the modules it loaded.
+    """
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_launcher_paints_before_the_data_stack_loads():
+    modules = loaded_after("import annotation_tool")
+    assert not {"numpy", "pandas", "annotation_app", "annotation_core"} & modules
+
+
+def test_app_module_imports_what_it_uses():
+    modules = loaded_after("from annotation_app import CsvAnnotationApp")
+    assert {"numpy", "pandas", "annotation_core", "suggestion_engine"} <= modules
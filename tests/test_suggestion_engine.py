@@ -0,0 +1,107 @@
+import queue
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from suggestion_engine import SuggestionEngine, _Trainer, _serve, _worker, hash_features, take_rows
+
+CLASSES = ["1", "2", "3"]
+TEXTS = ["verify your bank password now", "lunch on friday with the team", "urgent: verify account password",
+         "team meeting notes for friday", "free prize claim now", "project report draft"]
+
+
+def test_hash_features_and_take_rows():
+    indices, values, indptr = hash_features(["a b a", "", "b"], 16)
+    assert indptr.tolist() == [0, 2, 2, 3]
+    assert np.allclose(np.sort(values[:2]), np.log1p([1, 2]))
+    assert np.array_equal(hash_features(["b"], 16)[0], indices[2:])
+
+    taken = take_rows(indices, values, indptr, np.array([2, 1, 0]))
+    assert taken[2].tolist() == [0, 1, 1, 3]
+    assert taken[0].tolist() == indices[[2, 0, 1]].tolist()
+
+
+def test_trainer_counts_follow_label_changes():
+    trainer = _Trainer(CLASSES, 2 ** 10, len(TEXTS))
+    positions = np.array([0, 1, -1, -2, -1, -1], dtype=np.int8)
+    trainer.add_rows(0, positions, TEXTS)
+    assert trainer.class_rows.tolist() == [1, 1, 0]
+    assert trainer.labelled.tolist() == [True, True, False, True, False, False]
+
+    features = hash_features([TEXTS[0], TEXTS[2]], 2 ** 10)
+    trainer.set_labels([0, 2], [2, 0], features, True)
+    assert trainer.class_rows.tolist() == [1, 1, 1]
+    trainer.set_labels([0, 2], [-1, -1], features, True)
+    assert trainer.class_rows.tolist() == [0, 1, 0]
+    assert np.allclose(trainer.feature_counts[[0, 2]], 0)
+
+    # Labels the worker cannot place do not count, and file labels never overwrite live ones
+    trainer.set_labels([4], [7], hash_features([TEXTS[4]], 2 ** 10), True)
+    trainer.set_labels([0], [1], hash_features([TEXTS[0]], 2 ** 10), False)
+    assert trainer.class_rows.tolist() == [0, 1, 0]
+    rows, _ = trainer.unlabeled(0, trainer.chunks[0][1:])
+    assert rows.tolist() == [0, 2, 5]
+
+
+def test_worker_scores_rows_it_kept_on_rescore():
+    requests, results = queue.Queue(), queue.Queue()
+    requests.put(("rows", 0, np.array([0, 1, -1, -1], dtype=np.int8), TEXTS[:4]))
+    requests.put(("rows", 4, np.array([-1, -1], dtype=np.int8), TEXTS[4:]))
+    requests.put(("train", [2], np.array([0], dtype=np.int8), [TEXTS[2]]))
+    requests.put(("rescore",))
+    requests.put(("stop",))
+    _serve(requests, results, _Trainer(CLASSES, 2 ** 10, len(TEXTS)), publish_seconds=0)
+
+    messages = []
+    while not results.empty():
+        messages.append(results.get())
+    scores = [message for message in messages if message[0] == "scores"]
+    assert [message[2].tolist() for message in scores] == [[2, 3], [4, 5], [3], [4, 5]]
+    model = [message[1] for message in messages if message[0] == "model"][-1]
+    assert model.class_rows.tolist() == [2, 1, 0]
+    predicted, _ = model.predict(*hash_features(["verify password", "friday team"], 2 ** 10))
+    assert predicted.tolist() == [0, 1]
+
+
+def test_worker_reports_failures():
+    requests, results = queue.Queue(), queue.Queue()
+    requests.put(("train", [0], [0]))
+    with pytest.raises(ValueError):
+        _worker(requests, results, CLASSES, 2 ** 10, len(TEXTS))
+    kind, error = results.get_nowait()
+    assert kind == "error" and error.startswith("ValueError")
+
+
+def wait_for(condition, engine):
+    deadline = time.monotonic() + 30
+    while not condition():
+        assert time.monotonic() < deadline
+        engine.poll()
+        time.sleep(0.05)
+
+
+def test_engine_suggests_and_notices_a_dead_worker():
+    texts = TEXTS * 5
+    labels = pd.Series([None] * len(texts), dtype=object)
+    labels[[0, 1, 2, 3]] = ["1", "2", "1", "2"]
+    engine = SuggestionEngine(CLASSES, labels, lambda: iter([(0, texts)]), n_features=2 ** 10,
+                              rescore_every=2, min_labels=4)
+    engine.start()
+    try:
+        wait_for(lambda: engine.ready and engine.suggestion(6) is not None, engine)
+        assert engine.suggestion(6)[0] == "1"
+        assert engine.suggestion(7)[0] == "2"
+        assert engine.most_uncertain() is not None
+
+        engine.label_changed(6, "3", texts[6])
+        engine.label_changed(10, "unknown", texts[10])
+        assert engine.labels[[6, 10]].tolist() == [2, -2]
+        wait_for(lambda: engine.model.class_rows.tolist() == [2, 2, 1], engine)
+
+        engine._process.terminate()
+        wait_for(lambda: engine.error is not None, engine)
+        assert engine.error.startswith("worker exited")
+    finally:
+        engine.close()
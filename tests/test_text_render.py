@@ -0,0 +1,144 @@
+import re
+
+from text_render import ProgressiveTextRenderer
+
+
+class FakeText:
+    """
+    The part of the Tk Text API the renderer uses; indexes are offsets.
+    """
+
+    def __init__(self):
+        self.content = ""
+        self.tags = {}  # tag -> [(start, end)]
+        self.piece_tags = []  # (start, end, tags) of inserted pieces
+        self.callbacks = {}
+        self.state = "normal"
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def tag_bind(self, tag, sequence, callback):
+        pass
+
+    def config(self, state=None, cursor=None):
+        if state is not None:
+            self.state = state
+
+    def delete(self, start, end):
+        self.content = ""
+        self.tags = {}
+        self.piece_tags = []
+
+    def index(self, index):
+        assert index == "end-1c"
+        return str(len(self.content))
+
+    def insert(self, index, text, tags=()):
+        assert index == "end" and self.state == "normal"
+        self.piece_tags.append((len(self.content), len(self.content) + len(text), tags))
+        self.content += text
+
+    def tag_add(self, tag, start, end):
+        self.tags.setdefault(tag, []).append((self.offset(start), self.offset(end)))
+
+    @staticmethod
+    def offset(index):
+        base, chars = re.fullmatch(r"(\d+) \+ (\d+) chars", index).groups()
+        return int(base) + int(chars)
+
+    def after(self, delay, callback):
+        after_id = f"after#{len(self.callbacks)}"
+        self.callbacks[after_id] = callback
+        return after_id
+
+    def after_cancel(self, after_id):
+        del self.callbacks[after_id]
+
+    def run_pending(self):
+        while self.callbacks:
+            after_id = next(iter(self.callbacks))
+            self.callbacks.pop(after_id)()
+
+    def yview(self):
+        return (0.0, 1.0)
+
+    def yview_moveto(self, fraction):
+        pass
+
+
+def renderer(**options):
+    widget = FakeText()
+    return widget, ProgressiveTextRenderer(widget, **options)
+
+
+def test_first_screen_then_streamed_in_chunks():
+    widget, render = renderer(first_chars=10, chunk_chars=25, max_line_chars=0)
+    text = "".join(chr(ord("a") + i % 26) for i in range(100))
+    render.render(text)
+    assert widget.content == text[:10]
+    assert not render.complete and widget.state == "disabled"
+
+    widget.run_pending()
+    assert widget.content == text and render.complete
+
+
+def test_rendering_again_cancels_the_stream():
+    widget, render = renderer(first_chars=10, chunk_chars=10, max_line_chars=0)
+    render.render("x" * 100)
+    render.render("short")
+    widget.run_pending()
+    assert widget.content == "short"
+
+
+def test_long_lines_collapse_behind_an_expander():
+    widget, render = renderer(max_line_chars=5)
+    text = "ok\n" + "y" * 12 + "\nend"
+    render.render(text)
+    assert widget.content == "ok\nyyyyy … [7 more characters, show all]\nend"
+    expanders = [widget.content[start:end] for start, end, tags in widget.piece_tags if tags == ("expander",)]
+    assert expanders == [" … [7 more characters, show all]"]
+
+    render.show_all()
+    assert widget.content == text
+
+
+def spans_in(widget, tag):
+    """
+    The tagged text of tag, ranges tagged piece by piece joined up.
+    """
+    merged = []
+    for start, end in sorted(widget.tags.get(tag, [])):
+        if merged and merged[-1][1] == start:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [widget.content[start:end] for start, end in merged]
+
+
+def test_spans_are_tagged_across_pieces_and_collapsed_lines():
+    text = "click here\n" + "z" * 20 + " tail\nverify now"
+    spans = [(6, 10, "link"), (19, 25, "blob"), (text.index("verify"), text.index(" now"), "phrase")]
+    widget, render = renderer(first_chars=4, chunk_chars=4, max_line_chars=10)
+    render.render(text, spans=spans)
+    widget.run_pending()
+    assert spans_in(widget, "link") == ["here"]
+    assert len(widget.tags["link"]) > 1  # Split over pieces
+    # Only the shown part of a span in a cut line is tagged
+    assert spans_in(widget, "blob") == ["zz"]
+    # Offsets after the cut line still line up
+    assert spans_in(widget, "phrase") == ["verify"]
+
+    render.show_all()
+    widget.run_pending()
+    assert spans_in(widget, "blob") == ["zzzzzz"]
+
+
+def test_highlight_tags_shown_and_streamed_pieces():
+    text = "alpha beta gamma delta"
+    widget, render = renderer(first_chars=8, chunk_chars=8, max_line_chars=0)
+    render.render(text)
+    render.highlight([(0, 5, "hit"), (17, 22, "hit")])
+    assert spans_in(widget, "hit") == ["alpha"]
+    widget.run_pending()
+    assert spans_in(widget, "hit") == ["alpha", "delta"]
@@ -0,0 +1,89 @@
+from annotation_core import AnnotationDataset
+from undo_history import Edit, UndoHistory
+
+
+def opened(path):
+    dataset = AnnotationDataset()
+    dataset.open(path)
+    return dataset
+
+
+def edit(n):
+    return Edit([n], None, None, n)
+
+
+def test_undo_and_redo_walk_the_history():
+    history = UndoHistory(capacity=5)
+    assert history.undo() is None and history.redo() is None
+    for n in range(3):
+        history.push(edit(n))
+
+    assert [history.undo().position for _ in range(3)] == [2, 1, 0]
+    assert history.undo() is None and not history.can_undo
+    assert [history.redo().position for _ in range(2)] == [0, 1]
+    assert history.can_undo and history.can_redo
+
+
+def test_a_new_edit_drops_the_undone_ones():
+    history = UndoHistory(capacity=5)
+    for n in range(4):
+        history.push(edit(n))
+    history.undo()
+    history.undo()
+    history.push(edit(9))
+    assert not history.can_redo
+    assert [history.undo().position for _ in range(3)] == [9, 1, 0]
+
+
+def test_full_buffer_drops_the_oldest_edit():
+    history = UndoHistory(capacity=3)
+    for n in range(7):
+        history.push(edit(n))
+    assert [history.undo().position for _ in range(3)] == [6, 5, 4]
+    assert history.undo() is None
+    assert history.redo().position == 4
+
+    # Undone edits are overwritten once the ring wraps around
+    history.push(edit(10))
+    history.push(edit(11))
+    assert [history.undo().position for _ in range(3)] == [11, 10, 4]
+
+    history.clear()
+    assert not history.can_undo and not history.can_redo
+
+
+def test_undo_and_redo_are_inverse_and_journaled(csv_path):
+    dataset = opened(csv_path)
+    dataset.skip(4)
+    dataset.save()
+    history = UndoHistory()
+
+    def apply(rows, mutate):
+        before = dataset.row_state(rows)
+        changes = mutate()
+        history.push(Edit(rows, before, dataset.row_state(rows), rows[0]))
+        dataset.record(changes)
+
+    apply([4], lambda: dataset.annotate(4, "2"))
+    apply([4, 5], lambda: dataset.apply_labels([4, 5], "3") + dataset.set_note(5, "check"))
+    assert dataset.stats()["classes"] == {"3": 2}
+
+    for _ in range(2):
+        undone = history.undo()
+        dataset.record(dataset.restore(undone.rows, undone.before))
+    assert (dataset.stats()["annotated"], dataset.stats()["skipped"]) == (0, 1)
+    assert 4 in dataset.skipped and dataset.notes == {}
+    assert dataset.df[dataset.annotation_column].isna().all()
+
+    redone = history.redo()
+    dataset.record(dataset.restore(redone.rows, redone.after))
+    assert dataset.df.at[4, dataset.annotation_column] == "2"
+    assert 4 not in dataset.skipped
+    dataset.close()
+
+    # The journal replays the undo and redo without a save
+    dataset = opened(csv_path)
+    assert dataset.stats()["classes"] == {"2": 1}
+    assert len(dataset.skipped) == 0 and dataset.notes == {}
+    dataset.close()
+
@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from collections import deque
+
+
+class ProgressiveTextRenderer:
+    """
+    Fills a read-only Text widget in chunks so huge emails never freeze Tk.
+
+    The first screenful is inserted immediately; the rest is streamed in
+    from after() callbacks and cancelled when another text is rendered.
+    Lines longer than max_line_chars (single-line HTML, base64 blobs) are
+    cut short with a clickable "show all" expander that re-renders the
+    full text.
+
+    Highlight spans ((start, end, tag) offsets into the text, sorted)
+    can be given with the text or later with highlight(); each span is
+    tagged as the piece holding it is inserted.
+    """
+
+    def __init__(self, widget, first_chars=8000, chunk_chars=32000, max_line_chars=4000):
+        self.widget = widget
+        self.first_chars = first_chars
+        self.chunk_chars = chunk_chars
+        self.max_line_chars = max_line_chars  # 0 = never collapse
+
+        self.text = ""
+        self.spans = []
+        self._span_starts = []
+        self._longest_span = 0
+        self._pieces = deque()  # (text, tags, offset in self.text or None) still to insert
+        self._inserted = []  # (widget index, offset in self.text, length) of inserted pieces
+        self._after_id = None
+
+        self.widget.tag_configure("expander", foreground="#2980b9", underline=True)
+        self.widget.tag_bind("expander", "<Button-1>", lambda e: self.show_all())
+        self.widget.tag_bind("expander", "<Enter>", lambda e: self.widget.config(cursor="hand2"))
+        self.widget.tag_bind("expander", "<Leave>", lambda e: self.widget.config(cursor=""))
+
+    def render(self, text, collapse=True, spans=None):
+        """
+        Replaces the widget content with text, highlighting spans.
+        """
+        self.cancel()
+        self.text = text
+        self._set_spans(spans)
+        self._inserted = []
+        self._pieces = self._split(self._collapse(text) if collapse else [(text, (), 0)])
+
+        self.widget.config(state="normal")
+        self.widget.delete("1.0", "end")
+        self._insert_upto(self.first_chars)
+        self.widget.config(state="disabled")
+
+        if self._pieces:
+            self._after_id = self.widget.after(1, self._stream)
+
+    def show_all(self):
+        """
+        Re-renders the current text without collapsing long lines.
+        """
+        view = self.widget.yview()[0]
+        self.render(self.text, collapse=False, spans=self.spans)
+        self.widget.yview_moveto(view)
+
+    def highlight(self, spans):
+        """
+        Highlights spans of the current text: the pieces shown already
+        are tagged now, the rest as they are streamed in.
+        """
+        self._set_spans(spans)
+        for index, offset, length in self._inserted:
+            self._tag_spans(index, offset, length)
+
+    def cancel(self):
+        """
+        Stops streaming the rest of the current text.
+        """
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._pieces = deque()
+
+    @property
+    def complete(self):
+        return not self._pieces
+
+    def _stream(self):
+        self._after_id = None
+        self.widget.config(state="normal")
+        self._insert_upto(self.chunk_chars)
+        self.widget.config(state="disabled")
+
+        if self._pieces:
+            self._after_id = self.widget.after(1, self._stream)
+
+    def _insert_upto(self, budget):
+        while self._pieces and budget > 0:
+            piece, tags, offset = self._pieces.popleft()
+            index = self.widget.index("end-1c")
+            self.widget.insert("end", piece, tags)
+            if offset is not None:
+                self._inserted.append((index, offset, len(piece)))
+                self._tag_spans(index, offset, len(piece))
+            budget -= len(piece)
+
+    def _set_spans(self, spans):
+        self.spans = spans or []
+        self._span_starts = [start for start, _, _ in self.spans]
+        self._longest_span = max((end - start for start, end, _ in self.spans), default=0)
+
+    def _tag_spans(self, index, offset, length):
+        """
+        Tags the parts of spans inside the piece of text at offset,
+        inserted at widget index.
+        """
+        end = offset + length
+        first = bisect_left(self._span_starts, offset - self._longest_span)
+        last = bisect_left(self._span_starts, end)
+        for start, stop, tag in self.spans[first:last]:
+            if stop > offset:
+                self.widget.tag_add(
+                    tag, f"{index} + {max(start, offset) - offset} chars", f"{index} + {min(stop, end) - offset} chars"
+                )
+
+    def _collapse(self, text):
+        """
+        Returns (text, tags, offset in text) segments with over-long
+        lines cut short; expanders have no offset.
+        """
+        cap = self.max_line_chars
+        if not cap or len(text) <= cap:
+            return [(text, (), 0)]
+
+        segments = []
+        plain = []
+        start = 0  # Offset of the segment being collected
+        offset = 0  # Offset of the current line
+        for line in text.split("\n"):
+            if len(line) > cap:
+                plain.append(line[:cap])
+                segments.append(("\n".join(plain), (), start))
+                segments.append((f" … [{len(line) - cap:,} more characters, show all]", ("expander",), None))
+                plain = [""]
+                start = offset + len(line)  # The newline ending the cut line
+            else:
+                plain.append(line)
+            offset += len(line) + 1
+        segments.append(("\n".join(plain), (), start))
+        return segments
+
+    def _split(self, segments):
+        """
+        Splits segments into insert-sized pieces.
+        """
+        pieces = deque()
+        size = min(self.first_chars, self.chunk_chars)
+        for text, tags, offset in segments:
+            for start in range(0, len(text), size):
+                pieces.append((text[start:start + size], tags, None if offset is None else offset + start))
+        return pieces
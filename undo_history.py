@@ -0,0 +1,73 @@
+class Edit:
+    """
+    One undoable action: the rows it changed, their (labels, notes, skip
+    flags) state before and after (see AnnotationDataset.row_state), and
+    the row that was shown when it was made.
+    """
+
+    __slots__ = ("rows", "before", "after", "position")
+
+    def __init__(self, rows, before, after, position):
+        self.rows = rows
+        self.before = before
+        self.after = after
+        self.position = position
+
+
+class UndoHistory:
+    """
+    The last `capacity` edits in a fixed-size ring buffer. Undone edits
+    stay in the buffer for redo until a new edit replaces them; once the
+    buffer is full the oldest edit is dropped.
+    """
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self._edits = [None] * capacity
+        self._start = 0  # Slot of the oldest edit
+        self._count = 0  # Edits in the buffer, undone ones included
+        self._undone = 0  # Edits at the end that were undone
+
+    def push(self, edit):
+        # A new edit makes the undone ones unreachable
+        for i in range(self._count - self._undone, self._count):
+            self._edits[(self._start + i) % self.capacity] = None
+        self._count -= self._undone
+        self._undone = 0
+
+        if self._count == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+        self._edits[(self._start + self._count) % self.capacity] = edit
+        self._count += 1
+
+    @property
+    def can_undo(self):
+        return self._count > self._undone
+
+    @property
+    def can_redo(self):
+        return self._undone > 0
+
+    def undo(self):
+        """
+        Returns the most recent edit not undone yet, or None.
+        """
+        if not self.can_undo:
+            return None
+        self._undone += 1
+        return self._edits[(self._start + self._count - self._undone) % self.capacity]
+
+    def redo(self):
+        """
+        Returns the most recently undone edit, or None.
+        """
+        if not self.can_redo:
+            return None
+        edit = self._edits[(self._start + self._count - self._undone) % self.capacity]
+        self._undone -= 1
+        return edit
+
+    def clear(self):
+        self._edits = [None] * self.capacity
+        self._start = self._count = self._undone = 0
@@ -0,0 +1,96 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualRowList(ttk.Frame):
+    """
+    Scrollable list of row positions that only renders the visible window.
+
+    rows is any object with len() and slicing (a list, a SkippedIndex, a
+    NumPy array), so lists with hundreds of thousands of entries cost no
+    more to show than a screenful. on_select(row) is called when an entry
+    is clicked.
+    """
+
+    def __init__(self, master, rows, on_select, height=15, format_row=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.rows = rows
+        self.on_select = on_select
+        self.height = height
+        self.format_row = format_row or (lambda row: f"Row {row + 1}")
+        self.offset = 0  # Index of the first visible entry
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.listbox = tk.Listbox(
+            self,
+            height=height,
+            activestyle="none",
+            exportselection=False,
+            font=('Helvetica', 10)
+        )
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_click)
+        self.listbox.bind("<MouseWheel>", self._on_wheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.listbox.bind("<Prior>", lambda e: self.scroll_by(-self.height))
+        self.listbox.bind("<Next>", lambda e: self.scroll_by(self.height))
+
+        self.refresh()
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-renders the visible window (call after the rows changed).
+        """
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - self.height))
+
+        visible = self.rows[self.offset:self.offset + self.height]
+        self.listbox.delete(0, "end")
+        for row in visible:
+            self.listbox.insert("end", self.format_row(int(row)))
+
+        if total > 0:
+            self.scrollbar.set(self.offset / total, min((self.offset + self.height) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_by(self, entries):
+        self.offset += entries
+        self.refresh()
+        return "break"
+
+    def scroll_to(self, index):
+        """
+        Scrolls so that entry number index is visible.
+        """
+        if not self.offset <= index < self.offset + self.height:
+            self.offset = index - self.height // 2
+            self.refresh()
+
+    def _on_scroll(self, action, amount, unit=None):
+        total = len(self.rows)
+        if action == "moveto":
+            self.offset = int(float(amount) * total)
+            self.refresh()
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def _on_wheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_click(self, event=None):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        index = self.offset + selection[0]
+        if index < len(self.rows):
+            self.on_select(int(self.rows[index]))